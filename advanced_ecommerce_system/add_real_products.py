@@ -11,7 +11,9 @@ from datetime import datetime
 # Proje dizinini path'e ekle
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from core import cache_versions
 from core.database.models import init_database, get_db_session, Product
+from core.database.dashboard_stats import refresh_product_stats
 
 def add_real_products():
     """Gerçek ürünlerinizi buraya ekleyin"""
@@ -89,8 +91,10 @@ def add_real_products():
             'price': product.our_price
         })
     
+    refresh_product_stats(session)
     session.commit()
     session.close()
+    cache_versions.bump(cache_versions.PRODUCTS)
     
     print(f"\n✅ {len(added_products)} gerçek ürün eklendi:")
     for product in added_products:
@@ -0,0 +1,262 @@
+"""
+Vektörel Anomali Motoru
+Tüm katalog için bizim fiyat / piyasa karşılaştırmasını tek numpy geçişinde yapar;
+kural setleri ile eşik, tip ve önem derecesi kuralları yapılandırılabilir
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# MAD'i normal dağılım standart sapmasına ölçekleyen sabit
+MAD_SCALE = 0.6745
+
+# Hazır kural setleri
+RULE_SETS = {
+    # AkakceScraper.detect_price_anomalies kuralları
+    'akakce': {
+        'threshold': 10.0,  # % sapma eşiği
+        'reference': 'mean',  # 'mean' veya 'median' piyasa fiyatı
+        'type_labels': ('price_high', 'price_low'),
+        'severity_bands': [(25.0, 'high'), (15.0, 'medium')],
+        'default_severity': 'low',
+        'robust_z_threshold': None,  # Piyasa median/MAD z-skoru eşiği
+        'history_z_threshold': None,  # Ürünün kendi geçmişine göre z-skoru eşiği
+    },
+    # PriceMonitor.analyze_price_anomalies kuralları
+    'price_monitor': {
+        'threshold': 10.0,
+        'reference': 'mean',
+        'type_labels': ('YÜKSEK', 'DÜŞÜK'),
+        'severity_bands': [(25.0, 'high'), (15.0, 'medium')],
+        'default_severity': 'low',
+        'robust_z_threshold': None,
+        'history_z_threshold': None,
+    },
+    # Aykırı satıcılara dayanıklı kurallar (median referans + MAD / geçmiş z-skoru)
+    'robust': {
+        'threshold': 10.0,
+        'reference': 'median',
+        'type_labels': ('price_high', 'price_low'),
+        'severity_bands': [(25.0, 'high'), (15.0, 'medium')],
+        'default_severity': 'low',
+        'robust_z_threshold': 3.5,
+        'history_z_threshold': 3.0,
+    },
+}
+
+# Piyasa sapması olmadan sadece ürünün kendi geçmişinden sapan fiyatlar
+SUDDEN_CHANGE = 'sudden_change'
+
+
+class AnomalyEngine:
+    """
+    Fiyat dizileri üzerinde çalışan anomali motoru
+    """
+
+    def __init__(self, rules='akakce', **overrides):
+        base = RULE_SETS[rules] if isinstance(rules, str) else rules
+        self.rules = {**RULE_SETS['akakce'], **base, **overrides}
+
+    @staticmethod
+    def _as_array(values, length=None):
+        """Girdiyi float numpy dizisine çevir (None → NaN)"""
+        if values is None:
+            return np.full(length, np.nan)
+        return np.asarray(pd.to_numeric(pd.Series(values), errors='coerce'), dtype=float)
+
+    def detect(self, product_ids, our_prices, market_avg, market_median=None,
+               market_mad=None, history_mean=None, history_std=None) -> Dict[str, np.ndarray]:
+        """
+        Tüm ürünler için sapma, tip ve önem derecesini tek geçişte hesapla.
+        Dönen sözlükteki her anahtar ürün sırasına hizalı bir dizidir.
+        """
+        product_ids = np.asarray(product_ids)
+        n = len(product_ids)
+        our = self._as_array(our_prices)
+        avg = self._as_array(market_avg)
+        median = self._as_array(market_median, n)
+        mad = self._as_array(market_mad, n)
+        hist_mean = self._as_array(history_mean, n)
+        hist_std = self._as_array(history_std, n)
+
+        reference = median if self.rules['reference'] == 'median' else avg
+        # Median yoksa ortalamaya düş
+        reference = np.where(np.isnan(reference), avg, reference)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = np.where(reference > 0, (our - reference) / reference * 100, np.nan)
+            robust_z = np.where(mad > 0, MAD_SCALE * (our - median) / mad, np.nan)
+            history_z = np.where(hist_std > 0, (our - hist_mean) / hist_std, np.nan)
+
+        abs_dev = np.abs(deviation)
+        market_flag = np.nan_to_num(abs_dev, nan=0.0) > self.rules['threshold']
+
+        robust_flag = np.zeros(n, dtype=bool)
+        if self.rules['robust_z_threshold'] is not None:
+            robust_flag = np.nan_to_num(np.abs(robust_z), nan=0.0) > self.rules['robust_z_threshold']
+
+        history_flag = np.zeros(n, dtype=bool)
+        if self.rules['history_z_threshold'] is not None:
+            history_flag = np.nan_to_num(np.abs(history_z), nan=0.0) > self.rules['history_z_threshold']
+
+        is_anomaly = market_flag | robust_flag | history_flag
+
+        high_label, low_label = self.rules['type_labels']
+        anomaly_type = np.where(deviation > 0, high_label, low_label).astype(object)
+        # Piyasaya göre normal ama kendi geçmişinden kopan fiyat
+        only_history = history_flag & ~market_flag & ~robust_flag
+        anomaly_type[only_history] = SUDDEN_CHANGE
+        anomaly_type[~is_anomaly] = None
+
+        bands = self.rules['severity_bands']
+        severity = np.select(
+            [abs_dev > limit for limit, _ in bands],
+            [label for _, label in bands],
+            default=self.rules['default_severity']
+        ).astype(object)
+        severity[~is_anomaly] = None
+
+        return {
+            'product_id': product_ids,
+            'our_price': our,
+            'reference_price': reference,
+            'deviation_percent': deviation,
+            'robust_z': robust_z,
+            'history_z': history_z,
+            'is_anomaly': is_anomaly,
+            'anomaly_type': anomaly_type,
+            'severity': severity,
+        }
+
+    def detect_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Kolonları `detect` argümanlarıyla aynı adlı DataFrame üzerinde çalış"""
+        optional = ['market_median', 'market_mad', 'history_mean', 'history_std']
+        result = self.detect(
+            df['product_id'].to_numpy(),
+            df['our_price'].to_numpy(),
+            df['market_avg'].to_numpy(),
+            **{col: df[col].to_numpy() for col in optional if col in df.columns}
+        )
+        return pd.DataFrame(result)
+
+
+def load_market_aggregates(session, product_ids=None, source=None) -> pd.DataFrame:
+    """
+    Her ürünün son scrape'ine ait piyasa fiyatlarından avg/min/max/median/MAD.
+    Tek sorguda tüm katalog okunur, istatistikler pandas groupby ile hesaplanır.
+    """
+    from sqlalchemy import and_, func
+    from core.database.models import MarketPrice
+
+    latest = session.query(
+        MarketPrice.product_id.label('product_id'),
+        func.max(MarketPrice.scraped_at).label('latest_at')
+    )
+    if source:
+        latest = latest.filter(MarketPrice.source == source)
+    if product_ids is not None:
+        latest = latest.filter(MarketPrice.product_id.in_(list(product_ids)))
+    latest = latest.group_by(MarketPrice.product_id).subquery()
+
+    query = session.query(MarketPrice.product_id, MarketPrice.price).join(
+        latest, and_(MarketPrice.product_id == latest.c.product_id,
+                     MarketPrice.scraped_at == latest.c.latest_at)
+    )
+    if source:
+        query = query.filter(MarketPrice.source == source)
+
+    rows = pd.DataFrame(query.all(), columns=['product_id', 'price'])
+    if rows.empty:
+        return pd.DataFrame(columns=['product_id', 'market_avg', 'market_min', 'market_max',
+                                     'market_median', 'market_mad', 'seller_count'])
+
+    grouped = rows.groupby('product_id')['price']
+    rows['abs_dev'] = (rows['price'] - grouped.transform('median')).abs()
+    aggregates = grouped.agg(market_avg='mean', market_min='min', market_max='max',
+                             market_median='median', seller_count='count')
+    aggregates['market_mad'] = rows.groupby('product_id')['abs_dev'].median()
+    return aggregates.reset_index()
+
+
+def load_history_stats(session, product_ids=None, days=30) -> pd.DataFrame:
+    """Ürünlerin kendi fiyat geçmişi ortalama ve standart sapması (SQL aggregate)"""
+    from sqlalchemy import func
+    from core.database.models import PriceHistory
+
+    start_date = datetime.now() - timedelta(days=days)
+    query = session.query(
+        PriceHistory.product_id,
+        func.avg(PriceHistory.our_price),
+        func.avg(PriceHistory.our_price * PriceHistory.our_price),
+        func.count(PriceHistory.our_price)
+    ).filter(PriceHistory.date >= start_date)
+    if product_ids is not None:
+        query = query.filter(PriceHistory.product_id.in_(list(product_ids)))
+
+    stats = pd.DataFrame(query.group_by(PriceHistory.product_id).all(),
+                         columns=['product_id', 'history_mean', 'history_sq_mean', 'history_count'])
+    variance = (stats['history_sq_mean'] - stats['history_mean'] ** 2).clip(lower=0)
+    # Örneklem varyansı (n-1)
+    count = stats['history_count'].astype(float)
+    stats['history_std'] = np.sqrt(variance * count / (count - 1).where(count > 1))
+    return stats[['product_id', 'history_mean', 'history_std']]
+
+
+def detect_catalogue(session, rules='akakce', source=None, history_days=30, **overrides) -> pd.DataFrame:
+    """Tüm aktif ürünler için son piyasa verisine göre anomali tespiti"""
+    from core.database.models import Product
+
+    products = pd.DataFrame(
+        session.query(Product.id, Product.our_price).filter(Product.is_active == True).all(),
+        columns=['product_id', 'our_price']
+    )
+    market = load_market_aggregates(session, source=source)
+    frame = products.merge(market, on='product_id', how='inner')
+
+    engine = AnomalyEngine(rules, **overrides)
+    if engine.rules['history_z_threshold'] is not None:
+        frame = frame.merge(load_history_stats(session, frame['product_id'], history_days),
+                            on='product_id', how='left')
+
+    result = engine.detect_frame(frame)
+    logger.info(f"Katalog anomali taraması: {len(result)} ürün, {int(result['is_anomaly'].sum())} anomali")
+    return result
+
+
+def run_catalogue_detection(rules='akakce', source='akakce', **overrides) -> int:
+    """Katalog taramasını çalıştır ve açık anomalileri tek transaction'da güncelle"""
+    from core.database.models import get_db_session
+    from core.database.write_behind import WriteBehindBuffer
+
+    session = get_db_session()
+    try:
+        result = detect_catalogue(session, rules=rules, source=source, **overrides)
+    finally:
+        session.close()
+
+    anomalies = result[result['is_anomaly']]
+    note = f"Katalog taraması ile tespit edildi - {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+    with WriteBehindBuffer() as buffer:
+        for row in anomalies.itertuples(index=False):
+            buffer.upsert_anomaly(
+                int(row.product_id), row.anomaly_type, row.severity,
+                float(row.deviation_percent), our_price=float(row.our_price),
+                market_avg_price=float(row.reference_price), notes=note
+            )
+    return len(anomalies)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+    count = run_catalogue_detection()
+    print(f"⚠️ {count} anomali güncellendi")
@@ -0,0 +1,317 @@
+"""
+Akış (Streaming) Anomali Tespiti
+Ürün başına çevrimiçi istatistikler (EWMA ortalama/varyans, P² median taslağı)
+tutar; her yeni fiyat gözleminde O(1) güncelleme ile ani değişimleri işaretler
+"""
+
+import logging
+import math
+import statistics
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SUDDEN_CHANGE = 'sudden_change'
+
+DEFAULT_SETTINGS = {
+    'alpha': 0.1,  # EWMA ağırlığı
+    'z_threshold': 4.0,  # EWMA standart sapmasına göre eşik
+    'min_std_percent': 1.0,  # Std tabanı: EWMA ortalamasının %'si (sabit fiyatta varyans 0 olur)
+    'min_change_percent': 15.0,  # Median'a göre en az % değişim
+    'warmup': 10,  # İşaretlemeden önce gereken gözlem sayısı
+    'window': 50,  # Median taslağının pencere uzunluğu
+    'severity_bands': [(25.0, 'high'), (15.0, 'medium')],
+    'default_severity': 'low',
+}
+
+
+class P2Quantile:
+    """
+    P² algoritması (Jain & Chlamtac) ile sabit bellekte quantile tahmini.
+    Beş işaretçi tutar, her gözlem O(1).
+    """
+
+    def __init__(self, p=0.5, state=None):
+        self.p = p
+        self.q = []  # İşaretçi yükseklikleri
+        self.n = []  # İşaretçi konumları
+        self.np = []  # İstenen konumlar
+        self.count = 0
+        if state:
+            self.p = state['p']
+            self.q = list(state['q'])
+            self.n = list(state['n'])
+            self.np = list(state['np'])
+            self.count = state['count']
+
+    @property
+    def dn(self):
+        p = self.p
+        return [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x):
+        self.count += 1
+        if len(self.q) < 5:
+            self.q.append(x)
+            self.q.sort()
+            if len(self.q) == 5:
+                p = self.p
+                self.n = [1, 2, 3, 4, 5]
+                self.np = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+            return
+
+        q, n = self.q, self.n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = max(i for i in range(4) if q[i] <= x)
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i, increment in enumerate(self.dn):
+            self.np[i] += increment
+
+        for i in range(1, 4):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if not self.q:
+            return None
+        if len(self.q) < 5:
+            ordered = sorted(self.q)
+            return ordered[len(ordered) // 2]
+        return self.q[2]
+
+    def to_dict(self):
+        return {'p': self.p, 'q': self.q, 'n': self.n, 'np': self.np, 'count': self.count}
+
+
+class OnlineSeriesStats:
+    """
+    Tek bir (ürün, seri) için çevrimiçi istatistikler.
+    Median, biri dolan biri önceki pencereye ait iki P² taslağı ile
+    kayan pencere olarak tahmin edilir.
+    """
+
+    def __init__(self, alpha, window, count=0, ewma_mean=None, ewma_var=None, sketch=None):
+        self.alpha = alpha
+        self.window = window
+        self.count = count or 0
+        self.ewma_mean = ewma_mean
+        self.ewma_var = ewma_var or 0.0
+        sketch = sketch or {}
+        self.current = P2Quantile(state=sketch.get('current'))
+        self.previous = P2Quantile(state=sketch.get('previous')) if sketch.get('previous') else None
+
+    @property
+    def median(self):
+        if self.previous is not None and self.current.count < self.window // 2:
+            return self.previous.value()
+        return self.current.value()
+
+    @property
+    def std(self):
+        return math.sqrt(self.ewma_var) if self.ewma_var > 0 else 0.0
+
+    def update(self, x):
+        """Gözlemi işle (EWMA artımsal formülü, West 1979)"""
+        self.count += 1
+        if self.ewma_mean is None:
+            self.ewma_mean = x
+        else:
+            diff = x - self.ewma_mean
+            increment = self.alpha * diff
+            self.ewma_mean += increment
+            self.ewma_var = (1 - self.alpha) * (self.ewma_var + diff * increment)
+
+        self.current.add(x)
+        if self.current.count >= self.window:
+            self.previous = self.current
+            self.current = P2Quantile()
+
+    def sketch_state(self):
+        return {
+            'current': self.current.to_dict(),
+            'previous': self.previous.to_dict() if self.previous else None,
+        }
+
+
+class StreamingAnomalyDetector:
+    """
+    MarketPrice gözlemleri (scrape başına ürün medyanı) geldikçe ani fiyat değişimlerini işaretler.
+    Durum bellekte tutulur; `load_state` / `save_state` ile anomaly_detector_state
+    tablosuna yazılıp okunabilir. Birden fazla yazıcı (dashboard thread'leri,
+    CLI, zamanlayıcı) aynı tabloyu güncellediği için WriteBehindBuffer her
+    flush'ta ilgili ürünlerin durumunu aynı transaction'da yeniden yükler.
+    """
+
+    def __init__(self, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self._stats: Dict[tuple, OnlineSeriesStats] = {}
+        self._dirty = set()
+        self._saving = set()  # save_state ile yazılmış, commit'i beklenen seriler
+
+    def _get_stats(self, product_id, series):
+        key = (product_id, series)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = OnlineSeriesStats(self.settings['alpha'], self.settings['window'])
+            self._stats[key] = stats
+        return stats
+
+    def _severity(self, change_percent):
+        for limit, label in self.settings['severity_bands']:
+            if abs(change_percent) > limit:
+                return label
+        return self.settings['default_severity']
+
+    def observe(self, product_id, series, value, observed_at=None) -> Optional[Dict]:
+        """
+        Yeni gözlemi önceki duruma göre puanla, sonra durumu güncelle.
+        Ani değişim varsa anomali sözlüğü döndürür.
+        """
+        if value is None:
+            return None
+
+        stats = self._get_stats(product_id, series)
+        flag = None
+
+        if stats.count >= self.settings['warmup']:
+            median = stats.median
+            # Sabit fiyatlı seride std 0'dır; taban olmadan ilk sıçrama hiç işaretlenmez
+            std = max(stats.std, abs(stats.ewma_mean) * self.settings['min_std_percent'] / 100)
+            z_score = (value - stats.ewma_mean) / std if std > 0 else 0.0
+            change_percent = (value - median) / median * 100 if median else 0.0
+
+            if abs(z_score) > self.settings['z_threshold'] and abs(change_percent) > self.settings['min_change_percent']:
+                flag = {
+                    'product_id': product_id,
+                    'series': series,
+                    'anomaly_type': SUDDEN_CHANGE,
+                    'severity': self._severity(change_percent),
+                    'value': value,
+                    'baseline_median': median,
+                    'z_score': z_score,
+                    'deviation_percent': change_percent,
+                    'observed_at': observed_at or datetime.now(),
+                }
+
+        stats.update(value)
+        self._dirty.add((product_id, series))
+        return flag
+
+    def observe_market_prices(self, rows):
+        """
+        MarketPrice satırlarını işle: her ürünün bu scrape'teki satıcı fiyatlarının
+        medyanı tek gözlem olarak seriye girer (satıcılar arası fark, zaman içindeki
+        değişim sayılmaz). Ani değişim olan ürünlerin anomali sözlüklerini döndürür.
+        """
+        by_product = {}
+        for row in rows:
+            if row['price'] is not None:
+                prices, _ = by_product.setdefault(row['product_id'], ([], row.get('scraped_at')))
+                prices.append(row['price'])
+
+        flags = []
+        for product_id, (prices, scraped_at) in by_product.items():
+            flag = self.observe(product_id, 'market', statistics.median(prices), scraped_at)
+            if flag:
+                flags.append(flag)
+        return flags
+
+    def load_state(self, session, product_ids=None, for_update=False):
+        """
+        Durumu anomaly_detector_state tablosundan yükle. product_ids verilirse
+        sadece o ürünler yüklenir ve bellekteki (olası eski) kopyaları atılır;
+        for_update: satırlar commit'e kadar kilitlenir (PostgreSQL)
+        """
+        from core.database.models import AnomalyDetectorState
+
+        query = session.query(AnomalyDetectorState)
+        if product_ids is not None:
+            product_ids = set(product_ids)
+            query = query.filter(AnomalyDetectorState.product_id.in_(list(product_ids)))
+            for key in [key for key in self._stats if key[0] in product_ids]:
+                del self._stats[key]
+        if for_update:
+            query = query.with_for_update()
+
+        for state in query.all():
+            self._stats[(state.product_id, state.series)] = OnlineSeriesStats(
+                self.settings['alpha'], self.settings['window'],
+                count=state.count, ewma_mean=state.ewma_mean,
+                ewma_var=state.ewma_var, sketch=state.median_sketch
+            )
+        logger.debug(f"Akış dedektörü durumu yüklendi: {len(self._stats)} seri")
+        return self
+
+    def save_state(self, session):
+        """
+        Değişen serileri anomaly_detector_state tablosuna upsert et. Commit
+        çağırana aittir: commit başarılı olunca state_saved() çağrılmalı; aksi
+        halde seriler değişmiş sayılmaya devam eder ve sonraki kayıtta yazılır.
+        """
+        from core.database.models import AnomalyDetectorState, dialect_insert
+
+        if not self._dirty:
+            return 0
+
+        now = datetime.now()
+        rows = []
+        for product_id, series in self._dirty:
+            stats = self._stats[(product_id, series)]
+            rows.append({
+                'product_id': product_id,
+                'series': series,
+                'count': stats.count,
+                'ewma_mean': stats.ewma_mean,
+                'ewma_var': stats.ewma_var,
+                'median_sketch': stats.sketch_state(),
+                'updated_at': now,
+            })
+
+        stmt = dialect_insert(AnomalyDetectorState.__table__, session.bind)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['product_id', 'series'],
+            set_={column: stmt.excluded[column] for column in
+                  ('count', 'ewma_mean', 'ewma_var', 'median_sketch', 'updated_at')}
+        )
+        session.execute(stmt, rows)
+        self._saving = set(self._dirty)
+        return len(rows)
+
+    def state_saved(self):
+        """save_state ile yazılan seriler commit edildi"""
+        self._dirty -= self._saving
+        self._saving = set()
+
+    def has_pending_state(self):
+        """Kaydedilmemiş (ya da commit'i beklenen) seri var mı"""
+        return bool(self._dirty)
+
+    def discard_changes(self):
+        """Kaydedilmemiş gözlemleri unut (transaction geri alındı; seri tekrar yüklenmeli)"""
+        for key in self._dirty:
+            self._stats.pop(key, None)
+        self._dirty = set()
+        self._saving = set()
@@ -0,0 +1,102 @@
+"""
+Trend Analizi Planı
+İstenen çıktılar (risk, forecast:arima, seasonality, ...) için sadece gereken
+aşamaları tembel (lazy) çalıştırır. Bağımlılıklar ilk ihtiyaçta hesaplanır ve
+plan bağlı olduğu DataFrame için sonuçları saklar; yetersiz veri ya da eksik
+kütüphane gibi ön koşulu sağlanmayan modeller hiç çalıştırılmaz.
+"""
+
+from contextlib import nullcontext
+
+# Çıktı adı -> sonuç anahtarı (comprehensive_analysis sonucundaki alan) ve
+# hesaplayan TrendAnalyzer metodu. 'combine' verilen çıktılar, ön koşulu
+# sağlanan bağımlılıklarının sonuçlarıyla hesaplanır.
+OUTPUTS = {
+    'decomposition': {'key': 'decomposition', 'method': 'decompose_time_series'},
+    'seasonality': {'key': 'seasonality', 'method': 'detect_seasonality'},
+    'forecast:arima': {'key': 'arima', 'method': 'fit_arima_model'},
+    'forecast:lstm': {'key': 'lstm', 'method': 'fit_lstm_model'},
+    'forecast:prophet': {'key': 'prophet', 'method': 'fit_prophet_model'},
+    'forecast': {'key': 'ensemble', 'method': 'create_ensemble_forecast',
+                 'combine': ('forecast:arima', 'forecast:lstm', 'forecast:prophet')},
+    'risk': {'key': 'risk_assessment', 'method': 'assess_price_risk'},
+}
+
+# Sonuç anahtarları ve eski adlar da kabul edilir (örn. 'arima', 'ensemble')
+ALIASES = {
+    **{spec['key']: name for name, spec in OUTPUTS.items() if spec['key'] != name},
+    'forecast:ensemble': 'forecast',
+}
+
+
+def resolve_outputs(outputs):
+    """Çıktı adlarını ('risk', 'arima', 'forecast:arima,risk' ...) kanonik adlara çevir (sıra korunur)"""
+    if isinstance(outputs, str):
+        outputs = outputs.split(',')
+    resolved = []
+    for output in outputs:
+        output = output.strip()
+        if not output:
+            continue
+        name = ALIASES.get(output, output)
+        if name not in OUTPUTS:
+            raise ValueError(f"Bilinmeyen analiz çıktısı: {output} ({', '.join(OUTPUTS)})")
+        if name not in resolved:
+            resolved.append(name)
+    return resolved
+
+
+class AnalysisPlan:
+    """
+    Tek bir DataFrame'e bağlı analiz planı.
+
+        plan = analyzer.plan(df, profiler)
+        plan.get('forecast')            # ARIMA (+ uygunsa LSTM/Prophet) + ensemble
+        plan.evaluate(['risk'])         # {'risk_assessment': {...}}
+
+    Her çıktı en fazla bir kez hesaplanır. Ön koşulu sağlanmayan çıktı
+    {'error': ..., 'skipped': True} döner; ensemble sadece ön koşulu sağlanan
+    tahmin modellerini çalıştırır. profiler (StageProfiler) verilirse sadece
+    gerçekten hesaplanan aşamalar ölçülür. Plan thread'ler arasında paylaşılmaz.
+    """
+
+    def __init__(self, analyzer, df, profiler=None):
+        self.analyzer = analyzer
+        self.df = df
+        self.profiler = profiler
+        self._memo = {}
+
+    def _stage(self, key):
+        return self.profiler.stage(key) if self.profiler is not None else nullcontext()
+
+    def missing_requirement(self, name):
+        """Çıktının hesaplanmasını engelleyen neden (yoksa None)"""
+        return self.analyzer.missing_requirement(OUTPUTS[name]['key'], self.df)
+
+    def get(self, name):
+        """Çıktıyı (gerekirse bağımlılıklarıyla) hesapla; tekrar istenirse saklananı döndür"""
+        name = ALIASES.get(name, name)
+        if name in self._memo:
+            return self._memo[name]
+
+        spec = OUTPUTS[name]
+        reason = self.missing_requirement(name)
+        if reason:
+            value = {'error': reason, 'skipped': True}
+        elif 'combine' in spec:
+            inputs = {
+                OUTPUTS[dependency]['key']: self.get(dependency)
+                for dependency in spec['combine'] if not self.missing_requirement(dependency)
+            }
+            with self._stage(spec['key']):
+                value = getattr(self.analyzer, spec['method'])(inputs)
+        else:
+            with self._stage(spec['key']):
+                value = getattr(self.analyzer, spec['method'])(self.df)
+
+        self._memo[name] = value
+        return value
+
+    def evaluate(self, outputs):
+        """İstenen çıktılar -> {sonuç anahtarı: sonuç}"""
+        return {OUTPUTS[name]['key']: self.get(name) for name in resolve_outputs(outputs)}
@@ -0,0 +1,252 @@
+"""
+Trend Analizi Aşama Profili
+comprehensive_analysis aşamaları (yükleme, decomposition, ARIMA, LSTM, ...)
+için duvar saati, CPU süresi ve tepe bellek ölçümü; istek başına opsiyonel
+cProfile / pyinstrument dökümü ve ürünler arası aşama maliyeti özeti
+"""
+
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    HAS_PYINSTRUMENT = True
+except ImportError:
+    HAS_PYINSTRUMENT = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'profiles'
+)
+PROFILERS = ('cprofile', 'pyinstrument')
+
+MEMORY_RSS = 'rss'
+MEMORY_TRACEMALLOC = 'tracemalloc'
+MEMORY_MODES = (MEMORY_RSS, MEMORY_TRACEMALLOC, None)
+
+# Toplam satırının adı (aşama değil, tüm analizin maliyeti)
+TOTAL = 'total'
+
+# tracemalloc süreç genelidir: eşzamanlı analizlerden ilki bitince izleme
+# kapanmasın diye kullanıcı sayısı tutulur
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_users = 1
+        elif _tracing_users:
+            _tracing_users += 1
+        else:
+            # İzleme dışarıda (örn. test/debug) açılmış; kapatmak bize düşmez
+            return False
+    return True
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+
+def _max_rss_kb():
+    """Sürecin şimdiye kadarki tepe RSS'i (KB; Linux KB, macOS byte döndürür)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak
+
+
+class StageProfiler:
+    """
+    Aşama süreleri:
+
+        profiler = StageProfiler()
+        with profiler:
+            with profiler.stage('arima'):
+                ...
+        results['timings'] = profiler.timings()
+
+    CPU süresi çalışan thread'in süresidir (time.thread_time); aynı anda
+    çalışan diğer analizler ölçüme karışmaz. Bellek (peak_kb) iki modda ölçülür:
+
+    - 'rss' (varsayılan): aşama sırasında süreç tepe RSS'inin artışı. Maliyetsizdir
+      ama sadece sürecin önceki tepesini aşan aşamalarda sıfırdan büyüktür.
+    - 'tracemalloc': aşama içindeki en yüksek Python bellek artışı. Doğrudur ama
+      izleme açıkken bellek ayırma yavaşlar (ARIMA ~3-4 kat); teşhis içindir.
+      Eşzamanlı analizlerde tepe değer süreç geneli olduğundan üst sınırdır.
+    """
+
+    def __init__(self, memory=MEMORY_RSS):
+        if memory not in MEMORY_MODES:
+            raise ValueError(f"Bilinmeyen bellek modu: {memory} ({', '.join(map(str, MEMORY_MODES))})")
+        if memory == MEMORY_RSS and not HAS_RESOURCE:
+            memory = None
+        self.memory = memory
+        self.stages = {}
+        self._started = None
+        self._tracing = False
+
+    def __enter__(self):
+        self._started = (time.perf_counter(), time.thread_time())
+        if self.memory == MEMORY_TRACEMALLOC:
+            self._tracing = _start_tracing()
+        return self
+
+    def __exit__(self, *exc):
+        wall_started, cpu_started = self._started
+        peaks = [stage['peak_kb'] for stage in self.stages.values() if stage['peak_kb'] is not None]
+        self.stages[TOTAL] = {
+            'wall_ms': round((time.perf_counter() - wall_started) * 1000, 3),
+            'cpu_ms': round((time.thread_time() - cpu_started) * 1000, 3),
+            'peak_kb': max(peaks, default=0) if self.memory else None,
+        }
+        if self._tracing:
+            _stop_tracing()
+            self._tracing = False
+
+    def _memory_mark(self):
+        if self.memory == MEMORY_TRACEMALLOC and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0] / 1024
+        if self.memory == MEMORY_RSS:
+            return _max_rss_kb()
+        return None
+
+    def _memory_peak(self, mark):
+        if mark is None:
+            return None
+        if self.memory == MEMORY_TRACEMALLOC:
+            if not tracemalloc.is_tracing():
+                return None
+            return round(max(tracemalloc.get_traced_memory()[1] / 1024 - mark, 0), 1)
+        return round(max(_max_rss_kb() - mark, 0), 1)
+
+    @contextmanager
+    def stage(self, name):
+        """Bir aşamayı ölç (hata olsa da süre kaydedilir)"""
+        mark = self._memory_mark()
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            timing = {
+                'wall_ms': round((time.perf_counter() - wall_started) * 1000, 3),
+                'cpu_ms': round((time.thread_time() - cpu_started) * 1000, 3),
+                'peak_kb': self._memory_peak(mark),
+            }
+            self.stages[name] = timing
+            logger.debug(f"⏱️ {name}: {timing['wall_ms']:.1f} ms (CPU {timing['cpu_ms']:.1f} ms)")
+
+    def timings(self):
+        """results['timings'] / TrendAnalysis.timings içeriği (aşama sırası korunur)"""
+        return dict(self.stages)
+
+
+@contextmanager
+def profile_dump(kind, label, profile_dir=DEFAULT_PROFILE_DIR):
+    """
+    İstek başına profil dökümü (kind: 'cprofile' -> .prof, 'pyinstrument' -> .html).
+    Yazılan dosya bilgisi yield edilen sözlüğe eklenir; profil başlatılamazsa
+    (pyinstrument kurulu değil, thread'de başka profiler aktif) analiz profilsiz sürer.
+    """
+    info = {'format': kind}
+    if kind not in PROFILERS:
+        raise ValueError(f"Bilinmeyen profiler: {kind} ({', '.join(PROFILERS)})")
+    if kind == 'pyinstrument' and not HAS_PYINSTRUMENT:
+        logger.warning("pyinstrument kurulu değil, profil dökümü atlandı (pip install pyinstrument)")
+        info['error'] = 'pyinstrument not installed'
+        yield info
+        return
+
+    profiler = cProfile.Profile() if kind == 'cprofile' else PyinstrumentProfiler()
+    try:
+        if kind == 'cprofile':
+            profiler.enable()
+        else:
+            profiler.start()
+    except (RuntimeError, ValueError) as e:
+        logger.warning(f"Profil başlatılamadı: {e}")
+        info['error'] = str(e)
+        yield info
+        return
+
+    try:
+        yield info
+    finally:
+        os.makedirs(profile_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        if kind == 'cprofile':
+            profiler.disable()
+            path = os.path.join(profile_dir, f'{label}_{stamp}.prof')
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(profile_dir, f'{label}_{stamp}.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+        info['path'] = path
+        logger.info(f"🔬 Profil yazıldı: {path}")
+
+
+def aggregate_stage_costs(rows):
+    """
+    Ürünler arası aşama maliyeti.
+    rows: (product_id, timings) ikilileri (TrendAnalysis.timings)
+    Aşama başına çalışma/ürün sayısı, duvar saati ortalama/medyan/p95/maks,
+    CPU ortalaması, tepe bellek ve toplam süre içindeki pay döndürür.
+    """
+    walls = defaultdict(list)
+    cpus = defaultdict(list)
+    peaks = defaultdict(list)
+    products = defaultdict(set)
+    for product_id, timings in rows:
+        for name, timing in (timings or {}).items():
+            walls[name].append(timing['wall_ms'])
+            cpus[name].append(timing['cpu_ms'])
+            if timing.get('peak_kb') is not None:
+                peaks[name].append(timing['peak_kb'])
+            products[name].add(product_id)
+
+    total_wall = sum(walls.get(TOTAL, [])) or sum(sum(values) for values in walls.values())
+    stages = {}
+    for name, values in walls.items():
+        wall = np.array(values)
+        stages[name] = {
+            'runs': len(values),
+            'products': len(products[name]),
+            'wall_ms': {
+                'mean': round(float(wall.mean()), 3),
+                'median': round(float(np.median(wall)), 3),
+                'p95': round(float(np.percentile(wall, 95)), 3),
+                'max': round(float(wall.max()), 3),
+            },
+            'cpu_ms_mean': round(float(np.mean(cpus[name])), 3),
+            'peak_kb_max': max(peaks[name]) if peaks[name] else None,
+            'peak_kb_mean': round(float(np.mean(peaks[name])), 1) if peaks[name] else None,
+            'share': round(float(wall.sum()) / total_wall, 4) if total_wall and name != TOTAL else None,
+        }
+    # En pahalı aşama önce
+    return dict(sorted(stages.items(), key=lambda item: (item[0] != TOTAL, -item[1]['wall_ms']['mean'])))
@@ -41,22 +41,43 @@ except ImportError:
     print("Warning: Prophet not available. Install with: pip install prophet")
 
 import logging
+import os
+import sys
 from typing import Dict, List, Tuple, Optional
 import json
 import pickle
 
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.serialization import dumps, series_to_columns
+from analysis.trend_analysis.stage_profiler import DEFAULT_PROFILE_DIR, MEMORY_RSS, StageProfiler, profile_dump
+from analysis.trend_analysis.analysis_plan import OUTPUTS, AnalysisPlan, resolve_outputs
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Model başına en az (boş olmayan) veri noktası ve yetersiz veri mesajı
+MIN_POINTS = {'decomposition': 14, 'arima': 30, 'lstm': 50, 'prophet': 20}
+INSUFFICIENT_DATA = {
+    'decomposition': 'Insufficient data for decomposition',
+    'arima': 'Insufficient data for ARIMA model',
+    'lstm': 'Insufficient data for LSTM model',
+    'prophet': 'Insufficient data for Prophet model',
+}
+
 class TrendAnalyzer:
     """
     Gelişmiş trend analizi ve fiyat tahmini sınıfı
     """
     
-    def __init__(self):
+    def __init__(self, memory_profile: Optional[str] = MEMORY_RSS, profile_dir: str = DEFAULT_PROFILE_DIR):
         self.models = {}
         self.scalers = {}
         self.results = {}
+        # Aşama bellek ölçümü: 'rss' (maliyetsiz), 'tracemalloc' (doğru ama yavaş), None
+        self.memory_profile = memory_profile
+        self.profile_dir = profile_dir
         
     def load_price_data(self, product_id: int, days: int = 90) -> pd.DataFrame:
         """
@@ -102,8 +123,8 @@ class TrendAnalyzer:
         """
         Zaman serisi decomposition analizi
         """
-        if len(df) < 14:  # Minimum data requirement
-            return {'error': 'Insufficient data for decomposition'}
+        if len(df) < MIN_POINTS['decomposition']:  # Minimum data requirement
+            return {'error': INSUFFICIENT_DATA['decomposition']}
         
         try:
             # Seasonal decomposition
@@ -139,10 +160,11 @@ class TrendAnalyzer:
                 'seasonal_strength': float(seasonal_strength),
                 'trend_direction': trend_direction,
                 'trend_slope': float(trend_slope) if 'trend_slope' in locals() else 0,
+                # Kolon bazlı: {'dates': datetime64 dizisi, 'values': float dizisi}
                 'components': {
-                    'trend': trend.to_dict(),
-                    'seasonal': seasonal.to_dict(),
-                    'residual': residual.to_dict()
+                    'trend': series_to_columns(trend),
+                    'seasonal': series_to_columns(seasonal),
+                    'residual': series_to_columns(residual)
                 }
             }
             
@@ -195,8 +217,8 @@ class TrendAnalyzer:
         try:
             data = df[price_col].dropna()
             
-            if len(data) < 30:
-                return {'error': 'Insufficient data for ARIMA model'}
+            if len(data) < MIN_POINTS['arima']:
+                return {'error': INSUFFICIENT_DATA['arima']}
             
             # Stationarity test
             adf_result = adfuller(data)
@@ -227,8 +249,10 @@ class TrendAnalyzer:
             conf_int = fitted_model.get_forecast(steps=7).conf_int()
             
             # Model performance
-            fitted_values = fitted_model.fittedvalues
-            mae = mean_absolute_error(data[1:], fitted_values)  # Skip first value
+            # İlk değer atlanır (fark alınan modellerde ilk fitted değer anlamsız);
+            # fittedvalues veri ile aynı uzunlukta olduğundan o da kaydırılır
+            fitted_values = fitted_model.fittedvalues[1:]
+            mae = mean_absolute_error(data[1:], fitted_values)
             rmse = np.sqrt(mean_squared_error(data[1:], fitted_values))
             
             self.models['arima'] = fitted_model
@@ -261,8 +285,8 @@ class TrendAnalyzer:
         try:
             data = df[price_col].dropna().values.reshape(-1, 1)
             
-            if len(data) < 50:
-                return {'error': 'Insufficient data for LSTM model'}
+            if len(data) < MIN_POINTS['lstm']:
+                return {'error': INSUFFICIENT_DATA['lstm']}
             
             # Normalization
             scaler = MinMaxScaler()
@@ -358,8 +382,8 @@ class TrendAnalyzer:
             prophet_df = prophet_df.rename(columns={'date': 'ds', price_col: 'y'})
             prophet_df = prophet_df[['ds', 'y']].dropna()
             
-            if len(prophet_df) < 20:
-                return {'error': 'Insufficient data for Prophet model'}
+            if len(prophet_df) < MIN_POINTS['prophet']:
+                return {'error': INSUFFICIENT_DATA['prophet']}
             
             # Create and fit model
             model = Prophet(
@@ -400,100 +424,150 @@ class TrendAnalyzer:
             logger.error(f"Error in Prophet modeling: {e}")
             return {'error': str(e)}
     
-    def comprehensive_analysis(self, product_id: int, days: int = 90) -> Dict:
+    def missing_requirement(self, key: str, df: pd.DataFrame, price_col: str = 'our_price') -> Optional[str]:
+        """
+        Aşamanın çalışmasını engelleyen neden (eksik kütüphane, yetersiz veri).
+        Model fit edilmeden önce kontrol edilir; yoksa None
+        """
+        if key == 'lstm' and not HAS_TENSORFLOW:
+            return 'TensorFlow not available for LSTM model'
+        if key == 'prophet' and not PROPHET_AVAILABLE:
+            return 'Prophet not available'
+        minimum = MIN_POINTS.get(key)
+        if minimum and int(df[price_col].notna().sum()) < minimum:
+            return INSUFFICIENT_DATA[key]
+        return None
+    
+    def default_outputs(self) -> List[str]:
+        """Tam analizin çıktıları (Prophet kurulu değilse hariç)"""
+        return [name for name in OUTPUTS if name != 'forecast:prophet' or PROPHET_AVAILABLE]
+    
+    def plan(self, df: pd.DataFrame, profiler: Optional[StageProfiler] = None) -> AnalysisPlan:
+        """DataFrame'e bağlı tembel analiz planı (çıktılar ilk istendiğinde hesaplanır)"""
+        return AnalysisPlan(self, df, profiler)
+    
+    def comprehensive_analysis(self, product_id: int, days: int = 90, outputs: Optional[List[str]] = None,
+                               profile: Optional[str] = None, persist: bool = True) -> Dict:
         """
-        Kapsamlı trend analizi - tüm modelleri çalıştır
+        Trend analizi. outputs verilmezse tüm modeller çalışır; verilirse sadece
+        istenen çıktılar ve bağımlılıkları hesaplanır (örn. ['risk'] ya da
+        ['forecast:arima', 'seasonality'], bkz. analysis_plan.OUTPUTS).
+        Aşama süreleri results['timings']'e yazılır; profile='cprofile' veya
+        'pyinstrument' ile bu analiz için profil dökümü alınır (results['profile']).
+        persist=True ise özet ve süreler trend_analysis tablosuna kaydedilir.
         """
-        logger.info(f"Starting comprehensive analysis for product {product_id}")
+        outputs = resolve_outputs(outputs) if outputs is not None else self.default_outputs()
+        if profile:
+            with profile_dump(profile, f'trend_{product_id}_{days}d', self.profile_dir) as dump:
+                results = self._run_analysis(product_id, days, outputs)
+            results['profile'] = dump
+        else:
+            results = self._run_analysis(product_id, days, outputs)
         
-        # Load data
-        df = self.load_price_data(product_id, days)
-        if df.empty:
-            return {'error': 'No data available'}
+        if persist and 'error' not in results:
+            self.record_analysis(results, days)
+        return results
+    
+    def _run_analysis(self, product_id: int, days: int, outputs: List[str]) -> Dict:
+        logger.info(f"Starting trend analysis for product {product_id}: {', '.join(outputs)}")
+        profiler = StageProfiler(memory=self.memory_profile)
         
-        results = {
-            'product_id': product_id,
-            'analysis_date': datetime.now().isoformat(),
-            'data_points': len(df),
-            'date_range': {
-                'start': df.index.min().isoformat(),
-                'end': df.index.max().isoformat()
+        with profiler:
+            # Load data
+            with profiler.stage('load'):
+                df = self.load_price_data(product_id, days)
+            if df.empty:
+                return {'error': 'No data available'}
+            
+            results = {
+                'product_id': product_id,
+                'analysis_date': datetime.now().isoformat(),
+                'data_points': len(df),
+                'date_range': {
+                    'start': df.index.min().isoformat(),
+                    'end': df.index.max().isoformat()
+                },
+                'outputs': outputs
             }
-        }
-        
-        # 1. Time series decomposition
-        logger.info("Running time series decomposition...")
-        results['decomposition'] = self.decompose_time_series(df)
-        
-        # 2. Seasonality detection
-        logger.info("Detecting seasonality patterns...")
-        results['seasonality'] = self.detect_seasonality(df)
-        
-        # 3. ARIMA model
-        logger.info("Fitting ARIMA model...")
-        results['arima'] = self.fit_arima_model(df)
-        
-        # 4. LSTM model
-        logger.info("Training LSTM model...")
-        results['lstm'] = self.fit_lstm_model(df)
-        
-        # 5. Prophet model
-        if PROPHET_AVAILABLE:
-            logger.info("Fitting Prophet model...")
-            results['prophet'] = self.fit_prophet_model(df)
-        
-        # 6. Ensemble prediction
-        results['ensemble'] = self.create_ensemble_forecast(results)
-        
-        # 7. Risk assessment
-        results['risk_assessment'] = self.assess_price_risk(df)
+            
+            # Sadece istenen çıktılar ve bağımlılıkları çalışır (örn. 'forecast' ->
+            # ön koşulu sağlanan ARIMA/LSTM/Prophet + ensemble)
+            results.update(self.plan(df, profiler).evaluate(outputs))
         
+        results['timings'] = profiler.timings()
         self.results[product_id] = results
         
-        logger.info("Comprehensive analysis completed")
+        slowest = max((name for name in results['timings'] if name != 'total'),
+                      key=lambda name: results['timings'][name]['wall_ms'])
+        logger.info(f"Trend analysis completed in {results['timings']['total']['wall_ms']:.0f} ms "
+                    f"(slowest stage: {slowest})")
         return results
     
+    def record_analysis(self, results: Dict, days: int):
+        """Analiz özetini ve aşama sürelerini trend_analysis tablosuna yaz"""
+        from core.database.models import get_db_session, TrendAnalysis
+        
+        decomposition = results.get('decomposition', {})
+        seasonality = results.get('seasonality', {})
+        risk = results.get('risk_assessment', {})
+        session = get_db_session()
+        try:
+            session.add(TrendAnalysis(
+                product_id=results['product_id'],
+                analysis_type='comprehensive' if results.get('outputs') == self.default_outputs() else 'partial',
+                trend_direction=decomposition.get('trend_direction'),
+                trend_strength=decomposition.get('trend_strength'),
+                seasonality_detected=bool(seasonality.get('seasonality_detected', False)),
+                analysis_period=days,
+                # NumPy/NaN değerleri JSON kolonuna uygun hale getir
+                trend_data=json.loads(dumps({
+                    'outputs': results.get('outputs'),
+                    'data_points': results['data_points'],
+                    'date_range': results['date_range'],
+                    'trend_slope': decomposition.get('trend_slope'),
+                    'seasonal_strength': decomposition.get('seasonal_strength'),
+                    'seasonality_strength': seasonality.get('seasonality_strength'),
+                    'risk_level': risk.get('risk_level'),
+                    'volatility': risk.get('volatility'),
+                })),
+                forecast_data=json.loads(dumps(results.get('ensemble'))),
+                timings=results.get('timings')
+            ))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error recording analysis: {e}")
+        finally:
+            session.close()
+    
     def create_ensemble_forecast(self, results: Dict) -> Dict:
         """
         Ensemble tahmin oluştur (model ortalamas)
         """
         try:
-            forecasts = []
-            weights = []
-            
-            # ARIMA
-            if 'arima' in results and 'forecast' in results['arima']:
-                forecasts.append(np.array(results['arima']['forecast']))
-                weights.append(1.0 / (results['arima']['rmse'] + 1e-6))
-            
-            # LSTM
-            if 'lstm' in results and 'forecast' in results['lstm']:
-                forecasts.append(np.array(results['lstm']['forecast']))
-                weights.append(1.0 / (results['lstm']['rmse'] + 1e-6))
+            # Plan sadece ön koşulu sağlanan modelleri verir; ağırlıklar sıraya göre
+            # değil model adıyla eşlenir (örn. ARIMA + Prophet)
+            models = [name for name in ('arima', 'lstm', 'prophet')
+                      if name in results and 'forecast' in results[name]]
             
-            # Prophet
-            if 'prophet' in results and 'forecast' in results['prophet']:
-                forecasts.append(np.array(results['prophet']['forecast']))
-                weights.append(1.0 / (results['prophet']['rmse'] + 1e-6))
-            
-            if not forecasts:
+            if not models:
                 return {'error': 'No valid forecasts to ensemble'}
             
-            # Weighted average
-            weights = np.array(weights)
+            # Weighted average (1 / RMSE)
+            forecasts = [np.array(results[name]['forecast']) for name in models]
+            weights = np.array([1.0 / (results[name]['rmse'] + 1e-6) for name in models])
             weights = weights / weights.sum()
             
             ensemble_forecast = np.zeros(len(forecasts[0]))
-            for i, forecast in enumerate(forecasts):
-                ensemble_forecast += weights[i] * forecast
+            for weight, forecast in zip(weights, forecasts):
+                ensemble_forecast += weight * forecast
+            
+            model_weights = dict.fromkeys(('arima', 'lstm', 'prophet'), 0)
+            model_weights.update({name: float(weight) for name, weight in zip(models, weights)})
             
             return {
                 'forecast': ensemble_forecast.tolist(),
-                'model_weights': {
-                    'arima': float(weights[0]) if len(weights) > 0 else 0,
-                    'lstm': float(weights[1]) if len(weights) > 1 else 0,
-                    'prophet': float(weights[2]) if len(weights) > 2 else 0
-                },
+                'model_weights': model_weights,
                 'forecast_dates': [(datetime.now() + timedelta(days=i+1)).isoformat() for i in range(7)]
             }
             
@@ -556,8 +630,8 @@ class TrendAnalyzer:
         Analiz sonuçlarını kaydet
         """
         if product_id in self.results:
-            with open(filepath, 'w') as f:
-                json.dump(self.results[product_id], f, indent=2, default=str)
+            with open(filepath, 'wb') as f:
+                f.write(dumps(self.results[product_id], indent=True))
             logger.info(f"Analysis saved to {filepath}")
         else:
             logger.error(f"No analysis results found for product {product_id}")
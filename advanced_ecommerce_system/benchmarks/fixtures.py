@@ -0,0 +1,193 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Benchmark Fixture'ları
+Veri ölçekleri, ölçek başına geçici SQLite veritabanı ve canlı servislerin
+(Networks API, Akakçe) yerine geçen yerel fixture HTTP sunucusu
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database import models
+from core.database.models import Product
+from generate_load_data import LoadDataGenerator
+
+# Ölçek başına veri boyutu: veritabanı (ürün × gün × satıcı), Networks feed'i ve
+# scraper'a verilen ürün sayısı
+SCALES = {
+    'tiny': {'products': 20, 'days': 45, 'sellers': 3, 'feed_products': 20, 'scrape_products': 3},
+    'small': {'products': 200, 'days': 60, 'sellers': 4, 'feed_products': 200, 'scrape_products': 10},
+    'medium': {'products': 2000, 'days': 90, 'sellers': 8, 'feed_products': 2000, 'scrape_products': 25},
+    'large': {'products': 10000, 'days': 180, 'sellers': 8, 'feed_products': 10000, 'scrape_products': 50},
+}
+
+FEED_PATH = '/networks/products'
+
+
+def networks_feed(count, seed=42):
+    """Networks API getProductList yanıtı biçiminde deterministik ürün listesi"""
+    brands = ('Apple', 'Samsung', 'Xiaomi', 'Lenovo', 'Asus')
+    categories = ('Telefon', 'Laptop', 'Tablet', 'Kulaklık')
+    return [{
+        'stockCode': f'HBCV{index:06d}',
+        'productName': f'Benchmark Ürün {index}',
+        'productFullName': f'{brands[index % len(brands)]} Benchmark Ürün {index} {seed}',
+        'brand': brands[index % len(brands)],
+        'productCategoryName': categories[index % len(categories)],
+        'sellPrice': str(round(1000 + (index * 7919 + seed) % 50000, 2)),
+        'stockQuantity': index % 50,
+    } for index in range(1, count + 1)]
+
+
+def _price(key, index):
+    """URL'den türetilen sabit fiyat (aynı sayfa her istekte aynı fiyatları verir)"""
+    digest = int(hashlib.md5(f'{key}:{index}'.encode()).hexdigest()[:8], 16)
+    return 1000 + digest % 90000 + (digest % 100) / 100
+
+
+def _format_try(value):
+    """12345.6 -> '12.345,60 TL' (Akakçe sayfasındaki biçim)"""
+    return f'{value:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.') + ' TL'
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Networks feed'i, Akakçe arama ve ürün sayfaları"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == FEED_PATH:
+            self._send(self.server.feed_body, 'application/json')
+        elif url.path.startswith('/arama'):
+            query = parse_qs(url.query).get('q', [''])[0]
+            slug = hashlib.md5(query.encode()).hexdigest()[:12]
+            links = ''.join(
+                f'<div class="p"><a href="/urun-{slug}-{index}.html">{query} Varyant {index}</a></div>'
+                for index in range(3)
+            )
+            self._send(f'<html><head><title>Arama</title></head><body>{links}</body></html>'.encode(), 'text/html')
+        elif url.path.endswith('.html'):
+            rows = ''.join(
+                f'<tr><td>{index + 1}</td><td>Satıcı {index + 1}</td><td>{_format_try(_price(url.path, index))}</td></tr>'
+                for index in range(self.server.sellers)
+            )
+            body = f'<html><head><title>Ürün</title></head><body><table class="w"><tr><th>#</th><th>Satıcı</th><th>Fiyat</th></tr>{rows}</table></body></html>'
+            self._send(body.encode(), 'text/html')
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Arka plan thread'inde çalışan yerel HTTP sunucusu.
+
+    with FixtureServer(feed_products=200) as server:
+        AkakceScraper(base_url=server.url, polite_delay=False)
+    """
+
+    def __init__(self, feed_products=100, sellers=6):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.feed_body = json.dumps(networks_feed(feed_products), ensure_ascii=False).encode()
+        self._httpd.sellers = sellers
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def networks_config(self):
+        """NetworksAPISyncer.config yerine kullanılacak ayarlar"""
+        return {'networks_api': {'username': 'benchmark', 'password': 'benchmark', 'api_url': self.url + FEED_PATH}}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='benchmark-fixtures', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class BenchmarkDataset:
+    """
+    Bir ölçek için geçici veritabanı (global database manager bu veritabanına
+    yönlendirilir) ve fixture sunucusu. Veri generate_load_data ile sabit
+    seed'den üretilir; aynı ölçek her commit'te aynı veriyle ölçülür.
+    """
+
+    def __init__(self, scale='small', directory=None, seed=42):
+        if scale not in SCALES:
+            raise ValueError(f"Bilinmeyen ölçek: {scale} ({', '.join(SCALES)})")
+        self.scale = scale
+        self.settings = SCALES[scale]
+        self.seed = seed
+        self._tempdir = None if directory else tempfile.TemporaryDirectory(prefix=f'benchmark-{scale}-')
+        self.directory = directory or self._tempdir.name
+        self.server = None
+        self.counts = {}
+        self.product_ids = []
+
+    def __enter__(self):
+        manager = models.reset_db_manager(f"sqlite:///{os.path.join(self.directory, 'benchmark.db')}")
+        manager.create_tables()
+        self.counts = LoadDataGenerator(
+            products=self.settings['products'], days=self.settings['days'],
+            sellers=self.settings['sellers'], seed=self.seed
+        ).write_database()
+
+        session = manager.get_session()
+        try:
+            self.product_ids = [row.id for row in session.query(Product.id).order_by(Product.id)]
+        finally:
+            session.close()
+
+        self.server = FixtureServer(self.settings['feed_products']).start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.server is not None:
+            self.server.stop()
+        manager = models._db_manager
+        if manager is not None:
+            manager.engine.dispose()
+        models._db_manager = None
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def scrape_targets(self):
+        """Scraper benchmark'ına verilecek ürünler (get_networks_products biçiminde)"""
+        session = models.get_db_session()
+        try:
+            rows = session.query(Product.id, Product.name, Product.brand, Product.our_price).order_by(
+                Product.id
+            ).limit(self.settings['scrape_products']).all()
+            return [{'id': row.id, 'name': row.name, 'brand': row.brand, 'our_price': row.our_price} for row in rows]
+        finally:
+            session.close()
@@ -0,0 +1,168 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Benchmark Çalıştırıcısı
+Ölçüm (ısınma + tekrar), sonuçların commit bazlı JSON dosyalarına yazılması
+ve iki sonuç dosyasının karşılaştırılması
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(PROJECT_DIR, 'benchmarks', 'results')
+
+DEFAULT_SETTINGS = {
+    'rounds': 5,  # Ölçülen tekrar sayısı
+    'warmup': 1,  # Ölçülmeyen ısınma turu (import, ilk sorgu planı, bağlantı havuzu)
+    'threshold': 0.10,  # Karşılaştırmada medyan değişiminin anlamlı sayıldığı oran
+}
+
+
+def git_revision(cwd=PROJECT_DIR):
+    """(kısa commit hash'i, çalışma ağacında commit edilmemiş değişiklik var mı)"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return revision, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+class BenchmarkRunner:
+    """
+    Fonksiyonları ölçer ve sonuçları toplar.
+
+    runner.measure('grup.isim', func, items=100) func'ı önce `warmup` kez
+    ölçmeden, sonra `rounds` kez ölçerek çalıştırır. items verilirse saniyedeki
+    öğe sayısı (ürün, satır, istek) da hesaplanır. only verilirse sadece adı bu
+    öneklerden biriyle başlayan benchmark'lar çalışır.
+    """
+
+    def __init__(self, only=None, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.only = tuple(only or ())
+        self.results = {}
+
+    def selected(self, name):
+        return not self.only or name.startswith(self.only)
+
+    def wants_suite(self, suite):
+        """Senaryonun benchmark'larından biri seçili olabilir mi (benchmark adları senaryo adıyla başlar)"""
+        return not self.only or any(suite.startswith(prefix) or prefix.startswith(suite) for prefix in self.only)
+
+    def measure(self, name, func, items=None, rounds=None, setup=None):
+        """func'ı ölç; setup verilirse her turdan önce (ölçüm dışında) çağrılır"""
+        if not self.selected(name):
+            return None
+        rounds = rounds or self.settings['rounds']
+
+        for _ in range(self.settings['warmup']):
+            if setup:
+                setup()
+            func()
+
+        timings = []
+        for _ in range(rounds):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+
+        median = statistics.median(timings)
+        result = {
+            'rounds': rounds,
+            'min': min(timings),
+            'max': max(timings),
+            'mean': statistics.fmean(timings),
+            'median': median,
+            'stdev': statistics.stdev(timings) if rounds > 1 else 0.0,
+        }
+        if items:
+            result['items'] = items
+            result['items_per_second'] = items / median if median else None
+        self.results[name] = result
+        return result
+
+    def document(self, scale, dataset=None):
+        """Sonuç dosyasının içeriği"""
+        revision, dirty = git_revision()
+        return {
+            'revision': revision,
+            'dirty': dirty,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'scale': scale,
+            'dataset': dataset or {},
+            'settings': self.settings,
+            'machine': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'benchmarks': self.results,
+        }
+
+
+def save_results(document, output_dir=RESULTS_DIR):
+    """Sonuçları <commit>-<ölçek>.json olarak yaz (commit edilmemiş değişiklikte -dirty eki)"""
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = '-dirty' if document['dirty'] else ''
+    path = os.path.join(output_dir, f"{document['revision']}{suffix}-{document['scale']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=DEFAULT_SETTINGS['threshold']):
+    """
+    İki sonuç dokümanını medyan süreye göre karşılaştır.
+    Her ortak benchmark için (isim, eski, yeni, oran, durum) döndürür; durum
+    'regression' / 'improvement' / 'same'
+    """
+    rows = []
+    for name in sorted(set(baseline['benchmarks']) & set(current['benchmarks'])):
+        before = baseline['benchmarks'][name]['median']
+        after = current['benchmarks'][name]['median']
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'same'
+        rows.append((name, before, after, ratio, status))
+    return rows
+
+
+def format_results(results):
+    """Sonuç tablosu (konsol)"""
+    width = max((len(name) for name in results), default=10)
+    lines = [f"{'benchmark':<{width}}  {'median':>10}  {'min':>10}  {'stdev':>9}  {'öğe/sn':>10}"]
+    for name, result in results.items():
+        rate = result.get('items_per_second')
+        lines.append(
+            f"{name:<{width}}  {result['median'] * 1000:>8.1f}ms  {result['min'] * 1000:>8.1f}ms  "
+            f"{result['stdev'] * 1000:>7.1f}ms  {f'{rate:,.0f}' if rate else '-':>10}"
+        )
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    """Karşılaştırma tablosu (konsol)"""
+    marks = {'regression': '🔴', 'improvement': '🟢', 'same': '⚪'}
+    width = max((len(name) for name, *_ in rows), default=10)
+    lines = [f"{'benchmark':<{width}}  {'önce':>10}  {'sonra':>10}  {'oran':>6}"]
+    for name, before, after, ratio, status in rows:
+        lines.append(f"{name:<{width}}  {before * 1000:>8.1f}ms  {after * 1000:>8.1f}ms  {ratio:>5.2f}x {marks[status]}")
+    return '\n'.join(lines)
@@ -0,0 +1,143 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Benchmark Senaryoları
+Her senaryo (runner, dataset) alır ve ölçümlerini runner.measure ile kaydeder.
+Ağır modüller senaryo içinde import edilir; sadece seçilen senaryolar yüklenir.
+"""
+
+import os
+import sys
+import time
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 202 + iş numarası dönen istekte /api/jobs/<id> yoklama aralığı (saniye)
+JOB_POLL_SECONDS = 0.05
+
+# Dashboard GET route'ları ({pid}: ölçekteki ilk ürün). Yazan/arka plan işi
+# başlatan route'lar (çözümleme, scraping tetikleme, sync) ve SSE akışı dahil
+# değildir; sync ve scraping kendi senaryolarında ölçülür. 202 dönen route'lar
+# (uzun trend analizi) iş bitene kadar yoklanır; ölçüm sonucu da kapsar.
+FLASK_ROUTES = [
+    '/',
+    '/product/{pid}',
+    '/analytics',
+    '/anomalies',
+    '/api/products',
+    '/api/anomalies',
+    '/api/product/{pid}/chart',
+    '/api/product/{pid}/trend-analysis',
+    '/api/dashboard-stats',
+    '/api/scraping/status',
+    '/api/networks-stats',
+    '/metrics',
+]
+
+
+def _expect(result, name):
+    """Hata yolunu ölçmemek için sonucu doğrula"""
+    if result is False or result is None or (isinstance(result, dict) and 'error' in result):
+        raise RuntimeError(f"{name} başarısız: {result!r}")
+    return result
+
+
+def networks_sync(runner, dataset):
+    """NetworksAPISyncer.sync_products_to_database, yerel Networks feed'i ile"""
+    from core.sync_networks_api import NetworksAPISyncer
+
+    syncer = NetworksAPISyncer()
+    syncer.config = dataset.server.networks_config
+    # Isınma turu ürünleri ekler, ölçülen turlar güncelleme yolunu ölçer
+    runner.measure(
+        'networks_sync.sync_products_to_database',
+        lambda: _expect(syncer.sync_products_to_database(), 'sync_products_to_database'),
+        items=dataset.settings['feed_products']
+    )
+
+
+def data_pipeline(runner, dataset):
+    """DataPipeline.prepare_ml_dataset (tüm ürünler ve tek ürün)"""
+    from core.ml_models.data_pipeline import DataPipeline
+
+    data_dir = os.path.join(dataset.directory, 'ml')
+    product_id = dataset.product_ids[0]
+    runner.measure(
+        'data_pipeline.prepare_ml_dataset.all',
+        lambda: DataPipeline(data_dir).prepare_ml_dataset(),
+        items=dataset.counts['price_history']
+    )
+    runner.measure(
+        'data_pipeline.prepare_ml_dataset.product',
+        lambda: DataPipeline(data_dir).prepare_ml_dataset(product_id),
+        items=dataset.settings['days']
+    )
+
+
+def trend_analyzer(runner, dataset):
+    """TrendAnalyzer.comprehensive_analysis (tek ürün, ölçeğin tüm günleri; tam ve kısmi çıktılar)"""
+    from analysis.trend_analysis.trend_analyzer import TrendAnalyzer
+
+    product_id = dataset.product_ids[0]
+    days = dataset.settings['days']
+    runner.measure(
+        'trend_analyzer.comprehensive_analysis',
+        lambda: _expect(TrendAnalyzer().comprehensive_analysis(product_id, days), 'comprehensive_analysis'),
+        rounds=min(runner.settings['rounds'], 3)
+    )
+    # Dashboard kartlarının istediği kadarı (analysis_plan çıktıları)
+    for outputs in (['risk'], ['forecast:arima', 'risk', 'seasonality']):
+        runner.measure(
+            f"trend_analyzer.outputs.{'+'.join(outputs)}",
+            lambda outputs=outputs: _expect(
+                TrendAnalyzer().comprehensive_analysis(product_id, days, outputs=outputs, persist=False), 'outputs'
+            )
+        )
+
+
+def flask_routes(runner, dataset):
+    """Dashboard route'ları test client ile (yanıt önbelleği her istekten önce boşaltılır)"""
+    from web_dashboard.app import app
+    from web_dashboard.cache import response_cache
+
+    client = app.test_client()
+    pid = dataset.product_ids[0]
+
+    def request(url):
+        response = client.get(url)
+        # Arka plana düşen iş: sadece kuyruğa alma süresini değil, sonucu ölç
+        while response.status_code == 202:
+            time.sleep(JOB_POLL_SECONDS)
+            response = client.get(response.headers.get('Location') or response.get_json()['status_url'])
+        if response.status_code != 200:
+            raise RuntimeError(f"{url}: HTTP {response.status_code}")
+
+    for route in FLASK_ROUTES:
+        url = route.format(pid=pid)
+        runner.measure(f'flask.GET {route}', lambda url=url: request(url), setup=response_cache.clear)
+
+
+def akakce_scraper(runner, dataset):
+    """AkakceScraper arama + fiyat sayfası + write-behind kayıt, fixture sunucusu ile"""
+    from scrapers.akakce_scraper import AkakceScraper
+
+    scraper = AkakceScraper(base_url=dataset.server.url, polite_delay=False)
+    products = dataset.scrape_targets()
+    search_term = f"{products[0]['brand']} {products[0]['name']}"
+    runner.measure(
+        'akakce_scraper.scrape_product_data',
+        lambda: _expect(scraper.scrape_product_data(search_term), 'scrape_product_data')
+    )
+    runner.measure(
+        'akakce_scraper.scrape_products',
+        lambda: scraper.scrape_products(products),
+        items=len(products)
+    )
+
+
+SUITES = {
+    'networks_sync': networks_sync,
+    'data_pipeline': data_pipeline,
+    'trend_analyzer': trend_analyzer,
+    'flask': flask_routes,
+    'akakce_scraper': akakce_scraper,
+}
@@ -0,0 +1,281 @@
+"""
+Asenkron Fiyat Takip Pipeline'ı
+PriceMonitor akışını (ürün listesi → arama → parse → karşılaştırma → kayıt)
+asyncio kuyrukları ve aşama başına sınırlı eşzamanlılık ile çalıştırır
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import sys
+import textwrap
+import threading
+from datetime import datetime
+
+import requests
+
+# core dizinini path'e ekle (price_monitor ile aynı import düzeni)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from price_monitor import PriceMonitor
+
+# Kuyruklarda aşama sonunu bildiren işaret
+_STOP = object()
+
+
+class AnomalyReportWriter:
+    """
+    price_anomalies_<zaman>.json raporunu anomaliler geldikçe yazar.
+    Dosya JSON dizisi olarak açılır; close() (hata durumunda da) diziyi kapatır,
+    yarıda kalan çalışmanın raporu da geçerli JSON olur.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename or f"price_anomalies_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        self.count = 0
+        self._file = open(self.filename, 'w', encoding='utf-8')
+        self._file.write('[')
+
+    def write(self, anomaly):
+        item = textwrap.indent(json.dumps(anomaly, indent=4, ensure_ascii=False), '    ')
+        self._file.write((',\n' if self.count else '\n') + item)
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write('\n]' if self.count else ']')
+        self._file.close()
+        logging.info(f"Sonuçlar kaydedildi: {self.filename}")
+
+
+class AsyncPriceMonitor(PriceMonitor):
+    """
+    PriceMonitor'ün asyncio varyantı.
+
+    Her aşama kendi işçi havuzuyla çalışır; aşamalar arasındaki kuyruklar
+    sınırlı olduğu için yavaş bir aşama önceki aşamayı bekletir (backpressure).
+    Persist aşaması anomalileri geldikleri anda, ürün sırasıyla rapor dosyasına
+    yazar; çalışma sonunda bellekte biriken bir yazım kuyruğu yoktur.
+    Akakçe istekleri arasındaki nezaket beklemesi işçi başına uygulanır, böylece
+    N ürün için toplam bekleme N × request_delay yerine
+    N × request_delay / search_concurrency olur.
+    """
+
+    def __init__(self, config_file='../config.json'):
+        super().__init__(config_file)
+        pipeline = self.config['settings'].get('pipeline', {})
+        self.search_concurrency = pipeline.get('search_concurrency', 4)
+        self.parse_concurrency = pipeline.get('parse_concurrency', 2)
+        self.queue_size = pipeline.get('queue_size', 16)
+        self._local = threading.local()
+
+    def _thread_session(self):
+        """İşçi thread'i başına ayrı HTTP session (requests.Session thread-safe değil)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            self._local.session = session
+        return session
+
+    def _fetch_in_thread(self, search_term):
+        """Arama sayfasını thread'e ait session ile indir"""
+        return self.fetch_akakce_search_page(search_term, self._thread_session())
+
+    async def _run_stage(self, name, handler, in_queue, out_queue, concurrency, downstream_workers):
+        """Bir aşamayı `concurrency` işçiyle çalıştır, bitince sonraki aşamaya durdurma işareti gönder"""
+        async def worker():
+            while True:
+                item = await in_queue.get()
+                if item is _STOP:
+                    break
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    logging.error(f"Pipeline '{name}' aşaması hatası: {e}")
+                    continue
+                if result is not None and out_queue is not None:
+                    await out_queue.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        if out_queue is not None:
+            for _ in range(downstream_workers):
+                await out_queue.put(_STOP)
+
+    async def run_async(self, max_products=None, resume=None):
+        """
+        Asenkron ana çalışma fonksiyonu (max_products=None: tüm katalog,
+        resume: yarıda kalan çalışmanın job_uuid'si)
+        """
+        logging.info("=== Networks Fiyat Takip Sistemi Başlıyor (async) ===")
+
+        # 1. Fetch: Networks API'den ürünleri al
+        products = await asyncio.to_thread(self.get_networks_api_products)
+        if not products:
+            logging.error("Networks API'den ürün alınamadı!")
+            return False
+
+        selected = products if max_products is None else products[:max_products]
+        total = len(selected)
+        logging.info(
+            f"Toplam {len(products)} ürün bulundu, {total} tanesi işlenecek "
+            f"(arama: {self.search_concurrency}, parse: {self.parse_concurrency} işçi)"
+        )
+
+        # Önceki çalışmada biten ürünler aranmaz; saklanan sonuçları karşılaştırmaya girer
+        checkpoint = await asyncio.to_thread(self.open_checkpoint, total, resume)
+        stored = checkpoint.results()
+        completed = [(index, product, stored.get(str(product['id'])))
+                     for index, product in enumerate(selected) if str(product['id']) in checkpoint.done]
+        if completed:
+            logging.info(f"⏯️ {len(completed)} ürün önceki çalışmada tamamlanmış, atlanıyor")
+
+        search_queue = asyncio.Queue(maxsize=self.queue_size)
+        parse_queue = asyncio.Queue(maxsize=self.queue_size)
+        compare_queue = asyncio.Queue(maxsize=self.queue_size)
+        persist_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        delay_range = self.config['settings']['request_delay']
+        anomalies = []
+        report = await asyncio.to_thread(AnomalyReportWriter)
+
+        async def search(item):
+            # 2. Search: nezaket beklemesi event loop'u bloklamaz
+            index, product = item
+            search_term = f"{product['brand']} {product['name']}".strip()
+            logging.info(f"İşleniyor ({index + 1}/{total}): {search_term}")
+            await asyncio.sleep(random.uniform(*delay_range))
+            try:
+                content = await asyncio.to_thread(self._fetch_in_thread, search_term)
+            except Exception as e:
+                logging.error(f"Akakçe arama hatası ({search_term}): {e}")
+                content = None
+            return index, product, search_term, content
+
+        async def parse(item):
+            # 3. Parse: BeautifulSoup işi event loop dışında. Hatalı sayfa ürünü
+            # düşürmez; piyasa verisi yok sayılır (persist sırası boşluk beklemez)
+            index, product, search_term, content = item
+            akakce_data = None
+            if content is not None:
+                try:
+                    akakce_data = await asyncio.to_thread(self.parse_akakce_prices, content, search_term)
+                except Exception as e:
+                    logging.error(f"Akakçe parse hatası ({search_term}): {e}")
+            return index, product, akakce_data
+
+        def compare_batch(batch):
+            # Checkpoint işaretleri, anomali motoru ve checkpoint yazımı senkron;
+            # event loop'u bloklamamak için thread'de çalışır
+            for _, product, data in batch:
+                if str(product['id']) not in checkpoint.done:
+                    checkpoint.mark(product['id'], data is not None, data)
+            found = self.compare_with_market([(product, data) for _, product, data in batch])
+            checkpoint.flush()
+            by_id = {anomaly['product_id']: anomaly for anomaly in found}
+            return [(index, by_id.get(product['id'])) for index, product, _ in batch]
+
+        async def compare_stage():
+            # 4. Compare: parse sonuçları kuyruk kapasitesi kadar biriktirilip
+            # anomali motorunda tek vektörel geçişte değerlendirilir. Her ürün
+            # (anomalisi yoksa None ile) persist aşamasına iletilir. Bir grubun
+            # hatası loglanır, sonraki gruplar ve persist aşaması etkilenmez
+            batch = list(completed)
+            done = False
+            try:
+                while not done:
+                    item = await compare_queue.get()
+                    done = item is _STOP
+                    if not done:
+                        batch.append(item)
+                    if batch and (done or len(batch) >= self.queue_size):
+                        try:
+                            results = await asyncio.to_thread(compare_batch, batch)
+                        except Exception as e:
+                            logging.error(f"Pipeline 'compare' aşaması hatası ({len(batch)} ürün): {e}")
+                            results = [(index, None) for index, _, _ in batch]
+                        batch = []
+                        for result in results:
+                            await persist_queue.put(result)
+            finally:
+                await persist_queue.put(_STOP)
+
+        async def persist_stage():
+            # 5. Persist: sonuçlar ürün sırasına göre dizilir, sıradaki ürün
+            # geldiği anda anomalisi rapora yazılır (yazım thread'de). Kaybolan
+            # bir ürün sırayı sadece çalışma sonuna kadar bekletir
+            waiting = []
+            next_index = 0
+
+            async def write(anomaly):
+                try:
+                    await asyncio.to_thread(report.write, anomaly)
+                    anomalies.append(anomaly)
+                except Exception as e:
+                    logging.error(f"Pipeline 'persist' aşaması hatası ({anomaly['product_name']}): {e}")
+
+            while True:
+                item = await persist_queue.get()
+                if item is _STOP:
+                    break
+                heapq.heappush(waiting, item)  # Ürün sırası (index) tekil
+                while waiting and waiting[0][0] == next_index:
+                    _, anomaly = heapq.heappop(waiting)
+                    next_index += 1
+                    if anomaly is not None:
+                        await write(anomaly)
+
+            while waiting:
+                _, anomaly = heapq.heappop(waiting)
+                if anomaly is not None:
+                    await write(anomaly)
+
+        async def produce():
+            for item in enumerate(selected):
+                if str(item[1]['id']) not in checkpoint.done:
+                    await search_queue.put(item)
+            for _ in range(self.search_concurrency):
+                await search_queue.put(_STOP)
+
+        pipeline = asyncio.gather(
+            produce(),
+            self._run_stage('search', search, search_queue, parse_queue,
+                            self.search_concurrency, self.parse_concurrency),
+            self._run_stage('parse', parse, parse_queue, compare_queue,
+                            self.parse_concurrency, 1),
+            compare_stage(),
+            persist_stage(),
+        )
+        try:
+            await pipeline
+        except BaseException as e:
+            await asyncio.to_thread(checkpoint.finish, 'failed', str(e) or type(e).__name__)
+            logging.error(f"Çalışma yarıda kaldı, devam etmek için: --resume {checkpoint.job_uuid}")
+            raise
+        finally:
+            await asyncio.to_thread(report.close)
+        await asyncio.to_thread(checkpoint.finish)
+
+        await asyncio.to_thread(self.log_anomaly_summary, anomalies)
+
+        logging.info("=== İşlem Tamamlandı ===")
+        return True
+
+    def run(self, max_products=10, resume=None):
+        """Ana çalışma fonksiyonu (senkron arayüz, içeride asyncio)"""
+        return asyncio.run(self.run_async(max_products, resume))
+
+
+def main():
+    """Manuel çalıştırma"""
+    monitor = AsyncPriceMonitor()
+    monitor.run(max_products=None)  # Tüm katalog
+
+if __name__ == "__main__":
+    main()
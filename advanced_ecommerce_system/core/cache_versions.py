@@ -0,0 +1,124 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Önbellek Sürüm Anahtarları
+Yazan modüller (sync, scraping, anomali çözümleme) ilgili tabloyu değiştirdiğinde
+sürümü artırır; yanıt önbelleği anahtarlarına bu sürümleri katarak eski
+yanıtları kendiliğinden geçersiz kılar.
+
+Sürümler dashboard_stats tablosunda ('cache_version:<alan>') tutulur; böylece
+scraper, zamanlayıcı ya da CLI gibi başka process'lerin yazımları da dashboard
+önbelleğini geçersiz kılar. Okuma process başına en fazla `refresh_seconds`
+aralıkla tek bir sorgudur; aradaki istekler bellekteki kopyayı kullanır.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Önbelleğe etki eden veri alanları
+PRODUCTS = 'products'
+ANOMALIES = 'anomalies'
+MARKET_PRICES = 'market_prices'
+PRICE_HISTORY = 'price_history'
+
+KEY_PREFIX = 'cache_version:'
+
+DEFAULT_SETTINGS = {
+    'refresh_seconds': 1.0,  # Paylaşılan sürümlerin en fazla bu kadar eski kopyası kullanılır
+}
+
+_lock = threading.Lock()
+_shared = {}  # Veritabanındaki sürümlerin son okunan kopyası
+_local = {}  # Veritabanına yazılamayan artışlar (sadece bu process'te geçerli)
+_refreshed_at = None
+_source = None  # Sürümlerin okunduğu DatabaseManager (değişirse kopya sıfırlanır)
+
+
+def _manager():
+    """Güncel DatabaseManager; veritabanı değiştiyse (örn. testler) eski kopyayı bırak"""
+    global _source, _refreshed_at
+    from core.database.models import get_db_manager
+
+    manager = get_db_manager()
+    if manager is not _source:
+        with _lock:
+            _shared.clear()
+            _local.clear()
+        _source = manager
+        _refreshed_at = None
+    return manager
+
+
+def _merge(values):
+    """Sürümler sadece artar; yarışan bir okuma eski değeri geri yazmasın"""
+    for namespace, value in values.items():
+        if value > _shared.get(namespace, 0):
+            _shared[namespace] = value
+
+
+def bump(*namespaces):
+    """Verilen alanların sürümünü artır (kendi kısa transaction'ında)"""
+    from sqlalchemy import func
+
+    from core.database.models import DashboardStat, dialect_insert
+
+    keys = [KEY_PREFIX + namespace for namespace in namespaces]
+    session = _manager().get_session()
+    try:
+        table = DashboardStat.__table__
+        stmt = dialect_insert(table, session.bind)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['key'],
+            set_={'value': func.coalesce(table.c.value, 0) + 1, 'updated_at': stmt.excluded.updated_at}
+        )
+        now = datetime.now()
+        session.execute(stmt, [{'key': key, 'value': 1.0, 'updated_at': now} for key in keys])
+        values = session.query(DashboardStat.key, DashboardStat.value).filter(DashboardStat.key.in_(keys)).all()
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Önbellek sürümü veritabanına yazılamadı, sadece bu process'te geçerli: {e}")
+        with _lock:
+            for namespace in namespaces:
+                _local[namespace] = _local.get(namespace, 0) + 1
+        return
+    finally:
+        session.close()
+
+    with _lock:
+        _merge({key[len(KEY_PREFIX):]: int(value) for key, value in values})
+
+
+def refresh(force=False):
+    """Paylaşılan sürümleri veritabanından oku (son okuma refresh_seconds'tan yeniyse atlanır)"""
+    global _refreshed_at
+    from core.database.models import DashboardStat
+
+    manager = _manager()
+    now = time.monotonic()
+    if not force and _refreshed_at is not None and now - _refreshed_at < DEFAULT_SETTINGS['refresh_seconds']:
+        return
+    _refreshed_at = now
+
+    session = manager.get_session()
+    try:
+        rows = session.query(DashboardStat.key, DashboardStat.value).filter(
+            DashboardStat.key.like(KEY_PREFIX + '%')
+        ).all()
+    except Exception as e:
+        logger.warning(f"Önbellek sürümleri okunamadı: {e}")
+        return
+    finally:
+        session.close()
+
+    with _lock:
+        _merge({key[len(KEY_PREFIX):]: int(value) for key, value in rows})
+
+
+def get_versions(namespaces):
+    """Alanların güncel sürümleri (önbellek anahtarı için tuple)"""
+    refresh()
+    with _lock:
+        return tuple((_shared.get(namespace, 0), _local.get(namespace, 0)) for namespace in namespaces)
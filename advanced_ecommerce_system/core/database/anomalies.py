@@ -0,0 +1,110 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Anomali Sorgu Yardımcıları
+Anomali filtrelerinin ortak SQL koşulları ve toplu çözümleme
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+
+from core.database.dashboard_stats import adjust_open_anomalies
+from core.database.models import PriceAnomaly, Product
+
+
+def anomaly_conditions(severity=None, resolved=None, anomaly_type=None,
+                       category=None, brand=None, days=None, product_id=None):
+    """Filtre parametrelerini PriceAnomaly üzerinde WHERE koşullarına çevir"""
+    conditions = []
+    if severity:
+        conditions.append(PriceAnomaly.severity == severity)
+    if resolved is not None:
+        conditions.append(PriceAnomaly.is_resolved == resolved)
+    if anomaly_type:
+        conditions.append(PriceAnomaly.anomaly_type == anomaly_type)
+    if product_id:
+        conditions.append(PriceAnomaly.product_id == product_id)
+    if days:
+        conditions.append(PriceAnomaly.detected_at >= datetime.now() - timedelta(days=int(days)))
+
+    product_filters = []
+    if category:
+        product_filters.append(Product.category == category)
+    if brand:
+        product_filters.append(Product.brand == brand)
+    if product_filters:
+        conditions.append(PriceAnomaly.product_id.in_(select(Product.id).where(*product_filters)))
+    return conditions
+
+
+def resolve_anomalies(session, ids=None, notes=None, **filters):
+    """
+    Açık anomalileri tek UPDATE ifadesiyle çözümle.
+    `ids` veya en az bir filtre verilmelidir. Dönüş: çözümlenen satır sayısı.
+    Commit çağırana aittir.
+    """
+    filters.pop('resolved', None)
+    conditions = anomaly_conditions(**filters)
+    if ids is not None:
+        conditions.append(PriceAnomaly.id.in_([int(i) for i in ids]))
+    if not conditions:
+        raise ValueError("Toplu çözümleme için id listesi veya filtre gerekli")
+
+    values = {'is_resolved': True, 'resolved_at': datetime.now()}
+    if notes is not None:
+        values['notes'] = notes
+
+    result = session.execute(
+        update(PriceAnomaly)
+        .where(PriceAnomaly.is_resolved == False, *conditions)
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+    adjust_open_anomalies(session, -result.rowcount)
+    return result.rowcount
+
+
+def _open_anomaly_ranks():
+    """Açık anomaliler, ürün içinde en yeniden eskiye sıra numarasıyla (1 = korunan)"""
+    return select(
+        PriceAnomaly.id,
+        PriceAnomaly.product_id,
+        func.row_number().over(
+            partition_by=PriceAnomaly.product_id,
+            order_by=(PriceAnomaly.detected_at.desc(), PriceAnomaly.id.desc())
+        ).label('rank')
+    ).where(PriceAnomaly.is_resolved == False).subquery()
+
+
+def duplicate_open_anomalies(session):
+    """Birden fazla açık anomalisi olan ürünler: [(product_id, ürün adı, fazlalık sayısı)] (tek sorgu)"""
+    ranked = _open_anomaly_ranks()
+    extra = func.count(ranked.c.id)
+    return session.execute(
+        select(ranked.c.product_id, Product.name, extra)
+        .join(Product, Product.id == ranked.c.product_id, isouter=True)
+        .where(ranked.c.rank > 1)
+        .group_by(ranked.c.product_id, Product.name)
+        .order_by(extra.desc(), ranked.c.product_id)
+    ).all()
+
+
+def resolve_duplicate_open_anomalies(session, now=None):
+    """
+    Her ürünün en yeni açık anomalisi dışındakileri tek UPDATE ile çözümle
+    (ROW_NUMBER() penceresi). Dönüş: çözümlenen satır sayısı. Commit çağırana aittir.
+    """
+    now = now or datetime.now()
+    ranked = _open_anomaly_ranks()
+    suffix = f"Otomatik temizleme ile çözümlendi - {now.strftime('%d.%m.%Y %H:%M')}"
+    result = session.execute(
+        update(PriceAnomaly)
+        .where(PriceAnomaly.id.in_(select(ranked.c.id).where(ranked.c.rank > 1)))
+        .values(
+            is_resolved=True,
+            resolved_at=now,
+            notes=func.coalesce(PriceAnomaly.notes + ' | ' + suffix, suffix)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    adjust_open_anomalies(session, -result.rowcount)
+    return result.rowcount
@@ -0,0 +1,119 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Grafik Verisi
+Fiyat geçmişini SQL'de saatlik/günlük kovalara toplar, gerekirse LTTB ile
+hedef nokta sayısına indirir ve kolon bazlı (columnar) sözlük olarak döndürür
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func
+
+from core.database.models import PriceHistory
+
+DEFAULT_MAX_POINTS = 300
+
+# Döndürülen veri kolonları
+SERIES = ('our_price', 'market_avg', 'market_min', 'market_max', 'competitor_count')
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: görsel şekli koruyarak `threshold`
+    noktanın indekslerini seç (ilk ve son nokta her zaman dahil)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Sonraki kovanın ortalama noktası
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous]) -
+            (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def _bucket_expression(column, bucket, dialect):
+    """Tarihi saat/gün kovasına yuvarlayan SQL ifadesi"""
+    if dialect == 'postgresql':
+        return func.date_trunc(bucket, column)
+    pattern = '%Y-%m-%d %H:00:00' if bucket == 'hour' else '%Y-%m-%d 00:00:00'
+    return func.strftime(pattern, column)
+
+
+def choose_bucket(days, max_points):
+    """Pencere ve hedef nokta sayısına göre kova boyutu"""
+    if days * 24 <= max_points:
+        return 'hour'
+    return 'day'
+
+
+def load_price_series(session, product_id, days=30, max_points=DEFAULT_MAX_POINTS, bucket=None):
+    """
+    Ürünün `days` günlük fiyat serisini kolon bazlı sözlük olarak getir.
+    Ham satır sayısı `max_points`'i aşarsa SQL'de kovalara toplanır;
+    kovalı seri hâlâ uzunsa LTTB ile inceltilir.
+    """
+    start_date = datetime.now() - timedelta(days=days)
+    window = (PriceHistory.product_id == product_id, PriceHistory.date >= start_date)
+
+    raw_points = session.query(func.count(PriceHistory.id)).filter(*window).scalar()
+    if bucket is None:
+        bucket = 'raw' if raw_points <= max_points else choose_bucket(days, max_points)
+
+    if bucket == 'raw':
+        rows = session.query(
+            PriceHistory.date,
+            PriceHistory.our_price,
+            PriceHistory.market_avg_price,
+            PriceHistory.market_min_price,
+            PriceHistory.market_max_price,
+            PriceHistory.competitor_count
+        ).filter(*window).order_by(PriceHistory.date).all()
+        dates = [row[0].isoformat() for row in rows]
+    else:
+        key = _bucket_expression(PriceHistory.date, bucket, session.bind.dialect.name).label('bucket')
+        rows = session.query(
+            key,
+            func.avg(PriceHistory.our_price),
+            func.avg(PriceHistory.market_avg_price),
+            func.min(PriceHistory.market_min_price),
+            func.max(PriceHistory.market_max_price),
+            func.max(PriceHistory.competitor_count)
+        ).filter(*window).group_by(key).order_by(key).all()
+        dates = [row[0].isoformat() if hasattr(row[0], 'isoformat') else row[0].replace(' ', 'T')
+                 for row in rows]
+
+    columns = {name: [row[i + 1] for row in rows] for i, name in enumerate(SERIES)}
+
+    if len(dates) > max_points:
+        timestamps = [datetime.fromisoformat(d).timestamp() for d in dates]
+        our_price = [np.nan if v is None else v for v in columns['our_price']]
+        keep = lttb_indices(timestamps, our_price, max_points)
+        dates = [dates[i] for i in keep]
+        columns = {name: [values[i] for i in keep] for name, values in columns.items()}
+
+    return {
+        'product_id': product_id,
+        'days': days,
+        'bucket': bucket,
+        'raw_points': raw_points,
+        'dates': dates,
+        **columns,
+    }
@@ -0,0 +1,160 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Dashboard İstatistikleri
+Dashboard sayaçlarını dashboard_stats tablosunda tutar. Yazan modüller
+(sync, scraping, anomali çözümleme) sayaçları kendi transaction'ları içinde
+günceller; dashboard okuması tablo boyutundan bağımsız tek bir sorgudur.
+"""
+
+import logging
+from datetime import date, datetime
+
+from sqlalchemy import case, event, func, update
+from sqlalchemy.orm import Session
+
+from core import event_bus
+from core.database.models import DashboardStat, PriceAnomaly, PriceHistory, Product, dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Ürün tablosundan türetilen sayaçlar
+PRODUCT_KEYS = ('active_products', 'price_min', 'price_max', 'price_sum', 'price_count')
+OPEN_ANOMALIES = 'open_anomalies'
+
+
+def _pending_event(session):
+    """Commit sonrası yayınlanacak 'stats' olayı (session'a bağlı)"""
+    return session.info.setdefault('dashboard_stats_event', {'values': {}, 'deltas': {}})
+
+
+def _add_delta(session, name, delta):
+    deltas = _pending_event(session)['deltas']
+    deltas[name] = deltas.get(name, 0) + delta
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_stats_event(session):
+    """Sayaç değişiklikleri sadece commit başarılı olursa yayınlanır"""
+    payload = session.info.pop('dashboard_stats_event', None)
+    if payload:
+        event_bus.publish('stats', payload)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stats_event(session):
+    session.info.pop('dashboard_stats_event', None)
+
+
+def price_history_key(day=None):
+    """Günlük PriceHistory sayacının anahtarı"""
+    return f"price_history:{(day or date.today()).isoformat()}"
+
+
+def _upsert(session, values, increment=False):
+    """Sayaçları yaz; increment=True ise mevcut değere ekle (commit çağırana ait)"""
+    if not values:
+        return
+    table = DashboardStat.__table__
+    now = datetime.now()
+    stmt = dialect_insert(table, session.bind)
+    new_value = table.c.value + stmt.excluded.value if increment else stmt.excluded.value
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['key'],
+        set_={'value': new_value, 'updated_at': stmt.excluded.updated_at}
+    )
+    session.execute(stmt, [{'key': key, 'value': float(value), 'updated_at': now}
+                           for key, value in values.items()])
+
+
+def refresh_product_stats(session):
+    """Aktif ürün sayısı ve fiyat dağılımını tek aggregate sorgu ile yeniden hesapla"""
+    session.flush()
+    price = case((Product.our_price > 0, Product.our_price))
+    active, price_min, price_max, price_sum, price_count = session.query(
+        func.count(Product.id),
+        func.min(price),
+        func.max(price),
+        func.sum(price),
+        func.count(price)
+    ).filter(Product.is_active == True).one()
+
+    _upsert(session, {
+        'active_products': active,
+        'price_min': price_min or 0,
+        'price_max': price_max or 0,
+        'price_sum': price_sum or 0,
+        'price_count': price_count,
+    })
+    _pending_event(session)['values'].update({
+        'total_products': active,
+        'price_stats': {
+            'min': price_min or 0,
+            'max': price_max or 0,
+            'avg': (price_sum or 0) / price_count if price_count else 0
+        }
+    })
+
+
+def adjust_open_anomalies(session, delta):
+    """
+    Açık anomali sayacını artır/azalt. Sayaç henüz yoksa dokunulmaz;
+    ilk okumada kaynak tablodan yeniden oluşturulur.
+    """
+    if delta:
+        session.execute(
+            update(DashboardStat)
+            .where(DashboardStat.key == OPEN_ANOMALIES)
+            .values(value=DashboardStat.value + delta, updated_at=datetime.now())
+        )
+        _add_delta(session, 'total_anomalies', delta)
+
+
+def record_price_history(session, count, day=None):
+    """Eklenen PriceHistory satırlarını günlük sayaca işle"""
+    if count:
+        _upsert(session, {price_history_key(day): count}, increment=True)
+        if day is None or day == date.today():
+            _add_delta(session, 'today_updates', count)
+
+
+def rebuild_dashboard_stats(session):
+    """Tüm sayaçları kaynak tablolardan yeniden oluştur (ilk kurulum / toplu bakım sonrası)"""
+    refresh_product_stats(session)
+    open_anomalies = session.query(func.count(PriceAnomaly.id)).filter(
+        PriceAnomaly.is_resolved == False
+    ).scalar()
+    today = date.today()
+    today_updates = session.query(func.count(PriceHistory.id)).filter(
+        PriceHistory.date >= today
+    ).scalar()
+    _upsert(session, {OPEN_ANOMALIES: open_anomalies, price_history_key(today): today_updates})
+    # Yeniden oluşturma mutlak değer yayınlar, önceki artışları geçersiz kılar
+    pending = _pending_event(session)
+    pending['deltas'].clear()
+    pending['values'].update({'total_anomalies': open_anomalies, 'today_updates': today_updates})
+    logger.info("📊 Dashboard istatistikleri yeniden oluşturuldu")
+
+
+def read_dashboard_stats(session):
+    """Dashboard istatistiklerini oku (tablo boşsa bir kez yeniden oluşturulur)"""
+    today_key = price_history_key()
+    keys = PRODUCT_KEYS + (OPEN_ANOMALIES, today_key)
+    values = dict(session.query(DashboardStat.key, DashboardStat.value).filter(
+        DashboardStat.key.in_(keys)
+    ).all())
+
+    if 'active_products' not in values or OPEN_ANOMALIES not in values:
+        rebuild_dashboard_stats(session)
+        session.commit()
+        return read_dashboard_stats(session)
+
+    price_count = values.get('price_count') or 0
+    return {
+        'total_products': int(values['active_products']),
+        'total_anomalies': int(values[OPEN_ANOMALIES]),
+        'today_updates': int(values.get(today_key, 0)),
+        'price_stats': {
+            'min': values.get('price_min', 0),
+            'max': values.get('price_max', 0),
+            'avg': values.get('price_sum', 0) / price_count if price_count else 0
+        }
+    }
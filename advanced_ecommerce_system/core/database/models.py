@@ -3,17 +3,26 @@ E-Ticaret Fiyat Analiz Sistemi - Veritabanı Modelleri
 SQLAlchemy ORM ile veritabanı şeması tanımları
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import create_engine, event, inspect, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, JSON, UniqueConstraint, Index
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 from datetime import datetime
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
 class Product(Base):
     """Ürün modeli"""
     __tablename__ = 'products'
+    __table_args__ = (
+        Index('ix_products_active_id', 'is_active', 'id'),
+        Index('ix_products_category', 'category'),
+        Index('ix_products_brand', 'brand'),
+    )
     
     id = Column(Integer, primary_key=True)
     uuid = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
@@ -39,6 +48,10 @@ class Product(Base):
 class MarketPrice(Base):
     """Piyasa fiyatları (Akakçe, Trendyol vs.)"""
     __tablename__ = 'market_prices'
+    __table_args__ = (
+        Index('ix_market_prices_product_scraped', 'product_id', 'scraped_at'),
+        Index('ix_market_prices_source_scraped', 'source', 'scraped_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
@@ -57,6 +70,10 @@ class MarketPrice(Base):
 class PriceHistory(Base):
     """Fiyat geçmişi"""
     __tablename__ = 'price_history'
+    __table_args__ = (
+        Index('ix_price_history_product_date', 'product_id', 'date'),
+        Index('ix_price_history_date', 'date'),
+    )
     
     id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
@@ -74,6 +91,11 @@ class PriceHistory(Base):
 class PriceAnomaly(Base):
     """Fiyat anomalileri"""
     __tablename__ = 'price_anomalies'
+    __table_args__ = (
+        Index('ix_price_anomalies_detected_id', 'detected_at', 'id'),
+        Index('ix_price_anomalies_resolved_detected', 'is_resolved', 'detected_at', 'id'),
+        Index('ix_price_anomalies_product', 'product_id', 'is_resolved'),
+    )
     
     id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
@@ -90,6 +112,13 @@ class PriceAnomaly(Base):
     # İlişkiler
     product = relationship("Product", back_populates="anomalies")
 
+# Ürün başına en fazla bir açık anomali (kısmi unique indeks; çözülmüşler serbest)
+OPEN_ANOMALY_INDEX = Index(
+    'uq_price_anomalies_open_product', PriceAnomaly.product_id, unique=True,
+    sqlite_where=PriceAnomaly.is_resolved == False,
+    postgresql_where=PriceAnomaly.is_resolved == False
+)
+
 class PricePrediction(Base):
     """Fiyat tahminleri"""
     __tablename__ = 'price_predictions'
@@ -137,6 +166,11 @@ class TrendAnalysis(Base):
     # JSON veriler
     trend_data = Column(JSON)  # Detaylı trend verileri
     forecast_data = Column(JSON)  # Tahmin verileri
+    timings = Column(JSON)  # Aşama başına {wall_ms, cpu_ms, peak_kb} (stage_profiler)
+    
+    __table_args__ = (
+        Index('ix_trend_analysis_created', 'created_at'),
+    )
 
 class Alert(Base):
     """Uyarı sistemi"""
@@ -159,6 +193,11 @@ class Alert(Base):
 class ScrapingJob(Base):
     """Scraping işleri"""
     __tablename__ = 'scraping_jobs'
+    __table_args__ = (
+        # Aynı zamanlama slotu/shard'ı birden fazla zamanlayıcı tarafından tekrar eklenmez
+        Index('uq_scraping_jobs_schedule_slot_shard', 'schedule_name', 'scheduled_for', 'shard_index', unique=True),
+        Index('ix_scraping_jobs_status_lease', 'status', 'lease_expires_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     job_uuid = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
@@ -172,9 +211,79 @@ class ScrapingJob(Base):
     end_time = Column(DateTime)
     error_message = Column(Text)
     
+    # Zamanlayıcı (core/job_scheduler.py) alanları
+    schedule_name = Column(String(100))  # 'daily_price_check'; elle başlatılan işlerde boş
+    scheduled_for = Column(DateTime)  # Cron slotu
+    shard_index = Column(Integer, default=0)
+    shard_count = Column(Integer, default=1)
+    lease_owner = Column(String(100))  # İşi alan worker
+    lease_expires_at = Column(DateTime)  # Heartbeat gelmezse iş bu zamandan sonra tekrar alınabilir
+    heartbeat_at = Column(DateTime)
+    attempts = Column(Integer, default=0)
+    last_product_id = Column(Integer)  # Checkpoint: bu id'ye kadar olan ürünler işlendi
+    
     # JSON logs
     log_data = Column(JSON)
 
+class ScrapeProgress(Base):
+    """Scraping işinde ürün başına durum (--resume ile biten ürünler atlanır)"""
+    __tablename__ = 'scrape_progress'
+    __table_args__ = (
+        UniqueConstraint('job_id', 'product_key', name='uq_scrape_progress_job_product'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey('scraping_jobs.id'), nullable=False)
+    product_key = Column(String(64), nullable=False)  # Ürün id'si (DB veya Networks API productID)
+    status = Column(String(20), nullable=False)  # 'done', 'failed'
+    result = Column(JSON)  # Devam eden çalışmanın sonda ihtiyaç duyduğu ürün sonucu (opsiyonel)
+    processed_at = Column(DateTime, default=datetime.now)
+
+class AnomalyDetectorState(Base):
+    """Akış anomali dedektörünün ürün/seri başına çevrimiçi istatistikleri"""
+    __tablename__ = 'anomaly_detector_state'
+    __table_args__ = (
+        UniqueConstraint('product_id', 'series', name='uq_anomaly_detector_state_product_series'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id'), nullable=False)
+    series = Column(String(50), nullable=False)  # 'market', 'our_price', 'market_avg'
+    count = Column(Integer, default=0)
+    ewma_mean = Column(Float)
+    ewma_var = Column(Float)
+    median_sketch = Column(JSON)  # P² median tahmincisi durumu
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class BackgroundJob(Base):
+    """Dashboard arka plan işlerinin durumu (çok worker'lı sunucuda her worker okuyabilir)"""
+    __tablename__ = 'background_jobs'
+    
+    id = Column(String(32), primary_key=True)  # BackgroundJobs iş numarası
+    pool = Column(String(50), nullable=False)  # 'analysis', 'scrape'
+    job_key = Column(String(255), index=True)  # Tekilleştirme anahtarı (repr)
+    status = Column(String(20), nullable=False)  # queued, running, done, failed
+    result = Column(Text)  # JSON
+    error = Column(Text)
+    submitted_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime)
+
+class DashboardStat(Base):
+    """Dashboard için önceden hesaplanmış istatistikler (anahtar/değer)"""
+    __tablename__ = 'dashboard_stats'
+    
+    key = Column(String(100), primary_key=True)  # 'active_products', 'price_history:2024-01-31' ...
+    value = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class RollupState(Base):
+    """Artımlı rollup işlerinin kaldığı yer (kaynak tablodaki son işlenen id)"""
+    __tablename__ = 'rollup_state'
+    
+    name = Column(String(100), primary_key=True)  # 'price_history'
+    high_water_mark = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class UserSession(Base):
     """Kullanıcı oturumları (basit auth)"""
     __tablename__ = 'user_sessions'
@@ -188,15 +297,76 @@ class UserSession(Base):
     last_activity = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
 
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Çok thread'li sunumda okuyucular yazıcıyı beklemesin (WAL), eşzamanlı
+    yazımlar hemen 'database is locked' hatası vermek yerine beklesin. Yeni
+    veritabanları incremental auto_vacuum ile oluşur (bkz. core/retention.py)
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 # Veritabanı bağlantısı ve session yönetimi
 class DatabaseManager:
     def __init__(self, database_url="sqlite:///ecommerce_analytics.db"):
         self.engine = create_engine(database_url, echo=False)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _sqlite_pragmas)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         
     def create_tables(self):
         """Tabloları oluştur"""
         Base.metadata.create_all(bind=self.engine)
+        self.ensure_columns()
+        self.ensure_indexes()
+        
+    def ensure_columns(self):
+        """
+        Mevcut tablolara sonradan eklenen kolonları ALTER TABLE ile ekle
+        (create_all var olan tabloyu değiştirmez; yeni kolonlar nullable olmalı)
+        """
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    connection.exec_driver_sql(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                    )
+        
+    def ensure_indexes(self):
+        """Mevcut tablolarda eksik indeksleri oluştur (create_all var olan tabloya indeks eklemez)"""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=self.engine, checkfirst=True)
+                except IntegrityError:
+                    if index is not OPEN_ANOMALY_INDEX:
+                        raise
+                    # Eski veritabanında ürün başına birden fazla açık anomali var:
+                    # en yenisi dışındakiler çözümlenir, indeks tekrar denenir
+                    self._resolve_duplicate_open_anomalies()
+                    index.create(bind=self.engine, checkfirst=True)
+    
+    def _resolve_duplicate_open_anomalies(self):
+        from core.database.anomalies import resolve_duplicate_open_anomalies
+        
+        session = self.get_session()
+        try:
+            count = resolve_duplicate_open_anomalies(session)
+            session.commit()
+            logger.info(f"🧹 {count} duplicate açık anomali çözümlendi")
+        finally:
+            session.close()
         
     def get_session(self):
         """Veritabanı session'ı al"""
@@ -206,6 +376,14 @@ class DatabaseManager:
         """Tabloları sil (sadece development için)"""
         Base.metadata.drop_all(bind=self.engine)
 
+def dialect_insert(table, bind):
+    """ON CONFLICT destekli INSERT ifadesi (SQLite / PostgreSQL)"""
+    if bind.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
 # Singleton pattern ile global database manager
 _db_manager = None
 
@@ -216,6 +394,12 @@ def get_db_manager(database_url=None):
         _db_manager = DatabaseManager(url)
     return _db_manager
 
+def reset_db_manager(database_url=None):
+    """Global database manager'ı sıfırla (örn. fork edilmiş bir worker process içinde)"""
+    global _db_manager
+    _db_manager = None
+    return get_db_manager(database_url)
+
 def get_db_session():
     """Kolay session erişimi"""
     db_manager = get_db_manager()
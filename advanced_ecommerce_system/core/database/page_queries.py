@@ -0,0 +1,87 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Dashboard Sayfa Sorguları
+Her sayfanın ihtiyaç duyduğu veriyi verilen session üzerinde en az sorgu ile
+okur (commit/close çağırana ait)
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+
+from core.database.dashboard_stats import read_dashboard_stats
+from core.database.models import MarketPrice, PriceAnomaly, PriceHistory, Product, TrendAnalysis
+
+
+def active_products(session):
+    """Aktif ürünler (liste alanları; description gibi büyük kolonlar yüklenmez)"""
+    return session.query(
+        Product.id, Product.name, Product.brand, Product.category,
+        Product.our_price, Product.our_stock
+    ).filter(Product.is_active == True).order_by(Product.id).all()
+
+
+def recent_open_anomalies(session, limit=10):
+    """Son açık anomaliler ve ürün adları (tek join sorgusu)"""
+    return session.query(
+        PriceAnomaly,
+        Product.name.label('product_name')
+    ).join(Product, PriceAnomaly.product_id == Product.id).filter(
+        PriceAnomaly.is_resolved == False
+    ).order_by(PriceAnomaly.detected_at.desc()).limit(limit).all()
+
+
+def recent_price_updates(session, limit=5):
+    """En son fiyat geçmişi kayıtları"""
+    return session.query(PriceHistory).order_by(PriceHistory.date.desc()).limit(limit).all()
+
+
+def product_price_history(session, product_id, days=30):
+    """Ürünün son `days` gündeki fiyat geçmişi (eskiden yeniye)"""
+    start_date = datetime.now() - timedelta(days=days)
+    return session.query(PriceHistory).filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.date >= start_date
+    ).order_by(PriceHistory.date).all()
+
+
+def product_anomalies(session, product_id, limit=10):
+    """Ürünün son anomalileri (çözülmüşler dahil)"""
+    return session.query(PriceAnomaly).filter(
+        PriceAnomaly.product_id == product_id
+    ).order_by(PriceAnomaly.detected_at.desc()).limit(limit).all()
+
+
+def dashboard_page(session, anomaly_limit=5, update_limit=5):
+    """Ana sayfa verisi: sayaçlar, son güncellemeler, ürün listesi, son anomaliler"""
+    stats = read_dashboard_stats(session)
+    return {
+        'total_products': stats['total_products'],
+        'total_anomalies': stats['total_anomalies'],
+        'recent_updates': recent_price_updates(session, update_limit),
+        'products': active_products(session),
+        'anomalies': recent_open_anomalies(session, anomaly_limit),
+    }
+
+
+def scraping_status(session, source='akakce'):
+    """Kaynağın toplam / bugünkü kayıt sayısı ve son scrape zamanı (tek aggregate sorgu)"""
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    total, today_count, last_scraped = session.query(
+        func.count(MarketPrice.id),
+        func.coalesce(func.sum(case((MarketPrice.scraped_at >= today, 1), else_=0)), 0),
+        func.max(MarketPrice.scraped_at)
+    ).filter(MarketPrice.source == source).one()
+    return {
+        'total': total,
+        'today': int(today_count),
+        'last_scraped_at': last_scraped,
+    }
+
+
+def trend_stage_timings(session, days=7, limit=1000):
+    """Son N günün analizlerinden (ürün, aşama süreleri) ikilileri (en yeni `limit` kayıt)"""
+    since = datetime.utcnow() - timedelta(days=days)
+    return session.query(TrendAnalysis.product_id, TrendAnalysis.timings).filter(
+        TrendAnalysis.created_at >= since,
+        TrendAnalysis.timings.isnot(None)
+    ).order_by(TrendAnalysis.created_at.desc()).limit(limit).all()
@@ -0,0 +1,140 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Keyset Sayfalama
+İndeksli kolonlar üzerinde seek (keyset) sayfalama, sunucu taraflı filtreler
+ve kolon projeksiyonu. OFFSET kullanılmadığı için sayfa maliyeti tablo
+büyüdükçe sabit kalır.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from core.database.anomalies import anomaly_conditions
+from core.database.models import PriceAnomaly, Product
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# API'de seçilebilecek ürün kolonları (description gibi büyük alanlar hariç)
+PRODUCT_FIELDS = {
+    'id': Product.id,
+    'name': Product.name,
+    'brand': Product.brand,
+    'category': Product.category,
+    'subcategory': Product.subcategory,
+    'our_sku': Product.our_sku,
+    'our_price': Product.our_price,
+    'our_stock': Product.our_stock,
+    'image_url': Product.image_url,
+    'updated_at': Product.updated_at,
+}
+DEFAULT_PRODUCT_FIELDS = ('id', 'name', 'brand', 'category', 'our_price', 'our_stock')
+
+ANOMALY_FIELDS = {
+    'id': PriceAnomaly.id,
+    'product_id': PriceAnomaly.product_id,
+    'product_name': Product.name,
+    'anomaly_type': PriceAnomaly.anomaly_type,
+    'severity': PriceAnomaly.severity,
+    'deviation_percent': PriceAnomaly.deviation_percent,
+    'our_price': PriceAnomaly.our_price,
+    'market_avg_price': PriceAnomaly.market_avg_price,
+    'detected_at': PriceAnomaly.detected_at,
+    'is_resolved': PriceAnomaly.is_resolved,
+    'resolved_at': PriceAnomaly.resolved_at,
+    'notes': PriceAnomaly.notes,
+}
+DEFAULT_ANOMALY_FIELDS = ('id', 'product_id', 'product_name', 'anomaly_type', 'severity',
+                          'deviation_percent', 'detected_at', 'is_resolved', 'resolved_at')
+
+
+def encode_cursor(values):
+    """Son satırın sıralama anahtarını URL-güvenli imlece çevir"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """İmleci sıralama anahtarına çevir (geçersizse ValueError)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Geçersiz sayfa imleci: {cursor}") from e
+
+
+def page_size(limit):
+    """İstenen sayfa boyutunu sınırlar içine al"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def select_fields(allowed, requested, default):
+    """`fields=a,b` parametresini kolon listesine çevir (id her zaman dahil)"""
+    names = [name.strip() for name in requested.split(',')] if requested else list(default)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Bilinmeyen alan(lar): {', '.join(unknown)}")
+    if 'id' not in names:
+        names.insert(0, 'id')
+    return names
+
+
+def page_products(session, limit=None, cursor=None, category=None, brand=None, fields=None):
+    """
+    Aktif ürünleri id sırasıyla sayfala.
+    Dönüş: (satır sözlükleri, sonraki sayfa imleci veya None)
+    """
+    limit = page_size(limit)
+    names = select_fields(PRODUCT_FIELDS, fields, DEFAULT_PRODUCT_FIELDS)
+
+    query = session.query(*(PRODUCT_FIELDS[name].label(name) for name in names)).filter(
+        Product.is_active == True
+    )
+    if category:
+        query = query.filter(Product.category == category)
+    if brand:
+        query = query.filter(Product.brand == brand)
+    if cursor:
+        last_id, = decode_cursor(cursor)
+        query = query.filter(Product.id > last_id)
+
+    rows = query.order_by(Product.id).limit(limit + 1).all()
+    next_cursor = encode_cursor([rows[limit - 1].id]) if len(rows) > limit else None
+    return [dict(row._mapping) for row in rows[:limit]], next_cursor
+
+
+def page_anomalies(session, limit=None, cursor=None, severity=None, resolved=None,
+                   category=None, brand=None, anomaly_type=None, days=None, fields=None):
+    """
+    Anomalileri en yeniden eskiye (detected_at, id) sırasıyla sayfala.
+    `resolved`: None (tümü), True veya False.
+    """
+    limit = page_size(limit)
+    names = select_fields(ANOMALY_FIELDS, fields, DEFAULT_ANOMALY_FIELDS)
+    # İmleç için sıralama kolonları her zaman seçilir
+    columns = list(dict.fromkeys(names + ['detected_at']))
+
+    query = session.query(*(ANOMALY_FIELDS[name].label(name) for name in columns)).join(
+        Product, PriceAnomaly.product_id == Product.id
+    ).filter(*anomaly_conditions(severity=severity, resolved=resolved, anomaly_type=anomaly_type,
+                                 category=category, brand=brand, days=days))
+    if cursor:
+        last_detected, last_id = decode_cursor(cursor)
+        last_detected = datetime.fromisoformat(last_detected)
+        query = query.filter(or_(
+            PriceAnomaly.detected_at < last_detected,
+            and_(PriceAnomaly.detected_at == last_detected, PriceAnomaly.id < last_id)
+        ))
+
+    rows = query.order_by(PriceAnomaly.detected_at.desc(), PriceAnomaly.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last.detected_at, last.id])
+
+    items = [{name: row._mapping[name] for name in names} for row in rows[:limit]]
+    return items, next_cursor
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+E-Ticaret Fiyat Analiz Sistemi - Piyasa Fiyatı Arşivi
+N günden eski market_prices satırlarını kaynak/ay bölümlü, Zstd sıkıştırmalı
+Parquet dosyalarına taşır; `market_price_frame` sıcak (SQLite) ve soğuk
+(Parquet) satırları tek DataFrame olarak döndürür.
+pyarrow kurulu değilse arşivleme yapılamaz, sorgular yalnızca SQLite'ı okur.
+
+Okuyucular:
+- Trend analizi, ML veri hazırlama (DataPipeline) ve grafikler günlük
+  price_history tablosunu okur. price_history arşivlenmez; arşivlenen
+  günlerin özeti rollup ile zaten yazılmıştır, analizler etkilenmez.
+- Anomali motoru (load_market_aggregates) ve scraping durumu sadece son
+  scrape'leri okur; bunlar her zaman sıcak katmandadır.
+- hot_days'ten eski ham satıcı fiyatlarına ihtiyaç duyan her yeni okuyucu
+  (örn. satıcı bazlı geçmiş, price_history'nin yeniden hesaplanması)
+  doğrudan market_prices yerine market_price_frame kullanmalıdır.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import and_, delete, select
+
+# Proje dizinini path'e ekle
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_DIR)
+
+from core import cache_versions
+from core.database.models import get_db_session, MarketPrice
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'archive_dir': os.path.join('data', 'market_price_archive'),  # Göreli yol PROJECT_DIR'e göre
+    'hot_days': 90,  # Bu süreden eski satırlar arşive taşınır
+    'batch_size': 50000,  # Tek Parquet yazımı + DELETE başına satır
+    'compression': 'zstd',
+}
+
+# Arşive yazılan kolonlar (market_prices tablosu ile aynı)
+COLUMNS = ['id', 'product_id', 'source', 'seller_name', 'price', 'currency',
+           'shipping_cost', 'is_in_stock', 'seller_rating', 'scraped_at']
+PARTITION_COLUMNS = ['source', 'month']
+
+if HAS_PYARROW:
+    # Tüm bölümlerde aynı şema (boş kolonlar null tipine düşmesin)
+    ARCHIVE_SCHEMA = pa.schema([
+        ('id', pa.int64()),
+        ('product_id', pa.int64()),
+        ('seller_name', pa.string()),
+        ('price', pa.float64()),
+        ('currency', pa.string()),
+        ('shipping_cost', pa.float64()),
+        ('is_in_stock', pa.bool_()),
+        ('seller_rating', pa.float64()),
+        ('scraped_at', pa.timestamp('us')),
+    ])
+    PARTITIONING = ds.partitioning(pa.schema([('source', pa.string()), ('month', pa.string())]), flavor='hive')
+
+
+class MarketPriceArchive:
+    """
+    market_prices için soğuk depolama.
+
+    Dosyalar `<archive_dir>/source=<kaynak>/month=<YYYY-MM>/part-*.parquet`
+    düzenindedir; kaynak ve tarih filtreleri bölüm dizinlerini eler, yalnızca
+    istenen kolonlar okunur. Her parti önce Parquet'e yazılır, sonra SQLite'tan
+    silinir: arada çökme olursa satır iki katmanda da bulunabilir, okuma
+    tarafı `id` ile tekilleştirir.
+    """
+
+    def __init__(self, archive_dir=None, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        # Zamanlayıcı, CLI ve dashboard farklı çalışma dizinlerinden başlasa da aynı arşiv
+        self.archive_dir = os.path.join(PROJECT_DIR, archive_dir or self.settings['archive_dir'])
+
+    @property
+    def exists(self):
+        return os.path.isdir(self.archive_dir)
+
+    # --- Arşivleme ---
+
+    def archive(self, older_than_days=None, now=None):
+        """
+        `older_than_days` günden eski satırları arşive taşı; taşınan satır sayısı.
+        Sınır gün başına yuvarlanır: bir günün satırları hep aynı katmanda kalır
+        """
+        if not HAS_PYARROW:
+            raise RuntimeError("Parquet arşivi için pyarrow gerekli: pip install pyarrow")
+
+        days = self.settings['hot_days'] if older_than_days is None else older_than_days
+        cutoff = ((now or datetime.now()) - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        run_id = uuid.uuid4().hex[:8]
+        table = MarketPrice.__table__
+        old_rows = table.c.scraped_at < cutoff
+
+        moved = 0
+        batch_no = 0
+        last_id = 0
+        session = get_db_session()
+        try:
+            while True:
+                rows = session.execute(
+                    select(*(table.c[column] for column in COLUMNS))
+                    .where(and_(old_rows, table.c.id > last_id))
+                    .order_by(table.c.id)
+                    .limit(self.settings['batch_size'])
+                ).all()
+                if not rows:
+                    break
+
+                frame = pd.DataFrame(rows, columns=COLUMNS)
+                self._write(frame, f"part-{run_id}-{batch_no:05d}-{{i}}.parquet")
+
+                first_id, last_id = int(frame['id'].iloc[0]), int(frame['id'].iloc[-1])
+                session.execute(delete(table).where(and_(old_rows, table.c.id.between(first_id, last_id))))
+                session.commit()
+
+                moved += len(frame)
+                batch_no += 1
+                logger.info(f"🗄️ {moved} piyasa fiyatı arşive taşındı (id <= {last_id})")
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+            # Hata olsa da commit edilmiş partiler önbelleği geçersiz kılar
+            if moved:
+                cache_versions.bump(cache_versions.MARKET_PRICES)
+
+        if moved:
+            logger.info(f"✅ Arşivleme tamamlandı: {moved} satır, {cutoff:%Y-%m-%d} öncesi -> {self.archive_dir}")
+        return moved
+
+    def _write(self, frame, basename_template):
+        frame['scraped_at'] = pd.to_datetime(frame['scraped_at'])
+        for (source, month), part in frame.groupby([frame['source'], frame['scraped_at'].dt.strftime('%Y-%m')]):
+            directory = os.path.join(self.archive_dir, f"source={source}", f"month={month}")
+            os.makedirs(directory, exist_ok=True)
+            pq.write_table(
+                pa.Table.from_pandas(part.drop(columns=['source']), schema=ARCHIVE_SCHEMA, preserve_index=False),
+                os.path.join(directory, basename_template.format(i=0)),
+                compression=self.settings['compression']
+            )
+
+    # --- Okuma ---
+
+    def read(self, product_ids=None, source=None, start=None, end=None, columns=None):
+        """Arşivden filtreli okuma (bölüm eleme + kolon projeksiyonu)"""
+        columns = list(columns or COLUMNS)
+        if not self.exists:
+            return pd.DataFrame(columns=columns)
+        if not HAS_PYARROW:
+            logger.warning("⚠️ pyarrow kurulu değil, Parquet arşivi okunamıyor")
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(self.archive_dir, format='parquet', partitioning=PARTITIONING)
+        filters = []
+        if source is not None:
+            filters.append(ds.field('source') == source)
+        if start is not None:
+            filters += [ds.field('month') >= f"{start:%Y-%m}", ds.field('scraped_at') >= pa.scalar(start, pa.timestamp('us'))]
+        if end is not None:
+            filters += [ds.field('month') <= f"{end:%Y-%m}", ds.field('scraped_at') < pa.scalar(end, pa.timestamp('us'))]
+        if product_ids is not None:
+            filters.append(ds.field('product_id').isin([int(product_id) for product_id in product_ids]))
+
+        expression = None
+        for condition in filters:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def market_price_frame(session, product_ids=None, source=None, start=None, end=None, columns=None, archive=None):
+    """
+    SQLite'taki güncel ve arşivdeki eski piyasa fiyatlarını birleştir
+    (scraped_at'e göre sıralı, id ile tekilleştirilmiş)
+    """
+    archive = archive or MarketPriceArchive()
+    columns = list(columns or COLUMNS)
+    selected = columns if 'id' in columns else ['id'] + columns
+    table = MarketPrice.__table__
+
+    query = select(*(table.c[column] for column in selected))
+    if product_ids is not None:
+        query = query.where(table.c.product_id.in_(list(product_ids)))
+    if source is not None:
+        query = query.where(table.c.source == source)
+    if start is not None:
+        query = query.where(table.c.scraped_at >= start)
+    if end is not None:
+        query = query.where(table.c.scraped_at < end)
+    hot = pd.DataFrame(session.execute(query).all(), columns=selected)
+
+    cold = archive.read(product_ids=product_ids, source=source, start=start, end=end, columns=selected)
+    frames = [frame for frame in (hot, cold) if not frame.empty]
+    if not frames:
+        return hot[columns]
+
+    combined = pd.concat(frames, ignore_index=True).drop_duplicates('id')
+    if 'scraped_at' in combined.columns:
+        combined['scraped_at'] = pd.to_datetime(combined['scraped_at'])
+        combined = combined.sort_values(['scraped_at', 'id'], kind='stable')
+    return combined[columns].reset_index(drop=True)
+
+
+def main():
+    """Komut satırından arşivleme"""
+    parser = argparse.ArgumentParser(description="Eski piyasa fiyatlarını Parquet arşivine taşı")
+    parser.add_argument('--older-than', type=int, default=DEFAULT_SETTINGS['hot_days'],
+                        help="Bu günden eski satırlar taşınır")
+    parser.add_argument('--archive-dir', default=DEFAULT_SETTINGS['archive_dir'])
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_SETTINGS['batch_size'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    archive = MarketPriceArchive(args.archive_dir, batch_size=args.batch_size)
+    moved = archive.archive(older_than_days=args.older_than)
+    print(f"🗄️ {moved} satır arşive taşındı: {archive.archive_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+E-Ticaret Fiyat Analiz Sistemi - Fiyat Geçmişi Rollup'ı
+Ham market_prices satırlarını (ürün, gün) bazında price_history'ye toplar.
+Her parti tek GROUP BY sorgusu ile hesaplanır; işlenen son market_prices id'si
+rollup_state tablosunda tutulur, böylece her çalıştırma sadece yeni satırlara
+dokunur.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core import cache_versions
+from core.database.dashboard_stats import record_price_history
+from core.database.models import dialect_insert, get_db_session, MarketPrice, PriceHistory, Product, RollupState
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = 'price_history'
+
+DEFAULT_SETTINGS = {
+    'batch_size': 5000,  # Parti başına yeni market_prices satırı
+}
+
+
+def _day_start(value):
+    """func.date() sonucu (SQLite: 'YYYY-MM-DD', PostgreSQL: date) -> gün başı datetime"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return datetime.combine(value, time.min)
+
+
+class PriceHistoryRollup:
+    """
+    market_prices -> price_history artımlı toplayıcı.
+
+    Bir partideki yeni satırların dokunduğu (ürün, gün) grupları o günün tüm
+    piyasa satırlarından yeniden hesaplanır (min/max/ortalama/medyan, satıcı
+    sayısı) ve price_history'deki o günün kayıtlarının yerine yazılır. Parti
+    sonucu ve yeni high-water mark aynı transaction'da commit edilir; yarıda
+    kalan bir parti bir sonraki çalıştırmada baştan işlenir.
+    """
+
+    def __init__(self, name=ROLLUP_NAME, **settings):
+        self.name = name
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+
+    # --- High-water mark ---
+
+    def high_water_mark(self, session):
+        value = session.query(RollupState.high_water_mark).filter(RollupState.name == self.name).scalar()
+        return value or 0
+
+    def _set_high_water_mark(self, session, value):
+        stmt = dialect_insert(RollupState.__table__, session.bind)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'high_water_mark': stmt.excluded.high_water_mark, 'updated_at': stmt.excluded.updated_at}
+        )
+        session.execute(stmt, {'name': self.name, 'high_water_mark': value, 'updated_at': datetime.now()})
+
+    def advance(self, session, market_price_id):
+        """High-water mark'ı ilerlet (satırların price_history karşılığı zaten yazıldıysa; commit çağırana ait)"""
+        self._set_high_water_mark(session, market_price_id)
+
+    def reset(self):
+        """
+        Baştan rollup (SQLite'taki tüm market_prices yeniden toplanır; Parquet
+        arşivine taşınmış günlerin price_history kayıtlarına dokunulmaz)
+        """
+        session = get_db_session()
+        try:
+            self._set_high_water_mark(session, 0)
+            session.commit()
+        finally:
+            session.close()
+
+    # --- Parti ---
+
+    def _batch_upper_id(self, session, after_id):
+        """Partinin son market_prices id'si (yeni satır yoksa None)"""
+        mp = MarketPrice.__table__
+        upper = session.execute(
+            select(mp.c.id).where(mp.c.id > after_id).order_by(mp.c.id)
+            .offset(self.settings['batch_size'] - 1).limit(1)
+        ).scalar()
+        if upper is None:
+            upper = session.execute(select(func.max(mp.c.id)).where(mp.c.id > after_id)).scalar()
+        return upper
+
+    def _aggregate_query(self, after_id, upper_id):
+        """Partinin dokunduğu (ürün, gün) grupları için tek GROUP BY"""
+        mp = MarketPrice.__table__
+        day = func.date(mp.c.scraped_at)
+        touched = select(mp.c.product_id, day.label('day')).where(
+            mp.c.id > after_id, mp.c.id <= upper_id
+        ).distinct().subquery()
+
+        group = [mp.c.product_id, touched.c.day]
+        ranked = select(
+            mp.c.product_id,
+            touched.c.day,
+            mp.c.price,
+            func.coalesce(mp.c.seller_name, mp.c.source).label('seller'),
+            func.row_number().over(partition_by=group, order_by=mp.c.price).label('rank'),
+            func.count().over(partition_by=group).label('size'),
+        ).join_from(mp, touched, and_(mp.c.product_id == touched.c.product_id, day == touched.c.day)).subquery()
+
+        # Medyan: tek sayıda satırda ortadaki, çift sayıda ortadaki ikisinin ortalaması
+        middle = or_(ranked.c.rank == (ranked.c.size + 1) // 2, ranked.c.rank == (ranked.c.size + 2) // 2)
+        return select(
+            ranked.c.product_id,
+            ranked.c.day,
+            func.min(ranked.c.price),
+            func.max(ranked.c.price),
+            func.avg(ranked.c.price),
+            func.avg(case((middle, ranked.c.price))),
+            func.count(func.distinct(ranked.c.seller)),
+            func.max(Product.our_price),
+        ).join(Product, Product.id == ranked.c.product_id).group_by(ranked.c.product_id, ranked.c.day)
+
+    def rollup_batch(self, session):
+        """Bir parti işle; (yazılan price_history satırı, yeni high-water mark) döndürür"""
+        after_id = self.high_water_mark(session)
+        upper_id = self._batch_upper_id(session, after_id)
+        if upper_id is None:
+            return 0, after_id
+
+        groups = session.execute(self._aggregate_query(after_id, upper_id)).all()
+        rows = [{
+            'product_id': product_id,
+            'date': _day_start(day),
+            'market_min_price': round(price_min, 2),
+            'market_max_price': round(price_max, 2),
+            'market_avg_price': round(price_avg, 2),
+            'market_median_price': round(price_median, 2),
+            'competitor_count': competitor_count,
+            'our_price': our_price,
+        } for product_id, day, price_min, price_max, price_avg, price_median, competitor_count, our_price in groups]
+
+        if rows:
+            # Aynı güne ait eski kayıtların yerine yazılır; o günkü bizim fiyat korunur
+            keys = {(row['product_id'], row['date']) for row in rows}
+            first_day = min(row['date'] for row in rows)
+            last_day = max(row['date'] for row in rows) + timedelta(days=1)
+            existing = session.execute(
+                select(PriceHistory.id, PriceHistory.product_id, PriceHistory.date, PriceHistory.our_price).where(
+                    PriceHistory.product_id.in_({product_id for product_id, _ in keys}),
+                    PriceHistory.date >= first_day,
+                    PriceHistory.date < last_day
+                )
+            ).all()
+
+            replaced_ids = []
+            replaced_per_day = Counter()
+            kept_price = {}
+            for history_id, product_id, history_date, our_price in existing:
+                key = (product_id, _day_start(history_date.date()))
+                if key in keys:
+                    replaced_ids.append(history_id)
+                    replaced_per_day[key[1].date()] += 1
+                    if our_price is not None:
+                        kept_price.setdefault(key, our_price)
+            for row in rows:
+                row['our_price'] = kept_price.get((row['product_id'], row['date']), row['our_price'])
+
+            if replaced_ids:
+                session.execute(delete(PriceHistory).where(PriceHistory.id.in_(replaced_ids)))
+            session.execute(insert(PriceHistory.__table__), rows)
+
+            # Dashboard günlük sayacı: gün başına net eklenen satır
+            added_per_day = Counter(row['date'].date() for row in rows)
+            for day in added_per_day | replaced_per_day:
+                record_price_history(session, added_per_day[day] - replaced_per_day[day], day)
+
+        self._set_high_water_mark(session, upper_id)
+        return len(rows), upper_id
+
+    def run(self, max_batches=None):
+        """Yeni satır kalmayana (ya da max_batches'e) kadar parti işle; yazılan toplam satır"""
+        written = 0
+        batches = 0
+        session = get_db_session()
+        try:
+            while max_batches is None or batches < max_batches:
+                before = self.high_water_mark(session)
+                count, upper_id = self.rollup_batch(session)
+                if upper_id == before:
+                    break
+                session.commit()
+                written += count
+                batches += 1
+                logger.info(f"📈 Fiyat geçmişi rollup: {count} gün/ürün kaydı (market_prices id <= {upper_id})")
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        if written:
+            cache_versions.bump(cache_versions.PRICE_HISTORY)
+        return written
+
+
+def main():
+    """Komut satırından rollup"""
+    parser = argparse.ArgumentParser(description="market_prices -> price_history rollup")
+    parser.add_argument('--rebuild', action='store_true', help="High-water mark'ı sıfırla, tümünü yeniden topla")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_SETTINGS['batch_size'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    rollup = PriceHistoryRollup(batch_size=args.batch_size)
+    if args.rebuild:
+        rollup.reset()
+    written = rollup.run()
+    print(f"📈 {written} fiyat geçmişi kaydı güncellendi")
+
+
+if __name__ == "__main__":
+    main()
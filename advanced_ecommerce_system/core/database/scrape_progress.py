@@ -0,0 +1,152 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Scraping Checkpoint'leri
+Katalog taramalarında ürün başına durumu scrape_progress tablosuna yazar;
+yarıda kalan bir çalışma job_uuid ile devam ettirildiğinde biten ürünler atlanır
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import case, func, update
+
+from core.database.models import dialect_insert, get_db_session, ScrapeProgress, ScrapingJob
+
+logger = logging.getLogger(__name__)
+
+DONE = 'done'
+FAILED = 'failed'
+
+
+class ScrapeCheckpoint:
+    """
+    Bir ScrapingJob çalışmasının ürün bazında ilerlemesi.
+
+    `mark` ile işaretlenen ürünler bellekte bekler, `flush` ile tek
+    transaction'da yazılır. Çağıran, ürün verisi kalıcı hale geldikten sonra
+    flush etmelidir (örn. write-behind tamponu boşaltıldıktan sonra); böylece
+    çökme anında yazılmamış ürünler 'done' görünmez.
+    """
+
+    def __init__(self, job_id, job_uuid, done=None, results=None):
+        self.job_id = job_id
+        self.job_uuid = job_uuid
+        self.done = set(done or ())
+        self._results = dict(results or {})
+        self._pending = {}
+
+    @classmethod
+    def start(cls, source, job_type, products_total, log_data=None):
+        """Yeni çalışma için ScrapingJob kaydı aç"""
+        session = get_db_session()
+        try:
+            job = ScrapingJob(
+                source=source,
+                job_type=job_type,
+                status='running',
+                products_total=products_total,
+                start_time=datetime.now(),
+                log_data=log_data
+            )
+            session.add(job)
+            session.commit()
+            logger.info(f"🧾 Scraping işi başladı: {job.job_uuid} (devam için: --resume {job.job_uuid})")
+            return cls(job.id, job.job_uuid)
+        finally:
+            session.close()
+
+    @classmethod
+    def resume(cls, job_uuid):
+        """Var olan çalışmayı yükle; biten ürünler ve saklanan sonuçları ile"""
+        session = get_db_session()
+        try:
+            job = session.query(ScrapingJob).filter(ScrapingJob.job_uuid == job_uuid).first()
+            if job is None:
+                raise ValueError(f"Scraping işi bulunamadı: {job_uuid}")
+
+            rows = session.query(ScrapeProgress.product_key, ScrapeProgress.result).filter(
+                ScrapeProgress.job_id == job.id,
+                ScrapeProgress.status == DONE
+            ).all()
+            job.status = 'running'
+            job.end_time = None
+            session.commit()
+
+            logger.info(f"⏯️ Scraping işi devam ediyor: {job_uuid} ({len(rows)}/{job.products_total} ürün tamam)")
+            return cls(job.id, job.job_uuid, done=[key for key, _ in rows],
+                       results={key: result for key, result in rows if result is not None})
+        finally:
+            session.close()
+
+    def pending(self, products, key='id'):
+        """Bu çalışmada henüz bitmemiş ürünler (sıra korunur)"""
+        return [product for product in products if str(product[key]) not in self.done]
+
+    def results(self):
+        """Biten ürünlerin saklanan sonuçları {product_key: result}"""
+        return dict(self._results)
+
+    def mark(self, product_id, ok, result=None):
+        """Ürün sonucunu işaretle (flush'a kadar bellekte)"""
+        self._pending[str(product_id)] = {
+            'status': DONE if ok else FAILED,
+            'result': result if ok else None,
+        }
+
+    def flush(self):
+        """Bekleyen işaretleri yaz ve ScrapingJob sayaçlarını güncelle"""
+        if not self._pending:
+            return 0
+
+        now = datetime.now()
+        rows = [{
+            'job_id': self.job_id,
+            'product_key': product_key,
+            'status': mark['status'],
+            'result': mark['result'],
+            'processed_at': now,
+        } for product_key, mark in self._pending.items()]
+
+        session = get_db_session()
+        try:
+            stmt = dialect_insert(ScrapeProgress.__table__, session.bind)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['job_id', 'product_key'],
+                set_={column: stmt.excluded[column] for column in ('status', 'result', 'processed_at')}
+            )
+            session.execute(stmt, rows)
+
+            # Sayaçlar ilerleme tablosundan tek aggregate ile (tekrar denenen ürünler çift sayılmaz)
+            done, failed = session.query(
+                func.coalesce(func.sum(case((ScrapeProgress.status == DONE, 1), else_=0)), 0),
+                func.coalesce(func.sum(case((ScrapeProgress.status == FAILED, 1), else_=0)), 0)
+            ).filter(ScrapeProgress.job_id == self.job_id).one()
+            session.execute(update(ScrapingJob).where(ScrapingJob.id == self.job_id).values(
+                products_scraped=done, products_failed=failed
+            ))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        for product_key, mark in self._pending.items():
+            if mark['status'] == DONE:
+                self.done.add(product_key)
+                if mark['result'] is not None:
+                    self._results[product_key] = mark['result']
+        count = len(self._pending)
+        self._pending = {}
+        return count
+
+    def finish(self, status='completed', error=None):
+        """Çalışmayı kapat (önce bekleyen işaretler yazılır)"""
+        self.flush()
+        session = get_db_session()
+        try:
+            session.execute(update(ScrapingJob).where(ScrapingJob.id == self.job_id).values(
+                status=status, end_time=datetime.now(), error_message=error
+            ))
+            session.commit()
+        finally:
+            session.close()
@@ -0,0 +1,197 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Write-Behind Tamponu
+Scraping döngüsündeki piyasa fiyatı ve anomali yazımlarını biriktirip
+çok sayıda ürün için tek transaction'da veritabanına aktarır
+"""
+
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from core import cache_versions, event_bus
+from core.database.dashboard_stats import adjust_open_anomalies
+from core.database.models import dialect_insert, get_db_session, MarketPrice, PriceAnomaly
+
+logger = logging.getLogger(__name__)
+
+# Açık anomali varsa upsert'ün güncellediği kolonlar
+_ANOMALY_UPDATE_COLUMNS = ('anomaly_type', 'severity', 'deviation_percent', 'our_price',
+                           'market_avg_price', 'detected_at', 'notes')
+
+
+class WriteBehindBuffer:
+    """
+    Piyasa fiyatı satırlarını ve açık anomali upsert'lerini bellekte toplar.
+
+    Çağıran, `due()` True döndüğünde (`flush_size` ürün birikti ya da son
+    flush'tan beri `flush_interval` saniye geçti) tamponu tek transaction'da
+    boşaltır. Aynı ürün için birden fazla anomali gelirse sonuncusu geçerlidir
+    (ürün başına tek açık anomali).
+    """
+
+    def __init__(self, flush_size=50, flush_interval=60.0, detector=None):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.detector = detector  # Opsiyonel StreamingAnomalyDetector
+        self._market_prices = []
+        self._observations = []  # Dedektör için scrape başına satır grupları (flush'ta işlenir)
+        self._anomalies = {}
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+    def __len__(self):
+        return len(self._market_prices) + len(self._anomalies)
+
+    def add_market_prices(self, product_id, scraped_data, source='akakce'):
+        """Scrape edilen fiyatları MarketPrice satırı olarak tampona ekle"""
+        rows = [{
+            'product_id': product_id,
+            'source': source,
+            'seller_name': price_data['merchant'],
+            'price': price_data['price'],
+            'currency': price_data.get('currency', 'TRY'),
+            'scraped_at': scraped_data['scraped_at'],
+        } for price_data in scraped_data['prices']]
+        self._market_prices.extend(rows)
+        if self.detector is not None:
+            self._observations.append(rows)
+
+    def _observe(self, session):
+        """
+        Akış dedektörü scrape başına ürün medyanını flush transaction'ında işler:
+        durum önce veritabanından taze okunur (başka yazıcıların gözlemleri
+        kaybolmaz), commit edilmeyen gözlem durumu da değiştirmez. Ani değişim
+        açık anomali olarak yazılır; aynı ürün için piyasa sapması anomalisi
+        varsa o geçerlidir
+        """
+        product_ids = {row['product_id'] for rows in self._observations for row in rows}
+        self.detector.load_state(session, product_ids, for_update=True)
+        for rows in self._observations:
+            for flag in self.detector.observe_market_prices(rows):
+                if flag['product_id'] in self._anomalies:
+                    continue
+                self.upsert_anomaly(
+                    flag['product_id'], flag['anomaly_type'], flag['severity'], flag['deviation_percent'],
+                    notes=f"Ani piyasa fiyatı değişimi (z={flag['z_score']:.1f}, "
+                          f"median ₺{flag['baseline_median']:.2f}) - {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+                )
+
+    def upsert_anomaly(self, product_id, anomaly_type, severity, deviation_percent,
+                       our_price=None, market_avg_price=None, notes=None):
+        """Ürünün açık anomalisini güncelle ya da yenisini oluştur (flush'ta yazılır)"""
+        self._anomalies[product_id] = {
+            'product_id': product_id,
+            'anomaly_type': anomaly_type,
+            'severity': severity,
+            'deviation_percent': deviation_percent,
+            'our_price': our_price,
+            'market_avg_price': market_avg_price,
+            'detected_at': datetime.now(),
+            'notes': notes,
+        }
+
+    def due(self, pending_products):
+        """Bekleyen ürün sayısı eşiğe ulaştıysa ya da flush_interval dolduysa True"""
+        if pending_products <= 0:
+            return False
+        return (pending_products >= self.flush_size or
+                time.monotonic() - self._last_flush >= self.flush_interval)
+
+    @staticmethod
+    def _anomaly_statement(bind):
+        """
+        Açık anomali upsert'ü: tek INSERT ... ON CONFLICT (product_id) WHERE NOT
+        is_resolved DO UPDATE (uq_price_anomalies_open_product kısmi indeksi)
+        """
+        table = PriceAnomaly.__table__
+        stmt = dialect_insert(table, bind)
+        return stmt.on_conflict_do_update(
+            index_elements=['product_id'],
+            index_where=table.c.is_resolved == False,
+            set_={name: stmt.excluded[name] for name in _ANOMALY_UPDATE_COLUMNS}
+        )
+
+    @staticmethod
+    def _open_anomaly_count(session, product_ids):
+        """Ürünlerden açık anomalisi olanların sayısı"""
+        table = PriceAnomaly.__table__
+        return session.execute(
+            select(func.count()).select_from(table).where(
+                table.c.product_id.in_(product_ids), table.c.is_resolved == False
+            )
+        ).scalar()
+
+    def discard(self):
+        """Yazılmamış satırları bırak (başarısız flush sonrası tekrar denenmeyecekse)"""
+        dropped = len(self)
+        self._market_prices = []
+        self._observations = []
+        self._anomalies = {}
+        return dropped
+
+    def flush(self):
+        """
+        Tamponu tek transaction'da veritabanına yaz. Satırlar sadece commit
+        başarılı olursa tampondan silinir; hata durumunda tampon korunur ve
+        hata çağırana iletilir (tekrar denenebilir ya da discard() edilebilir)
+        """
+        self._last_flush = time.monotonic()
+
+        if not self._market_prices and not self._anomalies and not (self.detector and self.detector.has_pending_state()):
+            return {'market_prices': 0, 'anomalies': 0}
+
+        market_rows = self._market_prices
+
+        session = get_db_session()
+        try:
+            if market_rows:
+                session.execute(insert(MarketPrice.__table__), market_rows)
+
+            # Dedektör durumu fiyat satırlarından sonra okunur (SQLite: yazma kilidi alınmış olur)
+            if self.detector is not None and self._observations:
+                self._observe(session)
+
+            anomaly_rows = [{**row, 'is_resolved': False} for row in self._anomalies.values()]
+            if anomaly_rows:
+                # Tek upsert ifadesi; sayaç için yeni açılan anomali sayısı, aynı
+                # transaction'da upsert öncesi açık olanlardan çıkarılır
+                already_open = self._open_anomaly_count(session, list(self._anomalies))
+                session.execute(self._anomaly_statement(session.bind), anomaly_rows)
+                adjust_open_anomalies(session, len(anomaly_rows) - already_open)
+
+            if self.detector is not None:
+                self.detector.save_state(session)
+
+            session.commit()
+            self._market_prices = []
+            self._observations = []
+            self._anomalies = {}
+            if self.detector is not None:
+                self.detector.state_saved()
+            cache_versions.bump(cache_versions.MARKET_PRICES, cache_versions.ANOMALIES)
+            if anomaly_rows:
+                event_bus.publish('anomalies', {'items': [
+                    {name: row[name] for name in
+                     ('product_id', 'anomaly_type', 'severity', 'deviation_percent', 'detected_at')}
+                    for row in anomaly_rows
+                ]})
+            logger.info(f"💾 Write-behind flush: {len(market_rows)} fiyat, {len(anomaly_rows)} anomali")
+            return {'market_prices': len(market_rows), 'anomalies': len(anomaly_rows)}
+
+        except Exception as e:
+            session.rollback()
+            if self.detector is not None:
+                self.detector.discard_changes()
+            logger.error(f"Write-behind flush hatası: {e}")
+            raise
+
+        finally:
+            session.close()
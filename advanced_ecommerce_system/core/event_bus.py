@@ -0,0 +1,91 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Process İçi Olay Yolu
+Yazan modüller (scraping, anomali, istatistik) olay yayınlar; web dashboard
+SSE bağlantıları abone olarak olayları anında tarayıcıya iletir
+"""
+
+import itertools
+import logging
+import queue
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Tek bir abonenin (örn. bir SSE bağlantısı) olay kuyruğu"""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False  # Yavaş abone olay kaçırdıysa istemci yeniden senkronize olmalı
+
+    def get(self, timeout=None):
+        """Sıradaki olayı bekle; zaman aşımında None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """Thread-safe yayınla/abone ol; son olaylar Last-Event-ID ile tekrar oynatılabilir"""
+
+    def __init__(self, history_size=256, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+
+    def publish(self, event_type, data):
+        """Olayı tüm abonelere ilet (abone yoksa sadece geçmişe yazılır)"""
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'data': data}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+        return event['id']
+
+    def subscribe(self, last_event_id=None, limit=None):
+        """
+        Yeni abonelik; last_event_id verilirse sonrasındaki olaylar önce kuyruğa konur.
+        limit: en fazla abone sayısı; dolmuşsa None döner (istemci yoklamaya geçer)
+        """
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        try:
+                            subscription.queue.put_nowait(event)
+                        except queue.Full:
+                            subscription.overflowed = True
+                            break
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+# Process genelinde tek olay yolu
+event_bus = EventBus()
+
+
+def publish(event_type, data):
+    """Kısayol: global olay yoluna yayınla"""
+    return event_bus.publish(event_type, data)
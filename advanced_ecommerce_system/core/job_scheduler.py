@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+E-Ticaret Fiyat Analiz Sistemi - İş Zamanlayıcı
+ScrapingJob tablosu üzerinde çalışan, birden fazla worker process/makine ile
+paylaşılabilen zamanlayıcı: cron zamanlamaları, shard başına iş satırları,
+lease/heartbeat ile iş sahipliği, checkpoint ile devam ve kaçırılan slotlar
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, update
+
+# Proje dizinini path'e ekle
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+
+from core.database.models import dialect_insert, get_db_session, PriceAnomaly, Product, ScrapingJob
+
+logger = logging.getLogger(__name__)
+
+# config.json "settings.schedules" yoksa kullanılan zamanlamalar
+DEFAULT_SCHEDULES = {
+    'daily_networks_sync': {
+        'cron': '30 8 * * *',
+        'job_type': 'networks_sync',
+        'source': 'networks',
+        'shards': 1,
+    },
+    'daily_price_check': {
+        'cron': '0 9 * * *',
+        'job_type': 'price_check',
+        'source': 'akakce',
+        'shards': 4,  # Katalog ürün id'sine göre 4 parçaya bölünür
+        'chunk_size': 20,  # Her 20 üründe bir checkpoint
+    },
+    'hourly_price_rollup': {
+        'cron': '15 * * * *',
+        'job_type': 'price_rollup',
+        'source': 'akakce',
+        'shards': 1,
+    },
+    'daily_retention': {
+        'cron': '30 3 * * *',
+        'job_type': 'retention',
+        'source': 'system',
+        'shards': 1,
+    },
+    'weekly_price_archive': {
+        'cron': '0 3 * * 0',
+        'job_type': 'price_archive',
+        'source': 'akakce',
+        'shards': 1,
+    },
+}
+
+DEFAULT_SETTINGS = {
+    'lease_seconds': 600,  # Heartbeat gelmezse iş bu süre sonunda başka worker'a geçer
+    'heartbeat_seconds': 60,
+    'poll_seconds': 30,
+    'max_attempts': 3,
+    'catch_up': 1,  # Kaçırılan slotlardan en fazla kaç tanesi sonradan çalıştırılır
+    'catch_up_hours': 24,  # İlk çalıştırmada geriye dönük bakılan süre
+}
+
+
+class LeaseLost(Exception):
+    """İşin lease'i süresi dolduğu için başka bir worker'a geçti"""
+
+
+class CronSchedule:
+    """
+    Beş alanlı cron ifadesi: dakika saat gün ay haftanın-günü
+    (*, */n, a-b, a-b/n, a,b,c; haftanın günü 0/7 = Pazar)
+    """
+
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron ifadesi 5 alanlı olmalı: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(part, low, high) for part, (_, low, high) in zip(parts, self.FIELDS)
+        )
+        self.weekdays = sorted({day % 7 for day in weekdays})
+        self.day_any = parts[2] == '*'
+        self.weekday_any = parts[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step = part.split('/')
+                step = int(step)
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start, end = (int(value) for value in part.split('-'))
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f"Geçersiz cron alanı: {field!r}")
+            values.update(range(start, end + 1, step))
+        return sorted(values)
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays
+        if self.day_any and self.weekday_any:
+            return True
+        if self.day_any:
+            return weekday_match
+        if self.weekday_any:
+            return day_match
+        # Cron kuralı: ikisi de kısıtlıysa biri yeterli
+        return day_match or weekday_match
+
+    def next_after(self, moment):
+        """`moment`ten sonraki ilk çalışma zamanı"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron ifadesi hiç eşleşmiyor: {self.expression!r}")
+
+    def fire_times(self, after, until):
+        """(after, until] aralığındaki çalışma zamanları"""
+        moment = self.next_after(after)
+        while moment <= until:
+            yield moment
+            moment = self.next_after(moment)
+
+
+class JobRun:
+    """Handler'a verilen çalışan iş: checkpoint ve heartbeat burada"""
+
+    def __init__(self, scheduler, job):
+        self.scheduler = scheduler
+        self.job = job
+        self.cursor = job['last_product_id']
+        self.scraped = job['products_scraped'] or 0
+        self.failed = job['products_failed'] or 0
+
+    def checkpoint(self, last_product_id, scraped=0, failed=0, **log):
+        """İlerlemeyi kaydet (lease de yenilenir); lease kaybedildiyse LeaseLost"""
+        self.cursor = last_product_id
+        self.scraped += scraped
+        self.failed += failed
+        if not self.scheduler.checkpoint(self.job['id'], last_product_id, self.scraped, self.failed, log or None):
+            raise LeaseLost(self.job['job_uuid'])
+
+
+class JobScheduler:
+    """
+    Zamanlayıcı + worker.
+
+    Her process `run_forever` ile hem vadesi gelen slotları iş satırı olarak ekler
+    (unique index sayesinde idempotent) hem de boştaki işleri koşullu UPDATE ile
+    sahiplenir. Sahiplenme SELECT ... FOR UPDATE gerektirmez; SQLite ve
+    PostgreSQL'de aynı şekilde çalışır.
+    """
+
+    def __init__(self, schedules=None, handlers=None, worker_id=None, **settings):
+        self.schedules = schedules or load_schedules()
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.handlers = {**DEFAULT_HANDLERS, **(handlers or {})}
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.crons = {name: CronSchedule(schedule['cron']) for name, schedule in self.schedules.items()}
+
+    # --- Slot ekleme ---
+
+    def enqueue_due(self, now=None):
+        """Vadesi gelmiş (ve kaçırılmış) slotlar için shard iş satırlarını ekle"""
+        now = now or datetime.now()
+        session = get_db_session()
+        created = 0
+        try:
+            for name, schedule in self.schedules.items():
+                last_slot = session.query(func.max(ScrapingJob.scheduled_for)).filter(
+                    ScrapingJob.schedule_name == name
+                ).scalar()
+                after = last_slot or now - timedelta(hours=schedule.get('catch_up_hours', self.settings['catch_up_hours']))
+                slots = list(self.crons[name].fire_times(after, now))
+                if not slots:
+                    continue
+
+                catch_up = max(1, schedule.get('catch_up', self.settings['catch_up']))
+                if len(slots) > catch_up:
+                    logger.warning(f"⏭️ {name}: {len(slots) - catch_up} kaçırılan slot atlandı "
+                                   f"({slots[0]} - {slots[-catch_up - 1]})")
+                    slots = slots[-catch_up:]
+
+                shard_count = schedule.get('shards', 1)
+                rows = [{
+                    'schedule_name': name,
+                    'scheduled_for': slot,
+                    'shard_index': shard_index,
+                    'shard_count': shard_count,
+                    'job_type': schedule['job_type'],
+                    'source': schedule.get('source'),
+                    'job_uuid': str(uuid.uuid4()),
+                    'status': 'pending',
+                    'attempts': 0,
+                    'products_total': 0,
+                    'products_scraped': 0,
+                    'products_failed': 0,
+                    'log_data': {'schedule': schedule},
+                } for slot in slots for shard_index in range(shard_count)]
+                stmt = dialect_insert(ScrapingJob.__table__, session.bind).on_conflict_do_nothing()
+                created += session.execute(stmt, rows).rowcount
+            session.commit()
+        finally:
+            session.close()
+
+        if created:
+            logger.info(f"📅 {created} zamanlanmış iş eklendi")
+        return created
+
+    # --- Sahiplenme ---
+
+    def _claimable(self, now):
+        return or_(
+            ScrapingJob.status == 'pending',
+            and_(ScrapingJob.status == 'running', ScrapingJob.lease_expires_at < now)
+        )
+
+    def _fail_exhausted(self, session, now):
+        """Lease'i dolmuş ve deneme hakkı bitmiş işleri başarısız işaretle"""
+        return session.execute(
+            update(ScrapingJob).where(
+                ScrapingJob.status == 'running',
+                ScrapingJob.lease_expires_at < now,
+                ScrapingJob.attempts >= self.settings['max_attempts']
+            ).values(status='failed', end_time=now, lease_owner=None,
+                     error_message='Lease süresi doldu, deneme hakkı bitti')
+        ).rowcount
+
+    def claim(self, now=None):
+        """Sıradaki işi sahiplen; iş yoksa None"""
+        now = now or datetime.now()
+        session = get_db_session()
+        try:
+            if self._fail_exhausted(session, now):
+                session.commit()
+
+            candidates = session.query(ScrapingJob.id).filter(
+                self._claimable(now),
+                ScrapingJob.schedule_name.isnot(None)
+            ).order_by(ScrapingJob.scheduled_for, ScrapingJob.shard_index).limit(10).all()
+
+            for (job_id,) in candidates:
+                claimed = session.execute(
+                    update(ScrapingJob).where(ScrapingJob.id == job_id, self._claimable(now)).values(
+                        status='running',
+                        lease_owner=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.settings['lease_seconds']),
+                        heartbeat_at=now,
+                        attempts=ScrapingJob.attempts + 1,
+                        start_time=func.coalesce(ScrapingJob.start_time, now),
+                    )
+                ).rowcount
+                session.commit()
+                if claimed:
+                    job = session.get(ScrapingJob, job_id)
+                    return {column.name: getattr(job, column.name) for column in ScrapingJob.__table__.columns}
+            return None
+        finally:
+            session.close()
+
+    def _owned(self, job_id):
+        return and_(ScrapingJob.id == job_id, ScrapingJob.lease_owner == self.worker_id,
+                    ScrapingJob.status == 'running')
+
+    def heartbeat(self, job_id, now=None):
+        """Lease'i uzat; iş artık bu worker'da değilse False"""
+        now = now or datetime.now()
+        session = get_db_session()
+        try:
+            renewed = session.execute(
+                update(ScrapingJob).where(self._owned(job_id)).values(
+                    heartbeat_at=now,
+                    lease_expires_at=now + timedelta(seconds=self.settings['lease_seconds'])
+                )
+            ).rowcount
+            session.commit()
+            return bool(renewed)
+        finally:
+            session.close()
+
+    def checkpoint(self, job_id, last_product_id, scraped, failed, log=None):
+        """İmleç ve sayaçları yaz, lease'i uzat; iş artık bu worker'da değilse False"""
+        now = datetime.now()
+        values = {
+            'last_product_id': last_product_id,
+            'products_scraped': scraped,
+            'products_failed': failed,
+            'heartbeat_at': now,
+            'lease_expires_at': now + timedelta(seconds=self.settings['lease_seconds']),
+        }
+        session = get_db_session()
+        try:
+            if log:
+                job = session.get(ScrapingJob, job_id)
+                values['log_data'] = {**(job.log_data or {}), **log}
+            updated = session.execute(update(ScrapingJob).where(self._owned(job_id)).values(**values)).rowcount
+            session.commit()
+            return bool(updated)
+        finally:
+            session.close()
+
+    def finish(self, job_id, error=None, attempts=1):
+        """İşi tamamla; hata varsa deneme hakkı kaldıysa tekrar kuyruğa koy"""
+        now = datetime.now()
+        if error is None:
+            values = {'status': 'completed', 'end_time': now, 'error_message': None}
+        elif attempts < self.settings['max_attempts']:
+            values = {'status': 'pending', 'error_message': error}
+        else:
+            values = {'status': 'failed', 'end_time': now, 'error_message': error}
+        values.update(lease_owner=None, lease_expires_at=None)
+
+        session = get_db_session()
+        try:
+            session.execute(update(ScrapingJob).where(self._owned(job_id)).values(**values))
+            session.commit()
+        finally:
+            session.close()
+        return values['status']
+
+    # --- Çalıştırma ---
+
+    def _heartbeat_loop(self, job_id, stop):
+        while not stop.wait(self.settings['heartbeat_seconds']):
+            if not self.heartbeat(job_id):
+                logger.warning(f"💔 Lease kaybedildi (job {job_id})")
+                return
+
+    def run_job(self, job):
+        """Sahiplenilen işi handler ile çalıştır"""
+        handler = self.handlers.get(job['job_type'])
+        label = f"{job['schedule_name']} {job['scheduled_for']:%Y-%m-%d %H:%M} shard {job['shard_index'] + 1}/{job['shard_count']}"
+        if handler is None:
+            return self.finish(job['id'], f"Handler yok: {job['job_type']}", attempts=self.settings['max_attempts'])
+
+        logger.info(f"▶️ {label} başlıyor (deneme {job['attempts']}, imleç: {job['last_product_id']})")
+        stop = threading.Event()
+        beat = threading.Thread(target=self._heartbeat_loop, args=(job['id'], stop), daemon=True)
+        beat.start()
+        try:
+            handler(JobRun(self, job))
+        except LeaseLost:
+            logger.warning(f"⚠️ {label}: iş başka bir worker'a geçti, bırakılıyor")
+            return 'lost'
+        except Exception as e:
+            logger.error(f"❌ {label} hatası: {e}")
+            return self.finish(job['id'], str(e), attempts=job['attempts'])
+        finally:
+            stop.set()
+            beat.join()
+
+        status = self.finish(job['id'])
+        logger.info(f"✅ {label} tamamlandı")
+        return status
+
+    def run_pending(self, now=None):
+        """Vadesi gelen slotları ekle, boştaki işleri bitene kadar çalıştır"""
+        self.enqueue_due(now)
+        processed = 0
+        while True:
+            job = self.claim()
+            if job is None:
+                return processed
+            self.run_job(job)
+            processed += 1
+
+    def run_forever(self):
+        schedules = ', '.join(f"{name} [{schedule['cron']}]" for name, schedule in self.schedules.items())
+        logger.info(f"🚀 İş zamanlayıcısı başladı (worker: {self.worker_id}, zamanlamalar: {schedules})")
+        while True:
+            try:
+                self.run_pending()
+                time.sleep(self.settings['poll_seconds'])
+            except KeyboardInterrupt:
+                logger.info("⛔ Zamanlayıcı durduruldu (Ctrl+C)")
+                break
+            except Exception as e:
+                logger.error(f"Zamanlayıcı döngü hatası: {e}")
+                time.sleep(self.settings['poll_seconds'])
+
+
+# --- İş tipleri ---
+
+def price_check_handler(run):
+    """
+    Shard'a düşen Networks ürünlerini parça parça scrape et, her parçada checkpoint.
+
+    Eski PriceMonitor.run çıktıları shard bazında korunur: shard bitince bu
+    çalışmada (ilk sahiplenmeden beri) tespit edilen açık anomaliler
+    price_anomalies_<zaman>_shard<i>-<n>.json raporuna yazılır, özet loglanır
+    ve yeni piyasa fiyatları price_history'ye toplanır (rollup).
+    """
+    from core.database.price_rollup import PriceHistoryRollup
+    from scrapers.akakce_scraper import AkakceScraper
+
+    schedule = run.job['log_data'].get('schedule', {})
+    chunk_size = schedule.get('chunk_size', 20)
+    scraper = AkakceScraper()
+    while True:
+        products = scraper.get_networks_products(
+            limit=chunk_size,
+            shard_index=run.job['shard_index'],
+            shard_count=run.job['shard_count'],
+            after_id=run.cursor
+        )
+        if not products:
+            break
+        result = scraper.scrape_products(products)
+        run.checkpoint(products[-1]['id'], scraped=result['scraped_products'],
+                       failed=result['failed_products'])
+
+    anomalies = shard_anomalies(run.job)
+    path = save_anomaly_report(anomalies, run.job, schedule.get('report_dir'))
+    rolled_up = PriceHistoryRollup().run()
+    run.checkpoint(run.cursor, anomalies=len(anomalies), report=path, rolled_up=rolled_up)
+
+
+def shard_anomalies(job):
+    """İşin shard'ındaki, iş başladığından beri tespit edilmiş açık anomaliler (PriceMonitor rapor biçimi)"""
+    session = get_db_session()
+    try:
+        query = session.query(PriceAnomaly, Product.name, Product.brand).join(
+            Product, Product.id == PriceAnomaly.product_id
+        ).filter(
+            PriceAnomaly.is_resolved == False,
+            PriceAnomaly.detected_at >= job['start_time'],
+            Product.our_sku.like('HBCV%')
+        ).order_by(PriceAnomaly.product_id)
+        if job['shard_count'] > 1:
+            query = query.filter(Product.id % job['shard_count'] == job['shard_index'])
+        return [{
+            'product_id': anomaly.product_id,
+            'product_name': name,
+            'brand': brand,
+            'our_price': anomaly.our_price,
+            'market_average': anomaly.market_avg_price,
+            'difference_percent': abs(anomaly.deviation_percent or 0),
+            'anomaly_type': anomaly.anomaly_type,
+            'severity': anomaly.severity,
+            'timestamp': anomaly.detected_at.isoformat(),
+        } for anomaly, name, brand in query.all()]
+    finally:
+        session.close()
+
+
+def save_anomaly_report(anomalies, job, report_dir=None):
+    """Shard anomali raporunu JSON olarak yaz ve özeti logla; dosya yolunu döndür"""
+    report_dir = report_dir or PROJECT_DIR
+    if not os.path.isabs(report_dir):
+        report_dir = os.path.join(PROJECT_DIR, report_dir)
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(
+        report_dir,
+        f"price_anomalies_{datetime.now().strftime('%Y%m%d_%H%M%S')}_shard{job['shard_index'] + 1}-{job['shard_count']}.json"
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(anomalies, f, indent=4, ensure_ascii=False)
+
+    if anomalies:
+        logger.info(f"✅ {len(anomalies)} anomali tespit edildi!")
+        for anomaly in anomalies:
+            logger.info(f"   - {anomaly['brand']} {anomaly['product_name']}: {anomaly['our_price']}₺ vs "
+                        f"{anomaly['market_average']:.2f}₺ ({anomaly['difference_percent']:.1f}% {anomaly['anomaly_type']})")
+    else:
+        logger.info("✅ Hiç anomali tespit edilmedi.")
+    logger.info(f"Sonuçlar kaydedildi: {path}")
+    return path
+
+
+def networks_sync_handler(run):
+    """Networks API ürünlerini veritabanına senkronize et"""
+    from core.sync_networks_api import NetworksAPISyncer
+
+    if not NetworksAPISyncer().sync_products_to_database():
+        raise RuntimeError('Networks API sync başarısız')
+
+
+def price_archive_handler(run):
+    """Eski piyasa fiyatlarını Parquet arşivine taşı (pyarrow yoksa iş başarısız olur)"""
+    from core.database.price_archive import MarketPriceArchive
+
+    schedule = run.job['log_data'].get('schedule', {})
+    moved = MarketPriceArchive(schedule.get('archive_dir')).archive(older_than_days=schedule.get('hot_days'))
+    run.checkpoint(run.cursor, scraped=moved, archived=moved)
+
+
+def price_rollup_handler(run):
+    """Yeni market_prices satırlarını price_history'ye topla"""
+    from core.database.price_rollup import PriceHistoryRollup
+
+    written = PriceHistoryRollup().run()
+    run.checkpoint(run.cursor, scraped=written, rolled_up=written)
+
+
+def retention_handler(run):
+    """Saklama politikalarını uygula (eski kayıtlar, dökümler, loglar, VACUUM)"""
+    from core.retention import RetentionManager
+
+    report = RetentionManager().run()
+    run.checkpoint(run.cursor, retention=report)
+
+
+DEFAULT_HANDLERS = {
+    'price_check': price_check_handler,
+    'networks_sync': networks_sync_handler,
+    'price_archive': price_archive_handler,
+    'price_rollup': price_rollup_handler,
+    'retention': retention_handler,
+}
+
+
+def load_schedules(config_file=None):
+    """config.json "settings.schedules" bölümü; yoksa DEFAULT_SCHEDULES"""
+    config_file = config_file or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+    try:
+        with open(config_file, encoding='utf-8') as f:
+            return json.load(f).get('settings', {}).get('schedules') or DEFAULT_SCHEDULES
+    except (OSError, ValueError):
+        return DEFAULT_SCHEDULES
+
+
+def main():
+    """Komut satırından worker/zamanlayıcı"""
+    parser = argparse.ArgumentParser(description="ScrapingJob tabanlı iş zamanlayıcısı")
+    parser.add_argument('--worker-id', default=None, help="Worker adı (varsayılan: host:pid)")
+    parser.add_argument('--once', action='store_true', help="Bekleyen işleri çalıştır ve çık")
+    parser.add_argument('--enqueue-only', action='store_true', help="Sadece vadesi gelen slotları ekle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    scheduler = JobScheduler(worker_id=args.worker_id)
+    if args.enqueue_only:
+        scheduler.enqueue_due()
+    elif args.once:
+        scheduler.run_pending()
+    else:
+        scheduler.run_forever()
+
+if __name__ == "__main__":
+    main()
@@ -315,6 +315,7 @@ def create_sample_data():
     Test için örnek veri oluştur
     """
     from core.database.models import get_db_session, Product, PriceHistory
+    from core.database.dashboard_stats import rebuild_dashboard_stats
     import random
     
     session = get_db_session()
@@ -354,6 +355,7 @@ def create_sample_data():
         )
         session.add(history)
     
+    rebuild_dashboard_stats(session)
     session.commit()
     session.close()
     
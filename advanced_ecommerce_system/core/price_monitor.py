@@ -16,6 +16,14 @@ import os
 from datetime import datetime
 import logging
 from urllib.parse import quote_plus
+import sys
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.anomaly_detection.anomaly_engine import AnomalyEngine
+from core.database.models import get_db_manager
+from core.database.scrape_progress import ScrapeCheckpoint
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -27,12 +35,18 @@ logging.basicConfig(
     ]
 )
 
+# Kaç ürünün sonucunda bir checkpoint yazılır
+CHECKPOINT_EVERY = 10
+
 class PriceMonitor:
     def __init__(self, config_file='../config.json'):
         """Fiyat takip sistemi başlatıcısı"""
         self.config = self.load_config(config_file)
         self.session = requests.Session()
         self.setup_session()
+        self.anomaly_engine = AnomalyEngine(
+            'price_monitor', threshold=self.config['settings']['price_threshold'] * 100
+        )
         
     def load_config(self, config_file):
         """Konfigürasyon dosyasını yükle"""
@@ -57,7 +71,12 @@ class PriceMonitor:
                 "price_threshold": 0.10,  # %10 fark
                 "min_sellers": 3,  # Minimum satıcı sayısı
                 "request_delay": [2, 5],  # Saniye cinsinden bekleme aralığı
-                "max_retries": 3
+                "max_retries": 3,
+                "pipeline": {
+                    "search_concurrency": 4,  # Aynı anda açık Akakçe isteği
+                    "parse_concurrency": 2,  # Paralel HTML parse işçisi
+                    "queue_size": 16  # Aşamalar arası kuyruk kapasitesi
+                }
             }
         }
         
@@ -180,6 +199,66 @@ class PriceMonitor:
             logging.error(f"Netliste ürün alma hatası: {e}")
             return []
     
+    def fetch_akakce_search_page(self, search_term, session=None):
+        """Akakçe arama sayfasını indir (ham HTML)"""
+        # Ürün adını URL-safe hale getir
+        search_query = quote_plus(search_term)
+        search_url = f"{self.config['akakce']['search_url']}{search_query}"
+        
+        response = (session or self.session).get(search_url)
+        return response.content
+    
+    def parse_akakce_prices(self, content, search_term, max_sellers=5):
+        """Akakçe arama sayfasından fiyatları ayıkla"""
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        prices = []
+        
+        # Fiyat listelerini bul (Akakçe'nin yeni yapısına uygun)
+        price_elements = soup.find_all(['span', 'div'], class_=lambda x: x and any(
+            keyword in x.lower() for keyword in ['price', 'fiyat', 'fy_v8', 'pt_v8']
+        ))
+        
+        for element in price_elements[:max_sellers * 2]:  # Daha fazla element kontrol et
+            try:
+                price_text = element.get_text(strip=True)
+                # Fiyat formatını temizle (₺, TL, virgül vs.)
+                price_clean = ''.join(c for c in price_text if c.isdigit() or c in '.,')
+                price_clean = price_clean.replace(',', '.')
+                
+                if price_clean and '.' in price_clean:
+                    # Ondalık ayıracı kontrol et
+                    parts = price_clean.split('.')
+                    if len(parts) == 2 and len(parts[1]) <= 2:  # Normal fiyat formatı
+                        price = float(price_clean)
+                        if 1000 <= price <= 200000:  # Mantıklı fiyat aralığı
+                            prices.append(price)
+                            if len(prices) >= max_sellers:
+                                break
+                elif price_clean and len(price_clean) >= 4:  # Sadece rakam
+                    price = float(price_clean)
+                    if 1000 <= price <= 200000:
+                        prices.append(price)
+                        if len(prices) >= max_sellers:
+                            break
+                        
+            except (ValueError, AttributeError):
+                continue
+        
+        if len(prices) >= self.config['settings']['min_sellers']:
+            avg_price = sum(prices) / len(prices)
+            logging.info(f"{search_term}: {len(prices)} satıcı, ortalama: {avg_price:.2f}₺")
+            return {
+                'prices': prices,
+                'average': avg_price,
+                'seller_count': len(prices),
+                'min_price': min(prices),
+                'max_price': max(prices)
+            }
+        else:
+            logging.warning(f"{search_term}: Yeterli satıcı bulunamadı ({len(prices)})")
+            return None
+    
     def search_akakce_prices(self, product_name, brand="", max_sellers=5):
         """Akakçe'den ürün fiyatlarını ara"""
         search_term = f"{brand} {product_name}".strip()
@@ -188,110 +267,108 @@ class PriceMonitor:
         self.random_delay()
         
         try:
-            # Ürün adını URL-safe hale getir
-            search_query = quote_plus(search_term)
-            search_url = f"{self.config['akakce']['search_url']}{search_query}"
-            
-            response = self.session.get(search_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            prices = []
-            
-            # Fiyat listelerini bul (Akakçe'nin yeni yapısına uygun)
-            price_elements = soup.find_all(['span', 'div'], class_=lambda x: x and any(
-                keyword in x.lower() for keyword in ['price', 'fiyat', 'fy_v8', 'pt_v8']
-            ))
-            
-            for element in price_elements[:max_sellers * 2]:  # Daha fazla element kontrol et
-                try:
-                    price_text = element.get_text(strip=True)
-                    # Fiyat formatını temizle (₺, TL, virgül vs.)
-                    price_clean = ''.join(c for c in price_text if c.isdigit() or c in '.,')
-                    price_clean = price_clean.replace(',', '.')
-                    
-                    if price_clean and '.' in price_clean:
-                        # Ondalık ayıracı kontrol et
-                        parts = price_clean.split('.')
-                        if len(parts) == 2 and len(parts[1]) <= 2:  # Normal fiyat formatı
-                            price = float(price_clean)
-                            if 1000 <= price <= 200000:  # Mantıklı fiyat aralığı
-                                prices.append(price)
-                                if len(prices) >= max_sellers:
-                                    break
-                    elif price_clean and len(price_clean) >= 4:  # Sadece rakam
-                        price = float(price_clean)
-                        if 1000 <= price <= 200000:
-                            prices.append(price)
-                            if len(prices) >= max_sellers:
-                                break
-                            
-                except (ValueError, AttributeError):
-                    continue
-            
-            if len(prices) >= self.config['settings']['min_sellers']:
-                avg_price = sum(prices) / len(prices)
-                logging.info(f"{search_term}: {len(prices)} satıcı, ortalama: {avg_price:.2f}₺")
-                return {
-                    'prices': prices,
-                    'average': avg_price,
-                    'seller_count': len(prices),
-                    'min_price': min(prices),
-                    'max_price': max(prices)
-                }
-            else:
-                logging.warning(f"{search_term}: Yeterli satıcı bulunamadı ({len(prices)})")
-                return None
+            content = self.fetch_akakce_search_page(search_term)
+            return self.parse_akakce_prices(content, search_term, max_sellers)
                 
         except Exception as e:
             logging.error(f"Akakçe arama hatası ({search_term}): {e}")
             return None
     
-    def analyze_price_anomalies(self, products, max_products=10):
-        """Fiyat anomalilerini tespit et"""
+    def compare_with_market(self, results):
+        """
+        Ürün fiyatlarını piyasa verisiyle karşılaştır (tek vektörel geçiş).
+        results: (product, akakce_data) çiftleri; anomali sözlüklerini sırayla döndürür
+        """
+        found = []
+        for product, akakce_data in results:
+            if not akakce_data:
+                logging.warning(f"Piyasa verisi bulunamadı: {product['brand']} {product['name']}")
+            else:
+                found.append((product, akakce_data))
+        
+        if not found:
+            return []
+        
+        result = self.anomaly_engine.detect(
+            [product['id'] for product, _ in found],
+            [product['current_price'] for product, _ in found],
+            [akakce_data['average'] for _, akakce_data in found]
+        )
+        
         anomalies = []
-        processed_count = 0
+        for i, (product, akakce_data) in enumerate(found):
+            current_price = product['current_price']
+            market_avg = akakce_data['average']
+            difference_percent = abs(float(result['deviation_percent'][i]))
+            
+            if not result['is_anomaly'][i]:
+                logging.info(f"Normal: {product['brand']} {product['name']} - Bizim: {current_price}₺, Piyasa: {market_avg:.2f}₺")
+                continue
+            
+            logging.warning(f"ANOMALI: {product['brand']} {product['name']} - Bizim: {current_price}₺, Piyasa: {market_avg:.2f}₺ ({difference_percent:.1f}% fark)")
+            
+            anomalies.append({
+                'product_id': product['id'],
+                'product_name': product['name'],
+                'full_name': product['full_name'],
+                'brand': product['brand'],
+                'category': product['category'],
+                'our_price': current_price,
+                'market_average': market_avg,
+                'market_min': akakce_data['min_price'],
+                'market_max': akakce_data['max_price'],
+                'difference_percent': difference_percent,
+                'anomaly_type': result['anomaly_type'][i],
+                'severity': result['severity'][i],
+                'seller_count': akakce_data['seller_count'],
+                'cimri_url': product.get('cimri_url', ''),
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        return anomalies
+    
+    def analyze_price_anomalies(self, products, max_products=10, checkpoint=None):
+        """
+        Fiyat anomalilerini tespit et.
+        checkpoint (ScrapeCheckpoint) verilirse önceki çalışmada biten ürünler
+        tekrar aranmaz, saklanan Akakçe sonuçları karşılaştırmaya katılır
+        """
+        # Sınırlı sayıda ürün işle (max_products=None: tüm katalog)
+        selected = products if max_products is None else products[:max_products]
+        remaining = selected if checkpoint is None else checkpoint.pending(selected)
+        stored = {} if checkpoint is None else checkpoint.results()
+        if len(remaining) < len(selected):
+            logging.info(f"⏯️ {len(selected) - len(remaining)} ürün önceki çalışmada tamamlanmış, atlanıyor")
         
-        for product in products[:max_products]:  # Sınırlı sayıda ürün işle
-            processed_count += 1
-            logging.info(f"İşleniyor ({processed_count}/{min(len(products), max_products)}): {product['brand']} {product['name']}")
+        fetched = {}
+        for processed_count, product in enumerate(remaining, 1):
+            logging.info(f"İşleniyor ({processed_count}/{len(remaining)}): {product['brand']} {product['name']}")
             
             # Brand bilgisi ile arama yap
             akakce_data = self.search_akakce_prices(product['name'], product['brand'])
+            fetched[str(product['id'])] = akakce_data
             
-            if akakce_data:
-                current_price = product['current_price']
-                market_avg = akakce_data['average']
-                
-                # Fark yüzdesini hesapla
-                price_difference = abs(current_price - market_avg) / market_avg
-                
-                if price_difference > self.config['settings']['price_threshold']:
-                    anomaly_type = "YÜKSEK" if current_price > market_avg else "DÜŞÜK"
-                    
-                    anomalies.append({
-                        'product_id': product['id'],
-                        'product_name': product['name'],
-                        'full_name': product['full_name'],
-                        'brand': product['brand'],
-                        'category': product['category'],
-                        'our_price': current_price,
-                        'market_average': market_avg,
-                        'market_min': akakce_data['min_price'],
-                        'market_max': akakce_data['max_price'],
-                        'difference_percent': price_difference * 100,
-                        'anomaly_type': anomaly_type,
-                        'seller_count': akakce_data['seller_count'],
-                        'cimri_url': product.get('cimri_url', ''),
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    
-                    logging.warning(f"ANOMALI: {product['brand']} {product['name']} - Bizim: {current_price}₺, Piyasa: {market_avg:.2f}₺ ({price_difference*100:.1f}% fark)")
-                else:
-                    logging.info(f"Normal: {product['brand']} {product['name']} - Bizim: {current_price}₺, Piyasa: {market_avg:.2f}₺")
-            else:
-                logging.warning(f"Piyasa verisi bulunamadı: {product['brand']} {product['name']}")
+            if checkpoint is not None:
+                checkpoint.mark(product['id'], akakce_data is not None, akakce_data)
+                if processed_count % CHECKPOINT_EVERY == 0:
+                    checkpoint.flush()
         
-        return anomalies
+        if checkpoint is not None:
+            checkpoint.flush()
+        
+        # Karşılaştırma tüm ürünler için tek geçişte (ürün sırası korunur)
+        results = []
+        for product in selected:
+            key = str(product['id'])
+            results.append((product, fetched[key] if key in fetched else stored.get(key)))
+        return self.compare_with_market(results)
+    
+    def open_checkpoint(self, products_total, resume=None):
+        """Yeni checkpoint aç ya da resume (job_uuid) ile var olanı yükle"""
+        get_db_manager().create_tables()
+        if resume:
+            return ScrapeCheckpoint.resume(resume)
+        return ScrapeCheckpoint.start('akakce', 'price_monitor', products_total)
     
     def send_email_alert(self, anomalies):
         """Email uyarısı gönder"""
@@ -368,8 +445,23 @@ class PriceMonitor:
         
         logging.info(f"Sonuçlar kaydedildi: {filename}")
     
-    def run(self, max_products=10):
-        """Ana çalışma fonksiyonu"""
+    def report_anomalies(self, anomalies):
+        """Sonuçları kaydet ve anomalileri raporla"""
+        self.save_results(anomalies)
+        self.log_anomaly_summary(anomalies)
+    
+    def log_anomaly_summary(self, anomalies):
+        """Anomali özetini logla"""
+        # Email gönder (anomali varsa - şu an pasif)
+        if anomalies:
+            logging.info(f"✅ {len(anomalies)} anomali tespit edildi!")
+            for anomaly in anomalies:
+                logging.info(f"   - {anomaly['brand']} {anomaly['product_name']}: {anomaly['our_price']}₺ vs {anomaly['market_average']:.2f}₺ ({anomaly['difference_percent']:.1f}% {anomaly['anomaly_type']})")
+        else:
+            logging.info("✅ Hiç anomali tespit edilmedi.")
+    
+    def run(self, max_products=10, resume=None):
+        """Ana çalışma fonksiyonu (resume: yarıda kalan çalışmanın job_uuid'si)"""
         logging.info("=== Networks Fiyat Takip Sistemi Başlıyor ===")
         
         # Networks API'den ürünleri al
@@ -378,21 +470,20 @@ class PriceMonitor:
             logging.error("Networks API'den ürün alınamadı!")
             return False
         
-        logging.info(f"Toplam {len(products)} ürün bulundu, {max_products} tanesi işlenecek")
-        
-        # Anomali analizi
-        anomalies = self.analyze_price_anomalies(products, max_products)
+        total = len(products) if max_products is None else min(max_products, len(products))
+        logging.info(f"Toplam {len(products)} ürün bulundu, {total} tanesi işlenecek")
         
-        # Sonuçları kaydet
-        self.save_results(anomalies)
+        # Anomali analizi (ürün bazında checkpoint ile)
+        checkpoint = self.open_checkpoint(total, resume)
+        try:
+            anomalies = self.analyze_price_anomalies(products, max_products, checkpoint=checkpoint)
+        except BaseException as e:
+            checkpoint.finish('failed', str(e) or type(e).__name__)
+            logging.error(f"Çalışma yarıda kaldı, devam etmek için: --resume {checkpoint.job_uuid}")
+            raise
+        checkpoint.finish()
         
-        # Email gönder (anomali varsa - şu an pasif)
-        if anomalies:
-            logging.info(f"✅ {len(anomalies)} anomali tespit edildi!")
-            for anomaly in anomalies:
-                logging.info(f"   - {anomaly['brand']} {anomaly['product_name']}: {anomaly['our_price']}₺ vs {anomaly['market_average']:.2f}₺ ({anomaly['difference_percent']:.1f}% {anomaly['anomaly_type']})")
-        else:
-            logging.info("✅ Hiç anomali tespit edilmedi.")
+        self.report_anomalies(anomalies)
         
         logging.info("=== İşlem Tamamlandı ===")
         return True
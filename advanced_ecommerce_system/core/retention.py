@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+E-Ticaret Fiyat Analiz Sistemi - Saklama (Retention) Yöneticisi
+Politika bazında eski kayıtları ve dosyaları temizler: çözülmüş anomaliler ve
+biten scraping işleri kısa transaction'larla parti parti silinir (istenirse
+önce gzip JSONL'e arşivlenir), price_anomalies_*.json dökümleri budanır,
+log dosyaları döndürülür ve SQLite boş sayfaları incremental VACUUM ile iade edilir.
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, func, select
+
+# Proje dizinini path'e ekle
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+
+from core import cache_versions
+from core.database.models import get_db_manager, PriceAnomaly, ScrapeProgress, ScrapingJob
+
+logger = logging.getLogger(__name__)
+
+# config.json "settings.retention" ile üzerine yazılabilir
+DEFAULT_POLICIES = {
+    'tables': {
+        'resolved_anomalies': {'keep_days': 90, 'archive': True},
+        'scraping_jobs': {'keep_days': 30, 'archive': False},
+    },
+    'files': {
+        'price_anomalies': {'patterns': ['price_anomalies_*.json'], 'keep_days': 30, 'keep_last': 10, 'archive': True},
+        'akakce_test_results': {'patterns': ['akakce_test_results_*.json'], 'keep_days': 30, 'keep_last': 5, 'archive': False},
+    },
+    'logs': {
+        'patterns': ['*.log', os.path.join('web_dashboard', '*.log')],
+        'max_bytes': 10 * 1024 * 1024,
+        'backup_count': 5,
+    },
+    # market_prices burada değil, weekly_price_archive işi (core/database/price_archive.py) ile
+    # Parquet'e taşınır. Tam VACUUM ile incremental moda dönüştürme veritabanını kilitlediği
+    # için zamanlanmış çalışmada yapılmaz; bir kerelik: python core/retention.py --convert-vacuum
+    'vacuum': {'enabled': True, 'pages_per_step': 1000, 'convert': False},
+}
+
+DEFAULT_SETTINGS = {
+    'directories': ['.', '..'],  # PROJECT_DIR'e göre dosya/log aranan dizinler
+    'archive_dir': os.path.join('data', 'retention_archive'),
+    'batch_size': 1000,  # Transaction başına silinen satır
+    'pause_seconds': 0.05,  # Partiler arası bekleme (yazıcılara fırsat)
+}
+
+
+def _table_rules():
+    """Tablo politikası adı -> (tablo, yaş koşulu, önce silinecek alt tablolar)"""
+    anomalies = PriceAnomaly.__table__
+    jobs = ScrapingJob.__table__
+    return {
+        'resolved_anomalies': (
+            anomalies,
+            lambda cutoff: and_(anomalies.c.is_resolved == True,
+                                func.coalesce(anomalies.c.resolved_at, anomalies.c.detected_at) < cutoff),
+            [],
+        ),
+        'scraping_jobs': (
+            jobs,
+            lambda cutoff: and_(jobs.c.status.in_(('completed', 'failed')),
+                                func.coalesce(jobs.c.end_time, jobs.c.start_time, jobs.c.scheduled_for) < cutoff),
+            [ScrapeProgress.__table__.c.job_id],
+        ),
+    }
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def load_policies(config_file=None):
+    """DEFAULT_POLICIES + config.json "settings.retention" (bölüm bazında birleştirilir)"""
+    config_file = config_file or os.path.join(PROJECT_DIR, 'config.json')
+    try:
+        with open(config_file, encoding='utf-8') as f:
+            overrides = json.load(f).get('settings', {}).get('retention') or {}
+    except (OSError, ValueError):
+        overrides = {}
+
+    policies = {}
+    for section, defaults in DEFAULT_POLICIES.items():
+        override = overrides.get(section, {})
+        if section in ('tables', 'files'):
+            policies[section] = {name: {**defaults.get(name, {}), **override.get(name, {})}
+                                 for name in {**defaults, **override}}
+        else:
+            policies[section] = {**defaults, **override}
+    return policies
+
+
+class RetentionManager:
+    """
+    Saklama politikalarını uygular.
+
+    Her tablo politikası id sırasıyla `batch_size` satırlık partiler halinde
+    işlenir; her parti ayrı bir kısa transaction'dır, böylece SQLite yazma
+    kilidi uzun süre tutulmaz. dry_run=True ise sadece sayılır, hiçbir şey
+    silinmez/taşınmaz.
+    """
+
+    def __init__(self, policies=None, dry_run=False, **settings):
+        self.policies = policies or load_policies()
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.dry_run = dry_run
+        self.archive_dir = os.path.join(PROJECT_DIR, self.settings['archive_dir'])
+
+    def run(self, now=None):
+        """Tüm politikalar; {adım: etkilenen kayıt/dosya sayısı} raporu"""
+        now = now or datetime.now()
+        report = {}
+        for name, policy in self.policies.get('tables', {}).items():
+            report[f'table:{name}'] = self.purge_table(name, policy, now)
+        for name, policy in self.policies.get('files', {}).items():
+            report[f'files:{name}'] = self.prune_files(policy, now)
+        if self.policies.get('logs'):
+            report['logs'] = self.rotate_logs(self.policies['logs'])
+        if self.policies.get('vacuum', {}).get('enabled'):
+            report['vacuum_pages'] = self.vacuum(self.policies['vacuum'])
+        logger.info(f"🧹 Saklama politikaları uygulandı{' (dry-run)' if self.dry_run else ''}: {report}")
+        return report
+
+    # --- Tablolar ---
+
+    def purge_table(self, name, policy, now=None):
+        """Politikadan eski satırları parti parti sil (archive=True ise önce gzip JSONL'e yaz)"""
+        table, age_condition, children = _table_rules()[name]
+        condition = age_condition((now or datetime.now()) - timedelta(days=policy['keep_days']))
+        engine = get_db_manager().engine
+
+        if self.dry_run:
+            with engine.connect() as connection:
+                return connection.execute(select(func.count()).select_from(table).where(condition)).scalar()
+
+        removed = 0
+        last_id = 0
+        while True:
+            with engine.begin() as connection:
+                rows = connection.execute(
+                    select(table).where(condition, table.c.id > last_id)
+                    .order_by(table.c.id).limit(self.settings['batch_size'])
+                ).mappings().all()
+                if not rows:
+                    break
+                ids = [row['id'] for row in rows]
+                if policy.get('archive'):
+                    self._archive_rows(table.name, rows)
+                for column in children:
+                    connection.execute(delete(column.table).where(column.in_(ids)))
+                connection.execute(delete(table).where(table.c.id.in_(ids)))
+            removed += len(ids)
+            last_id = ids[-1]
+            time.sleep(self.settings['pause_seconds'])
+
+        if removed:
+            logger.info(f"🗑️ {table.name}: {removed} eski kayıt silindi ({name})")
+            if table is PriceAnomaly.__table__:
+                cache_versions.bump(cache_versions.ANOMALIES)
+        return removed
+
+    def _archive_rows(self, table_name, rows):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{table_name}-{datetime.now():%Y%m}.jsonl.gz")
+        # gzip 'at': her parti dosyaya yeni bir gzip üyesi olarak eklenir
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(dict(row), default=_json_default, ensure_ascii=False) + '\n')
+
+    # --- Dosyalar ---
+
+    def _find(self, patterns):
+        found = set()
+        for directory in self.settings['directories']:
+            for pattern in patterns:
+                found.update(glob.glob(os.path.join(PROJECT_DIR, directory, pattern)))
+        return {os.path.realpath(path) for path in found if os.path.isfile(path)}
+
+    def prune_files(self, policy, now=None):
+        """keep_days'ten eski dökümleri sil (en yeni keep_last dosya her zaman kalır)"""
+        cutoff = ((now or datetime.now()) - timedelta(days=policy['keep_days'])).timestamp()
+        files = sorted(self._find(policy['patterns']), key=os.path.getmtime, reverse=True)
+        expired = [path for path in files[policy.get('keep_last', 0):] if os.path.getmtime(path) < cutoff]
+
+        for path in expired:
+            if self.dry_run:
+                continue
+            if policy.get('archive'):
+                os.makedirs(self.archive_dir, exist_ok=True)
+                with open(path, 'rb') as source, gzip.open(
+                        os.path.join(self.archive_dir, os.path.basename(path) + '.gz'), 'wb') as target:
+                    shutil.copyfileobj(source, target)
+            os.remove(path)
+        if expired and not self.dry_run:
+            logger.info(f"🗑️ {len(expired)} eski döküm dosyası temizlendi ({', '.join(policy['patterns'])})")
+        return len(expired)
+
+    def rotate_logs(self, policy):
+        """
+        max_bytes'ı aşan logları copy-truncate ile döndür (x.log -> x.log.1.gz ...).
+        Dosyayı açık tutan process'ler aynı dosyaya yazmaya devam edebilir.
+        """
+        rotated = 0
+        backup_count = policy['backup_count']
+        for path in sorted(self._find(policy['patterns'])):
+            if os.path.getsize(path) < policy['max_bytes']:
+                continue
+            rotated += 1
+            if self.dry_run:
+                continue
+            try:
+                oldest = f"{path}.{backup_count}.gz"
+                if os.path.exists(oldest):
+                    os.remove(oldest)
+                for index in range(backup_count - 1, 0, -1):
+                    if os.path.exists(f"{path}.{index}.gz"):
+                        os.replace(f"{path}.{index}.gz", f"{path}.{index + 1}.gz")
+                with open(path, 'rb') as source, gzip.open(f"{path}.1.gz", 'wb') as target:
+                    shutil.copyfileobj(source, target)
+                with open(path, 'r+b') as f:
+                    f.truncate(0)
+                logger.info(f"🔄 Log döndürüldü: {path}")
+            except OSError as e:
+                logger.warning(f"⚠️ Log döndürülemedi ({path}): {e}")
+        return rotated
+
+    # --- Veritabanı ---
+
+    def vacuum(self, policy):
+        """
+        SQLite boş sayfalarını parça parça dosya sistemine iade et.
+        Veritabanı auto_vacuum=INCREMENTAL değilse sadece convert=True verildiğinde
+        (--convert-vacuum) bir kerelik tam VACUUM ile dönüştürülür; tam VACUUM tüm
+        veritabanını kilitler, dashboard ve scraper'lar durdurulmuşken çalıştırılmalı.
+        """
+        engine = get_db_manager().engine
+        if engine.dialect.name != 'sqlite' or self.dry_run:
+            return 0
+
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            mode = connection.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+            if mode != 2:
+                if not policy.get('convert'):
+                    logger.info("ℹ️ Veritabanı incremental auto_vacuum modunda değil, VACUUM atlandı "
+                                "(bir kerelik dönüştürme: python core/retention.py --convert-vacuum)")
+                    return 0
+                logger.info("🧱 Veritabanı incremental auto_vacuum moduna alınıyor (bir kerelik tam VACUUM)")
+                connection.exec_driver_sql('PRAGMA auto_vacuum=INCREMENTAL')
+                connection.exec_driver_sql('VACUUM')
+                return 0
+
+            freed = 0
+            while True:
+                free_pages = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+                if not free_pages:
+                    break
+                step = min(free_pages, policy['pages_per_step'])
+                # sqlite3 modülü execute() ile pragmayı tek adım çalıştırır (tek sayfa);
+                # executescript ifadeyi sonuna kadar adımlar
+                connection.connection.dbapi_connection.executescript(f'PRAGMA incremental_vacuum({int(step)});')
+                freed += step
+                time.sleep(self.settings['pause_seconds'])
+        if freed:
+            logger.info(f"🧱 Incremental VACUUM: {freed} sayfa iade edildi")
+        return freed
+
+
+def main():
+    """Komut satırından saklama politikaları"""
+    parser = argparse.ArgumentParser(description="Eski kayıt, döküm ve logları temizle")
+    parser.add_argument('--dry-run', action='store_true', help="Sadece say, silme")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_SETTINGS['batch_size'])
+    parser.add_argument('--convert-vacuum', action='store_true',
+                        help="Veritabanını bir kerelik tam VACUUM ile incremental auto_vacuum moduna al "
+                             "(veritabanını kilitler; dashboard/scraper kapalıyken çalıştırın) ve çık")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    manager = RetentionManager(dry_run=args.dry_run, batch_size=args.batch_size)
+    if args.convert_vacuum:
+        manager.vacuum({**manager.policies['vacuum'], 'convert': True})
+        return
+    report = manager.run()
+    for step, count in report.items():
+        print(f"  {step}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Hızlı JSON Serileştirme
+Analiz sonuçlarındaki NumPy dizilerini ve tarih indekslerini kolon bazlı
+({dates: [...], values: [...]}) tutar ve orjson ile doğrudan kodlar.
+orjson kurulu değilse standart json modülüne düşer.
+"""
+
+import json
+import math
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def series_to_columns(series: pd.Series) -> dict:
+    """Zaman indeksli seriyi kolon bazlı sözlüğe çevir (diziler kopyalanmaz)"""
+    return {'dates': series.index.values, 'values': series.to_numpy()}
+
+
+def _default(obj):
+    """orjson'un doğrudan desteklemediği pandas/numpy nesneleri"""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, pd.Series):
+        return series_to_columns(obj)
+    if isinstance(obj, pd.Index):
+        return obj.to_numpy()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        # Desteklenmeyen dtype (örn. object) dizileri
+        return obj.tolist()
+    raise TypeError(f"JSON'a çevrilemeyen tip: {type(obj).__name__}")
+
+
+def _json_default(obj):
+    """Standart json modülü için yedek dönüştürücü"""
+    if isinstance(obj, np.ndarray):
+        if np.issubdtype(obj.dtype, np.datetime64):
+            return [ts.isoformat() for ts in pd.DatetimeIndex(obj)]
+        if np.issubdtype(obj.dtype, np.floating):
+            return [None if math.isnan(v) else v for v in obj.tolist()]
+        return obj.tolist()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, np.floating):
+        value = obj.item()
+        return None if math.isnan(value) else value
+    return _default(obj)
+
+
+def _clean_key(key):
+    if isinstance(key, (datetime, date)):
+        return key.isoformat()
+    if isinstance(key, np.generic):
+        return key.item()
+    return key
+
+
+def _clean_keys(obj):
+    """json modülü için sözlük anahtarlarını (Timestamp vb.) string'e çevir"""
+    if isinstance(obj, dict):
+        return {_clean_key(k): _clean_keys(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_clean_keys(v) for v in obj]
+    return obj
+
+
+def dumps(obj, indent=False) -> bytes:
+    """Nesneyi UTF-8 JSON byte dizisine çevir"""
+    if HAS_ORJSON:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, default=_default, option=options)
+        except TypeError:
+            # Timestamp gibi anahtarlar OPT_NON_STR_KEYS ile kodlanamaz
+            return orjson.dumps(_clean_keys(obj), default=_default, option=options)
+    return json.dumps(_clean_keys(obj), default=_json_default, ensure_ascii=False,
+                      allow_nan=False, indent=2 if indent else None).encode('utf-8')
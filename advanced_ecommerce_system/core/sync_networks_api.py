@@ -14,6 +14,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.database.models import get_db_session, Product
+from core.database.dashboard_stats import refresh_product_stats
+from core import cache_versions
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
@@ -137,8 +139,12 @@ class NetworksAPISyncer:
                     logger.warning(f"Ürün işlenemedi ({api_product.get('productName', 'Unknown')}): {product_error}")
                     continue
             
+            # Dashboard sayaçlarını aynı transaction'da güncelle
+            refresh_product_stats(session)
+            
             # Değişiklikleri kaydet
             session.commit()
+            cache_versions.bump(cache_versions.PRODUCTS)
             
             logger.info(f"✅ Sync tamamlandı: {sync_count} yeni, {update_count} güncelleme")
             return True
@@ -13,10 +13,12 @@ import json
 # Proje dizinini path'e ekle
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from core import cache_versions
 from core.database.models import (
     init_database, get_db_session, 
     Product, PriceHistory, MarketPrice, PriceAnomaly, PricePrediction
 )
+from core.database.dashboard_stats import rebuild_dashboard_stats
 
 def create_sample_products():
     """Örnek ürünler oluştur"""
@@ -134,6 +136,7 @@ def create_sample_products():
     
     session.commit()
     session.close()
+    cache_versions.bump(cache_versions.PRODUCTS)
     
     print(f"✅ {len(created_product_ids)} ürün oluşturuldu")
     return created_product_ids
@@ -229,6 +232,7 @@ def create_price_history(product_ids, days=90):
     
     session.commit()
     session.close()
+    cache_versions.bump(cache_versions.PRODUCTS, cache_versions.PRICE_HISTORY, cache_versions.MARKET_PRICES)
     
     print(f"✅ {total_records} fiyat geçmişi kaydı oluşturuldu")
 
@@ -247,6 +251,7 @@ def create_price_anomalies(product_ids):
     for product in products:
         # Her ürün için 2-5 anomali oluştur
         num_anomalies = random.randint(2, 5)
+        product_anomalies = []
         
         for _ in range(num_anomalies):
             anomaly_type = random.choice(anomaly_types)
@@ -301,11 +306,25 @@ def create_price_anomalies(product_ids):
                 resolved_at=resolved_at,
                 notes=notes
             )
+            product_anomalies.append(anomaly)
+        
+        # Ürün başına tek açık anomali (uq_price_anomalies_open_product):
+        # en yeni açık anomali kalır, eskileri sonraki tespitte çözümlenmiş sayılır
+        product_anomalies.sort(key=lambda a: a.detected_at, reverse=True)
+        open_kept = False
+        for anomaly in product_anomalies:
+            if not anomaly.is_resolved:
+                if open_kept:
+                    anomaly.is_resolved = True
+                    anomaly.resolved_at = anomaly.detected_at + timedelta(hours=random.randint(1, 72))
+                    anomaly.notes = 'Yeni anomali tespit edildi, eski kayıt kapatıldı'
+                open_kept = True
             session.add(anomaly)
             anomalies_created += 1
     
     session.commit()
     session.close()
+    cache_versions.bump(cache_versions.ANOMALIES)
     
     print(f"✅ {anomalies_created} anomali kaydı oluşturuldu")
 
@@ -375,6 +394,12 @@ def main():
     create_price_anomalies(product_ids)
     create_predictions(product_ids)
     
+    # Dashboard sayaçlarını yeni verilerden oluştur
+    session = get_db_session()
+    rebuild_dashboard_stats(session)
+    session.commit()
+    session.close()
+    
     print("\n🎉 Örnek veri oluşturma tamamlandı!")
     print(f"📊 Toplam {len(product_ids)} ürün")
     print("💰 90 günlük fiyat geçmişi")
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Yük testi veri üreticisi
+N ürün × D gün × S satıcı boyutunda PriceHistory / MarketPrice / PriceAnomaly
+verisini NumPy ile vektörel (rastgele yürüyüş) üretir. Aynı seed aynı veriyi
+verir (--start-date ile tarih aralığı da sabitlenir). Çıktı veritabanına toplu (SQLite: executemany, PostgreSQL: COPY) ya da
+doğrudan Parquet dosyalarına yazılır.
+
+Örnek: python generate_load_data.py --products 20000 --days 90 --sellers 8 --seed 42
+"""
+
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analysis.anomaly_detection.anomaly_engine import AnomalyEngine
+from core import cache_versions
+from core.database.dashboard_stats import rebuild_dashboard_stats
+from core.database.models import get_db_manager, MarketPrice, PriceAnomaly, PriceHistory, Product
+from core.database.price_rollup import PriceHistoryRollup
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'products': 1000,
+    'days': 90,
+    'sellers': 8,
+    'seed': 42,
+    'start_date': None,  # İlk veri günü (None: son gün bugün olacak şekilde)
+    'chunk_products': 1000,  # Bellekte aynı anda üretilen ürün sayısı (chunk × gün × satıcı satır)
+    'daily_volatility': 0.015,  # Günlük log getiri std'si
+    'seller_spread': 0.06,  # Satıcı fiyatlarının piyasa ortalaması etrafındaki std'si
+    'anomaly_threshold': 15.0,  # |bizim - piyasa ort.| / piyasa ort. (%) eşiği
+    'anomaly_rules': 'akakce',  # Önem dereceleri için AnomalyEngine kural seti
+}
+
+BRANDS = np.array(['Apple', 'Samsung', 'Xiaomi', 'Lenovo', 'Dell', 'HP', 'Asus', 'Sony', 'LG', 'Huawei'])
+CATEGORIES = np.array(['Telefon', 'Bilgisayar', 'Tablet', 'Televizyon', 'Kulaklık', 'Akıllı Saat'])
+SELLERS = ['Trendyol', 'Hepsiburada', 'GittiGidiyor', 'N11', 'Amazon', 'Vatanbilgisayar', 'MediaMarkt', 'Teknosa']
+
+
+def _sqlite_timestamps(values):
+    """datetime64 dizisi -> SQLAlchemy'nin SQLite DateTime metin formatı"""
+    return np.char.replace(np.datetime_as_string(values, unit='us'), 'T', ' ')
+
+
+class LoadDataGenerator:
+    """
+    Ürünleri chunk'lar halinde üretir; her chunk için tüm diziler tek seferde
+    hesaplanır (Python döngüsü yok):
+
+    - piyasa ortalaması: ürün başına log-normal başlangıç + günlük rastgele yürüyüş
+    - satıcı fiyatları: ortalama × (1 + N(0, seller_spread)), (ürün, gün, satıcı)
+    - fiyat geçmişi: satıcı ekseninde min/max/ortalama/medyan (rollup ile aynı tanım)
+    - anomaliler: bizim fiyatın piyasa ortalamasından eşik üstü sapması
+      (tip ve önem derecesi AnomalyEngine kurallarıyla); ürün başına sadece en
+      son anomali açık kalır
+
+    Tüm rastgelelik (uuid'ler dahil) seed'li üreticiden gelir; start_date
+    verilirse aynı seed her gün aynı satırları üretir.
+    """
+
+    def __init__(self, **settings):
+        self.settings = {**DEFAULT_SETTINGS, **settings}
+        self.rng = np.random.default_rng(self.settings['seed'])
+        start_date = self.settings['start_date']
+        if start_date is None:
+            start_date = datetime.now().date() - timedelta(days=self.settings['days'] - 1)
+        elif isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        self.start = datetime.combine(start_date, datetime.min.time())
+        self.anomaly_engine = AnomalyEngine(self.settings['anomaly_rules'], threshold=self.settings['anomaly_threshold'])
+        sellers = self.settings['sellers']
+        self.sellers = np.array((SELLERS + [f'Satıcı {i}' for i in range(len(SELLERS) + 1, sellers + 1)])[:sellers])
+
+    # --- Üretim ---
+
+    def products(self, first_id, count):
+        """Ürün satırları (kolon dizileri)"""
+        rng = self.rng
+        ids = np.arange(first_id, first_id + count)
+        return {
+            'id': ids,
+            'uuid': np.array([str(uuid.UUID(bytes=rng.bytes(16), version=4)) for _ in range(count)]),
+            'name': np.char.add('Yük Testi Ürün ', ids.astype(str)),
+            'brand': rng.choice(BRANDS, count),
+            'category': rng.choice(CATEGORIES, count),
+            'our_price': np.round(rng.lognormal(mean=9.5, sigma=0.8, size=count), 2),
+            'our_stock': rng.integers(0, 100, count),
+        }
+
+    def chunk(self, products):
+        """Bir ürün chunk'ı için (market_prices, price_history, price_anomalies) kolon dizileri"""
+        rng = self.rng
+        s = self.settings
+        ids = products['id']
+        n, days, sellers = len(ids), s['days'], len(self.sellers)
+
+        # Piyasa ortalaması ve bizim fiyat: günlük log getirilerin kümülatif toplamı
+        market_start = products['our_price'] * rng.uniform(0.85, 1.15, n)
+        market_avg = market_start[:, None] * np.exp(np.cumsum(rng.normal(0, s['daily_volatility'], (n, days)), axis=1))
+        our_price = products['our_price'][:, None] * np.exp(np.cumsum(rng.normal(0, s['daily_volatility'], (n, days)), axis=1))
+
+        # Satıcı fiyatları (ürün, gün, satıcı) ve gün içi scrape zamanı
+        seller_prices = np.round(market_avg[:, :, None] * (1 + rng.normal(0, s['seller_spread'], (n, days, sellers))), 2)
+        day_starts = np.datetime64(self.start, 'us') + np.arange(days).astype('timedelta64[D]')
+        offsets = rng.integers(0, 24 * 3600 * 10**6, (n, days, sellers)).astype('timedelta64[us]')
+        scraped_at = day_starts[None, :, None] + offsets
+
+        market = {
+            'product_id': np.repeat(ids, days * sellers),
+            'source': np.full(n * days * sellers, 'akakce'),
+            'seller_name': np.tile(self.sellers, n * days),
+            'price': seller_prices.ravel(),
+            'currency': np.full(n * days * sellers, 'TRY'),
+            'shipping_cost': np.zeros(n * days * sellers),
+            'is_in_stock': rng.random(n * days * sellers) > 0.05,
+            'scraped_at': scraped_at.ravel(),
+        }
+
+        history = {
+            'product_id': np.repeat(ids, days),
+            'our_price': np.round(our_price, 2).ravel(),
+            'market_min_price': seller_prices.min(axis=2).ravel(),
+            'market_max_price': seller_prices.max(axis=2).ravel(),
+            'market_avg_price': np.round(seller_prices.mean(axis=2), 2).ravel(),
+            'market_median_price': np.round(np.median(seller_prices, axis=2), 2).ravel(),
+            'competitor_count': np.full(n * days, sellers),
+            'date': np.tile(day_starts, n),
+        }
+
+        # Anomaliler: motorun eşik üstü bulduğu sapmalar; en son olan dışındakiler çözümlenmiş
+        detected = self.anomaly_engine.detect(history['product_id'], history['our_price'], history['market_avg_price'])
+        deviation = detected['deviation_percent']
+        flagged = np.flatnonzero(detected['is_anomaly'])
+        flagged_products = history['product_id'][flagged]
+        latest = np.r_[flagged_products[1:] != flagged_products[:-1], True] if len(flagged) else np.array([], bool)
+        detected_at = history['date'][flagged] + rng.integers(0, 24 * 3600 * 10**6, len(flagged)).astype('timedelta64[us]')
+        anomalies = {
+            'product_id': flagged_products,
+            'anomaly_type': detected['anomaly_type'][flagged].astype(str),
+            'severity': detected['severity'][flagged].astype(str),
+            'deviation_percent': np.round(deviation[flagged], 2),
+            'our_price': history['our_price'][flagged],
+            'market_avg_price': history['market_avg_price'][flagged],
+            'detected_at': detected_at,
+            'is_resolved': ~latest,
+            'resolved_at': np.where(latest, np.datetime64('NaT'), detected_at + np.timedelta64(1, 'D')),
+            'notes': np.full(len(flagged), 'Yük testi verisi'),
+        }
+        return market, history, anomalies
+
+    def generate(self, first_id=1):
+        """(ürünler, market_prices, price_history, price_anomalies) chunk'ları üret"""
+        total = self.settings['products']
+        size = self.settings['chunk_products']
+        for offset in range(0, total, size):
+            products = self.products(first_id + offset, min(size, total - offset))
+            yield (products, *self.chunk(products))
+
+    # --- Yazıcılar ---
+
+    def write_database(self):
+        """Veritabanına toplu yaz; {tablo: satır sayısı} döndürür"""
+        manager = get_db_manager()
+        manager.create_tables()
+        engine = manager.engine
+        counts = dict.fromkeys(('products', 'market_prices', 'price_history', 'price_anomalies'), 0)
+
+        rollup = PriceHistoryRollup()
+        session = manager.get_session()
+        try:
+            first_id = (session.execute(select(func.max(Product.id))).scalar() or 0) + 1
+            market_before = session.execute(select(func.max(MarketPrice.id))).scalar() or 0
+            rollup_current = rollup.high_water_mark(session) >= market_before
+        finally:
+            session.close()
+
+        raw = engine.raw_connection()
+        try:
+            if engine.dialect.name == 'sqlite':
+                raw.cursor().execute('PRAGMA synchronous=OFF')  # Sadece bu yükleme bağlantısı için
+            for products, market, history, anomalies in self.generate(first_id):
+                started = time.perf_counter()
+                self._copy(raw, engine.dialect.name, Product.__table__, self._product_rows(products))
+                self._copy(raw, engine.dialect.name, MarketPrice.__table__, market)
+                self._copy(raw, engine.dialect.name, PriceHistory.__table__, history)
+                self._copy(raw, engine.dialect.name, PriceAnomaly.__table__, anomalies)
+                raw.commit()
+                for table, columns in (('products', products), ('market_prices', market),
+                                       ('price_history', history), ('price_anomalies', anomalies)):
+                    counts[table] += len(columns['product_id' if table != 'products' else 'id'])
+                logger.info(f"⚡ {counts['products']}/{self.settings['products']} ürün, "
+                            f"{counts['market_prices']} piyasa fiyatı ({time.perf_counter() - started:.1f} sn)")
+        finally:
+            raw.close()
+
+        session = manager.get_session()
+        try:
+            # Üretilen geçmiş rollup ile aynı; rollup zaten güncelse yeni satırları tekrar toplamasın
+            if rollup_current:
+                rollup.advance(session, session.execute(select(func.max(MarketPrice.id))).scalar() or 0)
+            rebuild_dashboard_stats(session)
+            session.commit()
+        finally:
+            session.close()
+        cache_versions.bump(cache_versions.PRODUCTS, cache_versions.MARKET_PRICES,
+                            cache_versions.PRICE_HISTORY, cache_versions.ANOMALIES)
+        return counts
+
+    def _product_rows(self, products):
+        count = len(products['id'])
+        created = np.datetime64(self.start, 'us')  # Ürün ilk veri gününden beri katalogda
+        return {
+            **products,
+            'subcategory': products['category'],
+            'our_sku': np.char.add('LOAD-', products['id'].astype(str)),
+            'is_active': np.ones(count, bool),
+            'created_at': np.full(count, created),
+            'updated_at': np.full(count, created),
+        }
+
+    @staticmethod
+    def _copy(raw, dialect, table, columns):
+        """Kolon dizilerini tabloya toplu ekle (PostgreSQL: COPY, diğerleri: executemany)"""
+        names = list(columns)
+        if not len(columns[names[0]]):
+            return
+        if dialect == 'postgresql':
+            frame = pd.DataFrame(columns)
+            buffer = io.StringIO()
+            frame.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL, na_rep='')
+            buffer.seek(0)
+            with raw.cursor() as cursor:
+                cursor.copy_expert(f"COPY {table.name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            return
+
+        values = []
+        for name in names:
+            array = columns[name]
+            if np.issubdtype(array.dtype, np.datetime64):
+                text = _sqlite_timestamps(array).astype(object)
+                text[np.isnat(array)] = None
+                values.append(text.tolist())
+            else:
+                values.append(array.tolist())
+        placeholders = ', '.join('?' for _ in names)
+        raw.cursor().executemany(f"INSERT INTO {table.name} ({', '.join(names)}) VALUES ({placeholders})",
+                                 zip(*values))
+
+    def write_parquet(self, output_dir):
+        """Her tabloyu <output_dir>/<tablo>/part-XXXXX.parquet olarak yaz (Zstd)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        counts = {}
+        for index, chunk in enumerate(self.generate()):
+            for table, columns in zip(('products', 'market_prices', 'price_history', 'price_anomalies'), chunk):
+                directory = os.path.join(output_dir, table)
+                os.makedirs(directory, exist_ok=True)
+                pq.write_table(pa.table(columns), os.path.join(directory, f'part-{index:05d}.parquet'),
+                               compression='zstd')
+                counts[table] = counts.get(table, 0) + len(next(iter(columns.values())))
+            logger.info(f"⚡ {counts['products']}/{self.settings['products']} ürün Parquet'e yazıldı")
+        return counts
+
+
+def main():
+    """Komut satırından yük testi verisi üret"""
+    parser = argparse.ArgumentParser(description="Yük testi için sentetik fiyat verisi")
+    parser.add_argument('--products', type=int, default=DEFAULT_SETTINGS['products'])
+    parser.add_argument('--days', type=int, default=DEFAULT_SETTINGS['days'])
+    parser.add_argument('--sellers', type=int, default=DEFAULT_SETTINGS['sellers'])
+    parser.add_argument('--seed', type=int, default=DEFAULT_SETTINGS['seed'])
+    parser.add_argument('--start-date', default=None, metavar='YYYY-MM-DD',
+                        help="İlk veri günü; tekrarlanabilir veri için sabitleyin (varsayılan: son gün bugün)")
+    parser.add_argument('--chunk-products', type=int, default=DEFAULT_SETTINGS['chunk_products'])
+    parser.add_argument('--database-url', default=None, help="Varsayılan: sqlite:///ecommerce_analytics.db")
+    parser.add_argument('--parquet', metavar='DIR', default=None, help="Veritabanı yerine Parquet dizinine yaz")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    generator = LoadDataGenerator(products=args.products, days=args.days, sellers=args.sellers,
+                                  seed=args.seed, start_date=args.start_date,
+                                  chunk_products=args.chunk_products)
+
+    started = time.perf_counter()
+    if args.parquet:
+        counts = generator.write_parquet(args.parquet)
+    else:
+        if args.database_url:
+            get_db_manager(args.database_url)
+        counts = generator.write_database()
+    elapsed = time.perf_counter() - started
+
+    total = sum(counts.values())
+    print(f"\n🎉 {total:,} satır {elapsed:.1f} sn'de üretildi ({total / max(elapsed, 1e-9):,.0f} satır/sn)")
+    for table, count in counts.items():
+        print(f"   {table}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
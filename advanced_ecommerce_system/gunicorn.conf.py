@@ -0,0 +1,43 @@
+"""
+Dashboard için gunicorn ayarları
+Kullanım (proje dizininden): gunicorn -c gunicorn.conf.py web_dashboard.wsgi:application
+"""
+
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:5000')
+
+# gthread: her worker birden fazla isteği thread'lerde işler. SSE (/api/events)
+# bağlantıları açık kaldığı için sync worker yerine thread'li worker şart.
+# Her açık SSE akışı bir thread tutar; uygulama eşzamanlı akışları
+# DASHBOARD_SSE_MAX_STREAMS ile (varsayılan threads / 4) sınırlar, fazlası
+# yoklamaya geçer. Çok sayıda sekme bekleniyorsa DASHBOARD_WORKER_CLASS=gevent
+# (pip install gevent) ile akışlar thread tutmadan sunulabilir; o durumda
+# DASHBOARD_SSE_MAX_STREAMS da yükseltilmelidir.
+worker_class = os.environ.get('DASHBOARD_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('DASHBOARD_THREADS', 16))
+if worker_class == 'gevent':
+    worker_connections = int(os.environ.get('DASHBOARD_WORKER_CONNECTIONS', 1000))
+
+# Varsayılan min(4, CPU) worker. Worker'lar arası paylaşılanlar veritabanındadır:
+# önbellek sürümleri (yazımlar tüm worker'larda ~1 sn içinde geçersiz kılar) ve
+# arka plan iş durumları (/api/jobs/<id> her worker'dan yoklanabilir, toplu
+# scraping tüm worker'larda tek kopya çalışır). Process içi kalan tek durum SSE
+# olay yoludur: bir olay sadece onu yayınlayan worker'a bağlı istemcilere gider
+# (örn. bir worker'da başlayan toplu scraping'in ilerlemesi). Diğer worker'lara
+# bağlı sekmeler değişiklikleri yoklama (polling) ile görür; tüm olaylar her
+# sekmeye anında ulaşmalıysa DASHBOARD_WORKERS=1 ile tek worker kullanın.
+workers = int(os.environ.get('DASHBOARD_WORKERS', min(4, os.cpu_count() or 1)))
+
+# gthread'de timeout istek süresi değil worker heartbeat'idir (açık SSE bağlantıları etkilenmez)
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('DASHBOARD_LOG_LEVEL', 'info')
+
+# Uygulama worker fork edilmeden önce yüklenmez: her worker kendi DB bağlantı
+# havuzunu ve arka plan thread havuzlarını açar
+preload_app = False
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Performans benchmark'ları
+Networks sync, ML veri hazırlama, trend analizi, dashboard route'ları ve
+Akakçe scraper'ı seçilen veri ölçeklerinde ölçer. Canlı servisler yerine yerel
+fixture sunucusu kullanılır. Sonuçlar benchmarks/results/<commit>-<ölçek>.json
+dosyasına yazılır; --compare ile önceki bir commit'in sonucu ile karşılaştırılır.
+
+Örnek:
+    python run_benchmarks.py --scale small
+    python run_benchmarks.py --scale medium --only flask --compare benchmarks/results/abc1234-medium.json
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fixtures import BenchmarkDataset, SCALES
+from benchmarks.harness import (BenchmarkRunner, DEFAULT_SETTINGS, RESULTS_DIR, compare_results, format_comparison,
+                                format_results, load_results, save_results)
+from benchmarks.suites import SUITES
+
+logger = logging.getLogger(__name__)
+
+
+def run_scale(scale, suites=None, only=None, output_dir=RESULTS_DIR, **settings):
+    """Bir ölçekte seçili senaryoları çalıştır; (sonuç dokümanı, dosya yolu) döndürür"""
+    runner = BenchmarkRunner(only=only, **settings)
+    with BenchmarkDataset(scale) as dataset:
+        logger.warning(f"📦 {scale}: {dataset.counts}")
+        for name, suite in SUITES.items():
+            if (suites and name not in suites) or not runner.wants_suite(name):
+                continue
+            logger.warning(f"⏱️ {scale}/{name}")
+            suite(runner, dataset)
+        document = runner.document(scale, dataset.counts)
+    path = save_results(document, output_dir) if output_dir else None
+    return document, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performans benchmark'ları")
+    parser.add_argument('--scale', action='append', choices=list(SCALES),
+                        help="Veri ölçeği (birden çok verilebilir, varsayılan: small)")
+    parser.add_argument('--suite', action='append', choices=list(SUITES), help="Sadece bu senaryo(lar)")
+    parser.add_argument('--only', action='append', metavar='PREFIX',
+                        help="Sadece adı bu önekle başlayan benchmark'lar (örn. 'flask.GET /api')")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_SETTINGS['rounds'])
+    parser.add_argument('--warmup', type=int, default=DEFAULT_SETTINGS['warmup'])
+    parser.add_argument('--output-dir', default=RESULTS_DIR)
+    parser.add_argument('--compare', metavar='BASELINE_JSON', help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_SETTINGS['threshold'],
+                        help="Medyan değişiminin regresyon sayıldığı oran (0.10 = %%10)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Regresyon varsa 1 ile çık")
+    args = parser.parse_args()
+
+    # Ölçülen kodun INFO logları süreyi ve çıktıyı şişirmesin
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Aynı commit'te tekrar çalıştırılırsa baz dosyanın üzerine yazılmadan önce oku
+    baseline = load_results(args.compare) if args.compare else None
+    regressions = 0
+    for scale in args.scale or ['small']:
+        document, path = run_scale(scale, suites=args.suite, only=args.only, output_dir=args.output_dir,
+                                   rounds=args.rounds, warmup=args.warmup, threshold=args.threshold)
+        print(f"\n📊 {scale} ({document['revision']}{' dirty' if document['dirty'] else ''})")
+        print(format_results(document['benchmarks']))
+        print(f"💾 {path}")
+
+        if baseline is not None:
+            rows = compare_results(baseline, document, args.threshold)
+            print(f"\n🔍 Karşılaştırma: {args.compare}")
+            print(format_comparison(rows))
+            regressions += sum(1 for row in rows if row[-1] == 'regression')
+
+    if args.fail_on_regression and regressions:
+        print(f"\n🔴 {regressions} regresyon")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,6 @@ echo =========================================
 echo.
 
 REM Flask uygulamasını başlat
-python web_dashboard\app.py
+python web_dashboard\wsgi.py
 
 pause
\ No newline at end of file
@@ -4,6 +4,7 @@ Networks Price Monitor Runner
 Advanced E-commerce System içinden price monitoring çalıştırma scripti
 """
 
+import argparse
 import sys
 import os
 
@@ -11,15 +12,26 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'core'))
 
 from price_monitor import PriceMonitor
+from async_price_monitor import AsyncPriceMonitor
 
 def main():
     """Ana çalıştırma fonksiyonu"""
+    parser = argparse.ArgumentParser(description="Networks fiyat takibi")
+    parser.add_argument('--max-products', type=int, default=10,
+                        help="İşlenecek ürün sayısı (0: tüm katalog)")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Asenkron pipeline ile çalıştır")
+    parser.add_argument('--resume', metavar='JOB_UUID', default=None,
+                        help="Yarıda kalan çalışmayı sürdür (biten ürünler tekrar aranmaz)")
+    args = parser.parse_args()
+    
     print("=== Networks Advanced E-commerce Price Monitoring ===")
     
     try:
         # Price monitor oluştur ve çalıştır
-        monitor = PriceMonitor()
-        success = monitor.run(max_products=10)
+        monitor = AsyncPriceMonitor() if args.use_async else PriceMonitor()
+        max_products = args.max_products or None
+        success = monitor.run(max_products=max_products, resume=args.resume)
         
         if success:
             print("✅ Price monitoring successfully completed!")
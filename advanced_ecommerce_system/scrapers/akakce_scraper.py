@@ -20,8 +20,14 @@ import re
 # Proje dizinini path'e ekle
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.database.models import get_db_session, Product, MarketPrice, PriceAnomaly
+from core.database.models import get_db_session, Product
+from core.database.write_behind import WriteBehindBuffer
+from analysis.anomaly_detection.anomaly_engine import AnomalyEngine
+from analysis.anomaly_detection.streaming_detector import StreamingAnomalyDetector
+from core import event_bus
 from core.sync_networks_api import NetworksAPISyncer
+from core.database.scrape_progress import ScrapeCheckpoint
+from core.database.price_rollup import PriceHistoryRollup
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -30,12 +36,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+AKAKCE_BASE_URL = 'https://www.akakce.com'
+
 class AkakceScraper:
-    def __init__(self):
-        """Akakçe scraper başlatıcısı"""
+    def __init__(self, base_url=AKAKCE_BASE_URL, polite_delay=True):
+        """
+        Akakçe scraper başlatıcısı.
+        base_url: fixture sunucusu gibi farklı bir adres; polite_delay=False:
+        istekler arası bekleme yapılmaz (benchmark/test)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.polite_delay = polite_delay
         self.session = requests.Session()
         self.setup_session()
         self.anomaly_threshold = 10.0  # %10 fark anomali sayılır
+        self.anomaly_engine = AnomalyEngine('akakce', threshold=self.anomaly_threshold)
+        self.flush_size = 25  # Write-behind: kaç üründe bir veritabanına yazılır
+        self.flush_interval = 60.0  # ... ya da en geç kaç saniyede bir (dashboard gecikmesi)
+        # Ani değişim dedektörü: durumu her write-behind flush'ında ilgili ürünler
+        # için veritabanından yeniden okunur (uzun ömürlü kopya tutulmaz)
+        self.streaming_detector = StreamingAnomalyDetector()
         
     def setup_session(self):
         """HTTP session ayarları"""
@@ -52,12 +72,17 @@ class AkakceScraper:
             'Upgrade-Insecure-Requests': '1',
         })
         
+    def _pause(self, low, high):
+        """Siteye saygılı rastgele bekleme (polite_delay kapalıysa beklemez)"""
+        if self.polite_delay:
+            time.sleep(random.uniform(low, high))
+        
     def search_product(self, product_name):
         """Akakçe'de ürün ara"""
         try:
             # URL encode
             search_query = quote_plus(product_name)
-            search_url = f"https://www.akakce.com/arama/?q={search_query}"
+            search_url = f"{self.base_url}/arama/?q={search_query}"
             
             logger.info(f"Akakçe'de aranıyor: {product_name}")
             
@@ -76,7 +101,7 @@ class AkakceScraper:
             for element in product_elements[:3]:  # İlk 3 sonuç
                 link_elem = element.find('a')
                 if link_elem and link_elem.get('href'):
-                    product_url = 'https://www.akakce.com' + link_elem['href']
+                    product_url = self.base_url + link_elem['href']
                     product_title = link_elem.get_text(strip=True)
                     product_links.append({
                         'url': product_url,
@@ -88,7 +113,7 @@ class AkakceScraper:
                 product_elements = soup.find_all('a', href=re.compile(r'/[^/]+\.html'))
                 for element in product_elements[:3]:
                     if element.get('href') and element.get_text(strip=True):
-                        product_url = 'https://www.akakce.com' + element['href']
+                        product_url = self.base_url + element['href']
                         product_title = element.get_text(strip=True)
                         if len(product_title) > 10 and product_name.lower().split()[0] in product_title.lower():
                             product_links.append({
@@ -229,7 +254,7 @@ class AkakceScraper:
         """Ürün için tüm veriyi çek"""
         try:
             # Rastgele gecikme
-            time.sleep(random.uniform(2, 5))
+            self._pause(2, 5)
             
             # Ürün ara
             product_links = self.search_product(product_name)
@@ -248,7 +273,7 @@ class AkakceScraper:
                 all_prices.extend(prices)
                 
                 # Saygılı gecikme
-                time.sleep(random.uniform(1, 3))
+                self._pause(1, 3)
             
             if not all_prices:
                 logger.warning(f"Fiyat bulunamadı: {product_name}")
@@ -275,28 +300,17 @@ class AkakceScraper:
             logger.error(f"Scraping hatası {product_name}: {e}")
             return None
     
-    def save_to_database(self, product_id, scraped_data):
-        """Çekilen veriyi veritabanına kaydet"""
+    def save_to_database(self, product_id, scraped_data, buffer=None):
+        """Çekilen veriyi veritabanına kaydet (buffer verilirse write-behind)"""
         if not scraped_data:
             return False
         
         try:
-            session = get_db_session()
-            
-            # Her fiyat için MarketPrice kaydı oluştur
-            for price_data in scraped_data['prices']:
-                market_price = MarketPrice(
-                    product_id=product_id,
-                    source='akakce',
-                    seller_name=price_data['merchant'],
-                    price=price_data['price'],
-                    currency=price_data.get('currency', 'TRY'),
-                    scraped_at=scraped_data['scraped_at']
-                )
-                session.add(market_price)
-            
-            session.commit()
-            session.close()
+            if buffer is not None:
+                buffer.add_market_prices(product_id, scraped_data)
+            else:
+                with WriteBehindBuffer(detector=self.streaming_detector) as single:
+                    single.add_market_prices(product_id, scraped_data)
             
             logger.info(f"✅ Veritabanına kaydedildi: {scraped_data['product_name']}")
             return True
@@ -305,183 +319,290 @@ class AkakceScraper:
             logger.error(f"Veritabanı kayıt hatası: {e}")
             return False
     
-    def detect_price_anomalies(self, product_id, our_price, market_data):
-        """Fiyat anomalilerini tespit et"""
+    def detect_batch_anomalies(self, items, buffer=None):
+        """
+        Birden çok ürün için anomali tespiti (tek vektörel geçiş).
+        items: (product_id, our_price, market_data) üçlüleri
+        """
+        items = [item for item in items if item[2]]
+        if not items:
+            return {}
+        
+        result = self.anomaly_engine.detect(
+            [product_id for product_id, _, _ in items],
+            [our_price for _, our_price, _ in items],
+            [market_data['avg_price'] for _, _, market_data in items],
+            market_median=[market_data.get('median_price') for _, _, market_data in items]
+        )
+        
+        note = f"Akakçe scraping ile tespit edildi - {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+        anomalies = {}
+        
+        # Ürünün açık anomalisi varsa güncellenir, yoksa yenisi açılır
+        target = buffer if buffer is not None else WriteBehindBuffer()
+        for i, (product_id, our_price, market_data) in enumerate(items):
+            deviation = float(result['deviation_percent'][i])
+            market_avg = market_data['avg_price']
+            
+            logger.info(f"🔍 Anomali kontrolü: Bizim=₺{our_price}, Piyasa=₺{market_avg:.2f}, Fark=%{deviation:.1f}")
+            
+            if not result['is_anomaly'][i]:
+                logger.info(f"ℹ️ Anomali yok: Fark %{abs(deviation):.1f} < threshold %{self.anomaly_threshold}")
+                continue
+            
+            anomaly_type = result['anomaly_type'][i]
+            severity = result['severity'][i]
+            logger.info(f"⚠️ Anomali tespit edildi! Tip: {anomaly_type}, Önem: {severity}")
+            
+            target.upsert_anomaly(
+                product_id, anomaly_type, severity, deviation,
+                our_price=our_price, market_avg_price=market_avg, notes=note
+            )
+            anomalies[product_id] = [{
+                'type': anomaly_type,
+                'severity': severity,
+                'deviation': deviation,
+                'our_price': our_price,
+                'market_avg': market_avg
+            }]
+        
+        if buffer is None:
+            target.flush()
+        
+        return anomalies
+    
+    def detect_price_anomalies(self, product_id, our_price, market_data, buffer=None):
+        """Fiyat anomalilerini tespit et (buffer verilirse write-behind)"""
         if not market_data:
             logger.info("Market data yok, anomali tespiti yapılamıyor")
             return []
         
-        anomalies = []
-        session = get_db_session()
-        
         try:
-            market_avg = market_data['avg_price']
-            
-            # Fiyat farkını hesapla
-            price_diff_percent = ((our_price - market_avg) / market_avg) * 100
-            
-            logger.info(f"🔍 Anomali kontrolü: Bizim=₺{our_price}, Piyasa=₺{market_avg:.2f}, Fark=%{price_diff_percent:.1f}")
-            logger.info(f"🔍 Threshold: %{self.anomaly_threshold}")
-            
-            # Anomali kontrolü
-            if abs(price_diff_percent) > self.anomaly_threshold:
-                
-                # Anomali türünü belirle
-                if price_diff_percent > 0:
-                    anomaly_type = 'price_high'
-                else:
-                    anomaly_type = 'price_low'
-                
-                # Önem derecesi
-                if abs(price_diff_percent) > 25:
-                    severity = 'high'
-                elif abs(price_diff_percent) > 15:
-                    severity = 'medium'
-                else:
-                    severity = 'low'
-                
-                logger.info(f"⚠️ Anomali tespit edildi! Tip: {anomaly_type}, Önem: {severity}")
-                
-                # Mevcut açık anomali var mı kontrol et
-                existing_anomaly = session.query(PriceAnomaly).filter(
-                    PriceAnomaly.product_id == product_id,
-                    PriceAnomaly.is_resolved == False
-                ).first()
-                
-                if existing_anomaly:
-                    # Mevcut anomaliyi güncelle
-                    existing_anomaly.anomaly_type = anomaly_type
-                    existing_anomaly.severity = severity
-                    existing_anomaly.deviation_percent = price_diff_percent
-                    existing_anomaly.detected_at = datetime.now()
-                    existing_anomaly.notes = f"Akakçe scraping ile güncellendi - {datetime.now().strftime("%d.%m.%Y %H:%M")}"
-                    logger.info(f"🔄 Mevcut anomali güncellendi: ID={existing_anomaly.id}")
-                    anomaly = existing_anomaly
-                else:
-                    # Yeni anomali kaydı oluştur
-                    anomaly = PriceAnomaly(
-                        product_id=product_id,
-                        anomaly_type=anomaly_type,
-                        severity=severity,
-                        deviation_percent=price_diff_percent,
-                        detected_at=datetime.now(),
-                        is_resolved=False,
-                        notes=f"Akakçe scraping ile tespit edildi - {datetime.now().strftime("%d.%m.%Y %H:%M")}"
-                    )
-                    session.add(anomaly)
-                    session.flush()  # ID almak için
-                    logger.info(f"✅ Yeni anomali oluşturuldu: ID={anomaly.id}")
-                
-                anomalies.append({
-                    'type': anomaly_type,
-                    'severity': severity,
-                    'deviation': price_diff_percent,
-                    'our_price': our_price,
-                    'market_avg': market_avg
-                })
-            else:
-                logger.info(f"ℹ️ Anomali yok: Fark %{abs(price_diff_percent):.1f} < threshold %{self.anomaly_threshold}")
-            
-            session.commit()
-            logger.info(f"💾 Database commit yapıldı")
-            session.close()
-            
-            return anomalies
+            anomalies = self.detect_batch_anomalies([(product_id, our_price, market_data)], buffer)
+            return anomalies.get(product_id, [])
             
         except Exception as e:
             logger.error(f"Anomali tespit hatası: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            session.rollback()
-            session.close()
             return []
     
-    def scrape_all_products(self):
-        """Networks API ile senkronize edip Akakçe scraping yap"""
-        logger.info("🔄 Networks API ile senkronizasyon başlıyor...")
-        
-        # Önce Networks API'den ürünleri sync et
-        syncer = NetworksAPISyncer()
-        sync_success = syncer.sync_products_to_database()
-        
-        if sync_success:
-            sync_stats = syncer.get_sync_stats()
-            logger.info(f"✅ Networks API sync tamamlandı: {sync_stats}")
-        else:
-            logger.warning("⚠️ Networks API sync başarısız, mevcut verilerle devam ediliyor...")
-        
+    def get_networks_products(self, limit=20, shard_index=0, shard_count=1, after_id=None):
+        """
+        Networks'den gelen aktif ürünleri sade sözlükler olarak getir.
+        shard_index/shard_count: ürün id'sine göre sabit bölme (farklı makineler
+        aynı shard'ı aynı ürünlerle görür); after_id: checkpoint sonrasından devam
+        """
         session = get_db_session()
         
         try:
             # Networks'den gelen aktif ürünleri al (HBCV ile başlayanlar)
-            products = session.query(Product).filter(
+            query = session.query(
+                Product.id, Product.name, Product.brand, Product.our_price
+            ).filter(
                 Product.is_active == True,
                 Product.our_sku.like('HBCV%')  # Sadece Networks ürünleri
-            ).limit(20).all()  # İlk 20 ürün ile test
+            ).order_by(Product.id)
+            
+            if shard_count > 1:
+                query = query.filter(Product.id % shard_count == shard_index)
+            if after_id is not None:
+                query = query.filter(Product.id > after_id)
+            if limit:
+                query = query.limit(limit)
+            
+            return [
+                {'id': row.id, 'name': row.name, 'brand': row.brand, 'our_price': row.our_price}
+                for row in query.all()
+            ]
+        finally:
             session.close()
+    
+    def _flush_pending(self, pending, buffer):
+        """Bekleyen ürünler için toplu anomali tespiti yap ve tamponu boşalt"""
+        anomalies = self.detect_batch_anomalies(
+            [(product['id'], product['our_price'], scraped_data) for product, scraped_data in pending],
+            buffer=buffer
+        )
+        buffer.flush()
+        
+        by_id = {product['id']: product for product, _ in pending}
+        for product_id, product_anomalies in anomalies.items():
+            logger.warning(f"⚠️ {len(product_anomalies)} anomali tespit edildi: {by_id[product_id]['name']}")
+            for anomaly in product_anomalies:
+                logger.warning(
+                    f"   {anomaly['type']} - {anomaly['severity']}: "
+                    f"Bizim: ₺{anomaly['our_price']:.2f}, "
+                    f"Piyasa: ₺{anomaly['market_avg']:.2f}, "
+                    f"Fark: %{anomaly['deviation']:.1f}"
+                )
+        
+        pending.clear()
+        return sum(len(product_anomalies) for product_anomalies in anomalies.values())
+    
+    def scrape_products(self, products, checkpoint=None):
+        """
+        Verilen ürün listesi için Akakçe scraping yap.
+        checkpoint (ScrapeCheckpoint) verilirse ürün durumları tampon her
+        boşaltıldığında kaydedilir. Ürünler ancak fiyatları veritabanına
+        yazıldıktan sonra başarılı sayılır; flush başarısız olursa o gruptaki
+        ürünler başarısız işaretlenir (--resume ile tekrar çekilir)
+        """
+        scraped_count = 0
+        failed_count = 0
+        anomaly_count = 0
+        
+        # Fiyat ve anomali yazımları flush_size ürün (ya da flush_interval saniye)
+        # için tek transaction'da yapılır, anomali tespiti de aynı ürün grubu için
+        # tek vektörel geçişte çalışır
+        buffer = WriteBehindBuffer(flush_size=self.flush_size, flush_interval=self.flush_interval,
+                                   detector=self.streaming_detector)
+        pending = []
+        
+        def flush():
+            # Gruptaki ürünler sadece commit başarılı olursa sayılır/checkpoint'lenir
+            nonlocal scraped_count, failed_count, anomaly_count
+            batch = [product['id'] for product, _ in pending]
+            try:
+                anomaly_count += self._flush_pending(pending, buffer)
+                scraped_count += len(batch)
+                ok = True
+            except Exception as e:
+                logger.error(f"Toplu kayıt hatası ({len(batch)} ürün): {e}")
+                buffer.discard()
+                pending.clear()
+                failed_count += len(batch)
+                ok = False
+            if checkpoint is not None:
+                for product_id in batch:
+                    checkpoint.mark(product_id, ok)
+                checkpoint.flush()
+        
+        def progress(processed, done=False):
+            # Dashboard SSE kanalına ilerleme bildirimi
+            event_bus.publish('scrape_progress', {
+                'source': 'akakce',
+                'processed': processed,
+                'total': len(products),
+                'scraped': scraped_count,
+                'failed': failed_count,
+                'anomalies': anomaly_count,
+                'done': done
+            })
+        
+        for index, product in enumerate(products, 1):
+            try:
+                # Brand ile birlikte arama yap
+                search_term = f"{product['brand']} {product['name']}".strip()
+                logger.info(f"📊 İşleniyor: {search_term}")
+                
+                # Ürün için Akakçe'den veri çek
+                scraped_data = self.scrape_product_data(search_term)
+                
+                saved = bool(scraped_data) and self.save_to_database(product['id'], scraped_data, buffer=buffer)
+                if saved:
+                    pending.append((product, scraped_data))
+                else:
+                    failed_count += 1
+                    if checkpoint is not None:
+                        checkpoint.mark(product['id'], False)
+                
+                if buffer.due(len(pending)):
+                    flush()
+                
+                progress(index)
+                
+                # Saygılı gecikme
+                self._pause(3, 7)
+                
+            except Exception as e:
+                logger.error(f"Ürün işleme hatası {product['name']}: {e}")
+                failed_count += 1
+                if checkpoint is not None:
+                    checkpoint.mark(product['id'], False)
+                continue
+        
+        flush()
+        progress(len(products), done=True)
+        
+        return {
+            'total_products': len(products),
+            'scraped_products': scraped_count,
+            'failed_products': failed_count,
+            'anomalies_detected': anomaly_count
+        }
+    
+    def scrape_all_products(self, resume=None):
+        """
+        Networks API ile senkronize edip Akakçe scraping yap.
+        resume: yarıda kalan çalışmanın job_uuid'si (sync atlanır, biten ürünler tekrar çekilmez)
+        """
+        if resume is None:
+            logger.info("🔄 Networks API ile senkronizasyon başlıyor...")
+            
+            # Önce Networks API'den ürünleri sync et
+            syncer = NetworksAPISyncer()
+            sync_success = syncer.sync_products_to_database()
+            
+            if sync_success:
+                sync_stats = syncer.get_sync_stats()
+                logger.info(f"✅ Networks API sync tamamlandı: {sync_stats}")
+            else:
+                logger.warning("⚠️ Networks API sync başarısız, mevcut verilerle devam ediliyor...")
+        
+        checkpoint = None
+        try:
+            products = self.get_networks_products(limit=20)  # İlk 20 ürün ile test
             
-            logger.info(f"🚀 {len(products)} Networks ürünü için Akakçe scraping başlıyor...")
-            
-            scraped_count = 0
-            anomaly_count = 0
-            
-            for product in products:
-                try:
-                    # Brand ile birlikte arama yap
-                    search_term = f"{product.brand} {product.name}".strip()
-                    logger.info(f"📊 İşleniyor: {search_term}")
-                    
-                    # Ürün için Akakçe'den veri çek
-                    scraped_data = self.scrape_product_data(search_term)
-                    
-                    if scraped_data:
-                        # Veritabanına kaydet
-                        if self.save_to_database(product.id, scraped_data):
-                            scraped_count += 1
-                        
-                        # Anomali tespiti
-                        anomalies = self.detect_price_anomalies(
-                            product.id, 
-                            product.our_price, 
-                            scraped_data
-                        )
-                        
-                        if anomalies:
-                            anomaly_count += len(anomalies)
-                            logger.warning(f"⚠️ {len(anomalies)} anomali tespit edildi: {product.name}")
-                            for anomaly in anomalies:
-                                logger.warning(
-                                    f"   {anomaly['type']} - {anomaly['severity']}: "
-                                    f"Bizim: ₺{anomaly['our_price']:.2f}, "
-                                    f"Piyasa: ₺{anomaly['market_avg']:.2f}, "
-                                    f"Fark: %{anomaly['deviation']:.1f}"
-                                )
-                    
-                    # Saygılı gecikme
-                    time.sleep(random.uniform(3, 7))
-                    
-                except Exception as e:
-                    logger.error(f"Ürün işleme hatası {product.name}: {e}")
-                    continue
+            if resume is None:
+                checkpoint = ScrapeCheckpoint.start('akakce', 'full_scan', len(products))
+            else:
+                checkpoint = ScrapeCheckpoint.resume(resume)
+            remaining = checkpoint.pending(products)
+            
+            logger.info(f"🚀 {len(remaining)}/{len(products)} Networks ürünü için Akakçe scraping başlıyor...")
+            
+            result = self.scrape_products(remaining, checkpoint=checkpoint)
+            checkpoint.finish()
+            
+            # Yeni piyasa fiyatlarını trend analizinin okuduğu günlük geçmişe topla
+            result['history_rows'] = PriceHistoryRollup().run()
+            result.update({'job_uuid': checkpoint.job_uuid, 'skipped_products': len(products) - len(remaining)})
             
             logger.info(f"🎉 Scraping tamamlandı!")
-            logger.info(f"✅ {scraped_count}/{len(products)} ürün işlendi")
-            logger.info(f"⚠️ {anomaly_count} anomali tespit edildi")
+            logger.info(f"✅ {result['scraped_products']}/{result['total_products']} ürün işlendi")
+            logger.info(f"⚠️ {result['anomalies_detected']} anomali tespit edildi")
             
-            return {
-                'total_products': len(products),
-                'scraped_products': scraped_count,
-                'anomalies_detected': anomaly_count
-            }
+            return result
             
         except Exception as e:
             logger.error(f"Toplu scraping hatası: {e}")
+            if checkpoint is not None:
+                checkpoint.finish('failed', str(e))
+                logger.error(f"Devam etmek için: --resume {checkpoint.job_uuid}")
             return None
 
 def main():
-    """Test çalıştırması"""
+    """Test çalıştırması (--all: tüm Networks ürünleri, --resume <job_uuid>: yarıda kalanı sürdür)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Akakçe scraping")
+    parser.add_argument('--all', action='store_true', help="Tüm Networks ürünlerini scrape et")
+    parser.add_argument('--resume', metavar='JOB_UUID', default=None,
+                        help="Yarıda kalan toplu scraping işini sürdür")
+    args = parser.parse_args()
+    
     scraper = AkakceScraper()
     
+    if args.all or args.resume:
+        result = scraper.scrape_all_products(resume=args.resume)
+        if result:
+            print(f"\n🎉 {result['scraped_products']}/{result['total_products']} ürün işlendi "
+                  f"({result['skipped_products']} ürün önceki çalışmada bitmişti, job: {result['job_uuid']})")
+        else:
+            print("❌ Toplu scraping başarısız")
+        return
+    
     # Tek ürün testi
     test_product = "iPhone 15 128GB"
     result = scraper.scrape_product_data(test_product)
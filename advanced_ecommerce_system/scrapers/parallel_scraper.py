@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Çok Process'li Akakçe Scraping
+Ürün listesini process havuzuna böler; her worker kendi HTTP session'ı ve
+veritabanı bağlantısı ile çalışır, koordinatör sonuçları ScrapingJob kaydında toplar
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+# Proje dizinini path'e ekle
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import cache_versions, event_bus
+from core.database.models import get_db_session, reset_db_manager, ScrapingJob
+from core.sync_networks_api import NetworksAPISyncer
+from scrapers.akakce_scraper import AkakceScraper
+
+logger = logging.getLogger(__name__)
+
+# Worker process'e ait scraper (process başına bir kez oluşturulur)
+_worker_scraper = None
+
+
+def _init_worker(database_url):
+    """Worker başlatıcı: ebeveynden gelen DB engine'i yerine kendi bağlantısını kur"""
+    global _worker_scraper
+    reset_db_manager(database_url)
+    _worker_scraper = AkakceScraper()
+
+
+def _scrape_shard(shard_index, products):
+    """Tek bir shard'ı işle ve özet sayıları döndür"""
+    started = time.time()
+    result = _worker_scraper.scrape_products(products)
+    result.update({
+        'shard': shard_index,
+        'pid': os.getpid(),
+        'duration_seconds': round(time.time() - started, 2)
+    })
+    return result
+
+
+def shard_products(products, shard_count):
+    """Ürünleri shard'lara round-robin dağıt (pahalı ürünler tek shard'da toplanmasın)"""
+    shards = [products[i::shard_count] for i in range(shard_count)]
+    return [shard for shard in shards if shard]
+
+
+class ParallelScrapeCoordinator:
+    """Scraping işini process havuzuna dağıtan ve sonuçları toplayan koordinatör"""
+
+    def __init__(self, workers=None, database_url=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.database_url = database_url
+
+    def _update_job(self, job_id, **fields):
+        """ScrapingJob satırını güncelle"""
+        session = get_db_session()
+        try:
+            session.query(ScrapingJob).filter(ScrapingJob.id == job_id).update(fields)
+            session.commit()
+        finally:
+            session.close()
+
+    def _create_job(self, total, shard_count):
+        """Yeni ScrapingJob kaydı oluştur"""
+        session = get_db_session()
+        try:
+            job = ScrapingJob(
+                source='akakce',
+                job_type='full_scan',
+                status='running',
+                products_total=total,
+                start_time=datetime.now(),
+                log_data={'mode': 'multiprocess', 'workers': self.workers,
+                          'shard_count': shard_count, 'shards': []}
+            )
+            session.add(job)
+            session.commit()
+            return job.id, job.job_uuid
+        finally:
+            session.close()
+
+    def run(self, products=None, limit=None, sync=True):
+        """Ürünleri shard'lara bölüp paralel scrape et"""
+        if sync:
+            syncer = NetworksAPISyncer()
+            if not syncer.sync_products_to_database():
+                logger.warning("⚠️ Networks API sync başarısız, mevcut verilerle devam ediliyor...")
+
+        if products is None:
+            products = AkakceScraper().get_networks_products(limit=limit)
+
+        shards = shard_products(products, self.workers)
+        job_id, job_uuid = self._create_job(len(products), len(shards))
+        logger.info(f"🚀 {len(products)} ürün {len(shards)} shard'a bölündü (job: {job_uuid})")
+
+        totals = {'scraped_products': 0, 'failed_products': 0, 'anomalies_detected': 0}
+        shard_logs = []
+        errors = []
+
+        with ProcessPoolExecutor(max_workers=len(shards) or 1,
+                                 initializer=_init_worker,
+                                 initargs=(self.database_url,)) as pool:
+            futures = {
+                pool.submit(_scrape_shard, index, shard): index
+                for index, shard in enumerate(shards)
+            }
+
+            for future in as_completed(futures):
+                shard_index = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Shard {shard_index} hatası: {e}")
+                    errors.append(f"shard {shard_index}: {e}")
+                    result = {'shard': shard_index, 'error': str(e),
+                              'total_products': len(shards[shard_index]),
+                              'scraped_products': 0,
+                              'failed_products': len(shards[shard_index]),
+                              'anomalies_detected': 0}
+
+                for key in totals:
+                    totals[key] += result[key]
+                shard_logs.append(result)
+
+                # Her shard bittiğinde ilerlemeyi job satırına yaz
+                self._update_job(
+                    job_id,
+                    products_scraped=totals['scraped_products'],
+                    products_failed=totals['failed_products'],
+                    log_data={'mode': 'multiprocess', 'workers': self.workers,
+                              'shard_count': len(shards), 'shards': shard_logs,
+                              'anomalies_detected': totals['anomalies_detected']}
+                )
+                event_bus.publish('scrape_progress', {
+                    'source': 'akakce',
+                    'job_uuid': job_uuid,
+                    'processed': sum(log['total_products'] for log in shard_logs),
+                    'total': len(products),
+                    'scraped': totals['scraped_products'],
+                    'failed': totals['failed_products'],
+                    'anomalies': totals['anomalies_detected'],
+                    'done': len(shard_logs) == len(shards)
+                })
+                logger.info(f"✅ Shard {shard_index} tamamlandı: {result.get('scraped_products', 0)}/{result['total_products']}")
+
+        failed = bool(shards) and len(errors) == len(shards)
+        self._update_job(
+            job_id,
+            status='failed' if failed else 'completed',
+            end_time=datetime.now(),
+            error_message='; '.join(errors) or None
+        )
+        # Worker'ların yazdıkları bu process'in önbelleğine de yansısın
+        cache_versions.bump(cache_versions.MARKET_PRICES, cache_versions.ANOMALIES)
+
+        logger.info(f"🎉 Paralel scraping tamamlandı: {totals['scraped_products']}/{len(products)} ürün, "
+                    f"{totals['anomalies_detected']} anomali")
+
+        return {'job_uuid': job_uuid, 'total_products': len(products), **totals}
+
+
+def main():
+    """Komut satırından paralel scraping"""
+    parser = argparse.ArgumentParser(description="Çok process'li Akakçe scraping")
+    parser.add_argument('--workers', type=int, default=None, help="Process sayısı (varsayılan: CPU sayısı)")
+    parser.add_argument('--limit', type=int, default=None, help="En fazla işlenecek ürün")
+    parser.add_argument('--no-sync', action='store_true', help="Networks API sync'ini atla")
+    args = parser.parse_args()
+
+    coordinator = ParallelScrapeCoordinator(workers=args.workers)
+    result = coordinator.run(limit=args.limit, sync=not args.no_sync)
+    print(f"🎉 {result['scraped_products']}/{result['total_products']} ürün işlendi (job: {result['job_uuid']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Test ortak fixture'ları
+Her test için geçici bir SQLite veritabanı hazırlar
+"""
+
+import os
+import sys
+
+import pytest
+
+# Proje dizinini path'e ekle
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database import models
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Geçici veritabanı ile global database manager"""
+    manager = models.reset_db_manager(f"sqlite:///{tmp_path / 'test.db'}")
+    manager.create_tables()
+    yield manager
+    manager.engine.dispose()
+    models._db_manager = None
+
+
+@pytest.fixture
+def session(db):
+    """Test veritabanına bağlı session"""
+    session = db.get_session()
+    yield session
+    session.close()
@@ -0,0 +1,83 @@
+"""
+Trend analizi planı (istenen çıktılar, tembel hesaplama) testleri
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.trend_analysis.analysis_plan import resolve_outputs
+from analysis.trend_analysis.trend_analyzer import TrendAnalyzer
+from core.database.models import TrendAnalysis
+from generate_load_data import LoadDataGenerator
+
+
+def _frame(points):
+    index = pd.date_range('2025-01-01', periods=points, freq='D')
+    prices = 1000 + np.cumsum(np.random.default_rng(1).normal(0, 5, points))
+    return pd.DataFrame({'our_price': prices, 'market_avg_price': prices * 1.02}, index=index)
+
+
+def _count_calls(analyzer, monkeypatch, *methods):
+    calls = {method: 0 for method in methods}
+    for method in methods:
+        original = getattr(analyzer, method)
+
+        def counted(*args, _method=method, _original=original, **kwargs):
+            calls[_method] += 1
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(analyzer, method, counted)
+    return calls
+
+
+def test_resolve_outputs_accepts_aliases():
+    assert resolve_outputs('risk, arima,forecast:arima,ensemble') == ['risk', 'forecast:arima', 'forecast']
+    with pytest.raises(ValueError):
+        resolve_outputs(['lstm', 'bogus'])
+
+
+def test_plan_computes_dependencies_once_and_skips_short_windows(monkeypatch):
+    analyzer = TrendAnalyzer()
+    calls = _count_calls(analyzer, monkeypatch, 'fit_arima_model', 'decompose_time_series', 'assess_price_risk')
+
+    # 20 gün: ARIMA (en az 30 nokta) hiç fit edilmez, ensemble'da tahmin yok
+    short = analyzer.plan(_frame(20))
+    assert short.evaluate(['forecast:arima'])['arima'] == {'error': 'Insufficient data for ARIMA model', 'skipped': True}
+    assert 'error' in short.get('forecast')
+    assert calls['fit_arima_model'] == 0
+
+    plan = analyzer.plan(_frame(40))
+    assert plan.evaluate(['risk']).keys() == {'risk_assessment'}
+    assert calls == {'fit_arima_model': 0, 'decompose_time_series': 0, 'assess_price_risk': 1}
+
+    # Ensemble ARIMA'yı çeker; ardından istenen ARIMA tekrar fit edilmez
+    ensemble = plan.get('forecast')
+    assert len(ensemble['forecast']) == 7
+    assert plan.get('arima')['forecast'] == ensemble['forecast']
+    assert calls['fit_arima_model'] == 1
+
+
+def test_partial_analysis_runs_only_requested_stages(session):
+    LoadDataGenerator(products=1, days=40, sellers=3).write_database()
+
+    results = TrendAnalyzer().comprehensive_analysis(1, days=40, outputs=['risk'])
+    assert 'risk_assessment' in results and 'arima' not in results and 'decomposition' not in results
+    assert set(results['timings']) == {'load', 'risk_assessment', 'total'}
+    assert session.query(TrendAnalysis.analysis_type).scalar() == 'partial'
+
+    from web_dashboard.app import app
+    response = app.test_client().get('/api/product/1/trend-analysis?days=40&outputs=bogus')
+    assert response.status_code == 400
+
+
+def test_ensemble_weights_keyed_by_model_name():
+    # LSTM ön koşulu sağlanmadı: Prophet ağırlığı 'lstm' olarak raporlanmamalı
+    ensemble = TrendAnalyzer().create_ensemble_forecast({
+        'arima': {'forecast': [100.0] * 7, 'rmse': 1.0},
+        'prophet': {'forecast': [110.0] * 7, 'rmse': 3.0},
+    })
+    weights = ensemble['model_weights']
+    assert weights['lstm'] == 0
+    assert weights['arima'] == pytest.approx(0.75)
+    assert weights['prophet'] == pytest.approx(0.25)
+    assert ensemble['forecast'][0] == pytest.approx(102.5)
@@ -0,0 +1,70 @@
+"""
+Vektörel anomali motoru testleri
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from analysis.anomaly_detection.anomaly_engine import AnomalyEngine, detect_catalogue
+from core.database.models import MarketPrice, PriceHistory, Product
+
+
+def test_akakce_rules_match_scalar_thresholds():
+    engine = AnomalyEngine('akakce')
+    result = engine.detect(
+        [1, 2, 3, 4, 5],
+        [105.0, 120.0, 80.0, 130.0, 100.0],
+        [100.0, 100.0, 100.0, 100.0, 0.0],
+    )
+
+    assert result['is_anomaly'].tolist() == [False, True, True, True, False]
+    assert result['anomaly_type'].tolist() == [None, 'price_high', 'price_low', 'price_high', None]
+    assert result['severity'].tolist() == [None, 'medium', 'medium', 'high', None]
+    np.testing.assert_allclose(result['deviation_percent'][:4], [5.0, 20.0, -20.0, 30.0])
+
+
+def test_price_monitor_labels_and_threshold_override():
+    engine = AnomalyEngine('price_monitor', threshold=25.0)
+    result = engine.detect([1, 2], [130.0, 70.0], [100.0, 100.0])
+    assert result['anomaly_type'].tolist() == ['YÜKSEK', 'DÜŞÜK']
+
+    result = engine.detect([1], [120.0], [100.0])
+    assert not result['is_anomaly'][0]
+
+
+def test_robust_rules_use_median_and_own_history():
+    engine = AnomalyEngine('robust')
+    result = engine.detect(
+        [1, 2],
+        [100.0, 100.0],
+        market_avg=[150.0, 100.0],  # Aykırı bir satıcı ortalamayı şişirmiş
+        market_median=[101.0, 100.0],
+        market_mad=[2.0, 2.0],
+        history_mean=[100.0, 80.0],
+        history_std=[1.0, 2.0],
+    )
+    # Median'a göre normal
+    assert not result['is_anomaly'][0]
+    # Piyasaya göre normal, kendi geçmişine göre sıçramış
+    assert result['anomaly_type'][1] == 'sudden_change'
+
+
+def test_detect_catalogue_uses_latest_scrape(session):
+    now = datetime.now()
+    products = [Product(name='A', our_price=100.0), Product(name='B', our_price=100.0)]
+    session.add_all(products)
+    session.flush()
+
+    for product, old_price, new_price in [(products[0], 100.0, 130.0), (products[1], 150.0, 101.0)]:
+        for seller in range(3):
+            session.add(MarketPrice(product_id=product.id, source='akakce', price=old_price,
+                                    scraped_at=now - timedelta(days=1)))
+            session.add(MarketPrice(product_id=product.id, source='akakce', price=new_price,
+                                    scraped_at=now))
+        session.add(PriceHistory(product_id=product.id, our_price=100.0, date=now))
+    session.commit()
+
+    result = detect_catalogue(session, rules='akakce').set_index('product_id')
+    assert result.loc[products[0].id, 'anomaly_type'] == 'price_low'
+    assert not result.loc[products[1].id, 'is_anomaly']
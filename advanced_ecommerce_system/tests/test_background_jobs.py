@@ -0,0 +1,74 @@
+"""
+Arka plan iş havuzu testleri
+"""
+
+import threading
+
+from web_dashboard.background import BackgroundJobs
+
+
+def test_same_key_shares_running_job():
+    jobs = BackgroundJobs('test', max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = jobs.submit(('trend', 1), work, 21)
+    second = jobs.submit(('trend', 1), work, 21)
+    assert first is second
+    assert not jobs.wait(first, 0.05)
+
+    release.set()
+    assert jobs.wait(first, 5)
+    assert BackgroundJobs.describe(jobs.get(first['id'])) == {
+        'job_id': first['id'], 'status': 'done', 'result': 42, 'error': None,
+    }
+    assert calls == [21]
+
+    # Bitmiş iş tekrar çalıştırılabilir
+    third = jobs.submit(('trend', 1), work, 1)
+    assert third is not first
+    jobs.wait(third, 5)
+    jobs.shutdown()
+
+
+def test_failed_job_reports_error():
+    jobs = BackgroundJobs('test', max_workers=1)
+
+    def boom():
+        raise RuntimeError('analiz hatası')
+
+    job = jobs.submit('boom', boom)
+    assert jobs.wait(job, 5)
+    assert job['status'] == 'failed'
+    assert job['error'] == 'analiz hatası'
+    jobs.shutdown()
+
+
+def test_shared_jobs_visible_to_other_workers(db):
+    from web_dashboard.background import find_job
+
+    # Aynı havuzun iki worker process'teki kopyaları
+    worker_a = BackgroundJobs('scrape', max_workers=1, shared=True, shared_dedupe_seconds=60)
+    worker_b = BackgroundJobs('scrape', max_workers=1, shared=True, shared_dedupe_seconds=60)
+    release = threading.Event()
+
+    job = worker_a.submit('akakce_all', lambda: release.wait(5) and {'scraped': 3})
+    # B'deki istek yeni scrape başlatmaz, A'nın işini döndürür
+    elsewhere = worker_b.submit('akakce_all', lambda: {'scraped': 0})
+    assert elsewhere['id'] == job['id']
+    assert BackgroundJobs.describe(find_job(job['id']))['status'] == 'queued'
+
+    release.set()
+    assert worker_a.wait(job, 5)
+    # Yoklama işi başlatmayan worker'a düşse de sonuç okunur
+    assert BackgroundJobs.describe(find_job(job['id'])) == {
+        'job_id': job['id'], 'status': 'done', 'result': {'scraped': 3}, 'error': None,
+    }
+    assert find_job('yok') is None
+    worker_a.shutdown()
+    worker_b.shutdown()
@@ -0,0 +1,67 @@
+"""
+Benchmark altyapısı testleri (fixture sunucusu, ölçüm, sonuç karşılaştırma)
+"""
+
+from benchmarks.fixtures import FixtureServer
+from benchmarks.harness import BenchmarkRunner, compare_results, load_results, save_results
+from core.database.models import Product
+from core.sync_networks_api import NetworksAPISyncer
+from scrapers.akakce_scraper import AkakceScraper
+
+
+def test_fixture_server_feeds_sync_and_scraper(session):
+    with FixtureServer(feed_products=5, sellers=4) as server:
+        syncer = NetworksAPISyncer()
+        syncer.config = server.networks_config
+        assert syncer.sync_products_to_database()
+        assert session.query(Product).filter(Product.our_sku.like('HBCV%')).count() == 5
+
+        scraper = AkakceScraper(base_url=server.url, polite_delay=False)
+        first = scraper.scrape_product_data('Apple Benchmark Ürün 1')
+        second = scraper.scrape_product_data('Apple Benchmark Ürün 1')
+
+    # İlk 2 arama sonucu × 4 satıcı, aynı sayfa her istekte aynı fiyatlar
+    assert first['price_count'] == 8
+    assert [p['price'] for p in first['prices']] == [p['price'] for p in second['prices']]
+    assert all(p['product_url'].startswith(server.url) for p in first['prices'])
+
+
+def test_runner_results_roundtrip_and_comparison(tmp_path):
+    calls = []
+    runner = BenchmarkRunner(only=['group.'], rounds=3, warmup=1)
+    runner.measure('group.fast', lambda: calls.append(1), items=10)
+    assert runner.measure('other.skipped', lambda: calls.append(1)) is None
+    assert len(calls) == 4
+    assert runner.results['group.fast']['rounds'] == 3
+    assert runner.wants_suite('group') and not runner.wants_suite('other')
+
+    path = save_results(runner.document('tiny', {'products': 1}), str(tmp_path))
+    baseline = load_results(path)
+    assert baseline['scale'] == 'tiny' and 'group.fast' in baseline['benchmarks']
+
+    current = {'benchmarks': {'group.fast': {**baseline['benchmarks']['group.fast']}}}
+    current['benchmarks']['group.fast']['median'] = baseline['benchmarks']['group.fast']['median'] * 2
+    [(name, _, _, ratio, status)] = compare_results(baseline, current, threshold=0.1)
+    assert (name, round(ratio, 6), status) == ('group.fast', 2.0, 'regression')
+
+
+def test_flask_suite_waits_for_background_analysis(session, monkeypatch):
+    from types import SimpleNamespace
+
+    from benchmarks import suites
+    from generate_load_data import LoadDataGenerator
+    from web_dashboard import app as dashboard
+
+    LoadDataGenerator(products=1, days=40, sellers=3).write_database()
+    # Analiz hemen 202 dönsün; ölçülen çağrı iş bitene kadar yoklamalı
+    monkeypatch.setattr(dashboard, 'ANALYSIS_WAIT_SECONDS', 0)
+    monkeypatch.setattr(suites, 'FLASK_ROUTES', ['/api/product/{pid}/trend-analysis'])
+    submitted = []
+    submit = dashboard.analysis_jobs.submit
+    monkeypatch.setattr(dashboard.analysis_jobs, 'submit', lambda *args: submitted.append(submit(*args)) or submitted[-1])
+
+    runner = BenchmarkRunner(rounds=1, warmup=0)
+    suites.flask_routes(runner, SimpleNamespace(product_ids=[1]))
+
+    assert 'flask.GET /api/product/{pid}/trend-analysis' in runner.results
+    assert [job['status'] for job in submitted] == ['done']
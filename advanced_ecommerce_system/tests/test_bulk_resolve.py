@@ -0,0 +1,72 @@
+"""
+Toplu anomali çözümleme testleri
+"""
+
+import pytest
+
+from core.database.anomalies import resolve_anomalies
+from core.database.dashboard_stats import read_dashboard_stats
+from core.database.models import PriceAnomaly, Product
+
+
+def _seed(session):
+    # Ürün başına en fazla bir açık anomali: kategori başına 3 ürün (low, low, high)
+    for category in ('Telefon', 'Laptop'):
+        for severity in ('low', 'low', 'high'):
+            product = Product(name=f'{category} {severity}', category=category)
+            session.add(product)
+            session.flush()
+            session.add(PriceAnomaly(product_id=product.id, anomaly_type='price_low',
+                                     severity=severity, is_resolved=False))
+    session.commit()
+
+
+def test_resolve_by_filter_updates_only_matching_rows(session):
+    _seed(session)
+    assert read_dashboard_stats(session)['total_anomalies'] == 6
+
+    assert resolve_anomalies(session, severity='low', category='Telefon', notes='toplu') == 2
+    session.commit()
+
+    resolved = session.query(PriceAnomaly).filter(PriceAnomaly.is_resolved == True).all()
+    assert {(a.product_id, a.severity, a.notes) for a in resolved} == {(1, 'low', 'toplu'), (2, 'low', 'toplu')}
+    assert all(a.resolved_at for a in resolved)
+    assert read_dashboard_stats(session)['total_anomalies'] == 4
+
+
+def test_resolve_by_ids_skips_already_resolved(session):
+    _seed(session)
+    assert resolve_anomalies(session, ids=[1, 2]) == 2
+    assert resolve_anomalies(session, ids=[2, 3]) == 1
+    session.commit()
+
+    with pytest.raises(ValueError):
+        resolve_anomalies(session)
+
+
+def test_duplicate_open_anomalies_are_resolved_and_then_impossible(db, session):
+    from datetime import datetime, timedelta
+    from sqlalchemy.exc import IntegrityError
+    from core.database.anomalies import duplicate_open_anomalies
+    from core.database.models import OPEN_ANOMALY_INDEX
+
+    # Eski (indeks öncesi) veritabanı: ürün başına birden fazla açık anomali
+    OPEN_ANOMALY_INDEX.drop(bind=db.engine)
+    session.add_all([Product(name='A'), Product(name='B')])
+    session.flush()
+    base = datetime(2025, 7, 1)
+    for product_id, days in ((1, 0), (1, 1), (1, 2), (2, 0)):
+        session.add(PriceAnomaly(product_id=product_id, anomaly_type='price_low', is_resolved=False,
+                                 detected_at=base + timedelta(days=days)))
+    session.commit()
+    assert duplicate_open_anomalies(session) == [(1, 'A', 2)]
+
+    db.ensure_indexes()  # Duplicate'lar tek UPDATE ile çözümlenir, indeks oluşur
+    session.expire_all()
+    open_rows = session.query(PriceAnomaly).filter(PriceAnomaly.is_resolved == False).all()
+    assert sorted((a.product_id, a.detected_at.day) for a in open_rows) == [(1, 3), (2, 1)]
+    assert read_dashboard_stats(session)['total_anomalies'] == 2
+
+    session.add(PriceAnomaly(product_id=2, anomaly_type='price_high', is_resolved=False))
+    with pytest.raises(IntegrityError):
+        session.commit()
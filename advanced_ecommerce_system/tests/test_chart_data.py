@@ -0,0 +1,53 @@
+"""
+Grafik verisi (SQL kovalama + LTTB) testleri
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from core.database.chart_data import load_price_series, lttb_indices
+from core.database.models import PriceHistory, Product
+
+
+def _history(session, hours):
+    session.add(Product(name='P', our_price=100.0))
+    session.flush()
+    now = datetime.now()
+    session.add_all([
+        PriceHistory(product_id=1, our_price=100.0 + i % 24, market_avg_price=110.0,
+                     market_min_price=90.0 + i % 5, market_max_price=130.0,
+                     competitor_count=i % 7, date=now - timedelta(hours=hours - i))
+        for i in range(hours)
+    ])
+    session.commit()
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[500] = 50.0
+    keep = lttb_indices(x, y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 500 in keep
+
+
+def test_small_window_returns_raw_rows(session):
+    _history(session, 48)
+    series = load_price_series(session, 1, days=3)
+    assert series['bucket'] == 'raw'
+    assert len(series['dates']) == series['raw_points'] == 48
+
+
+def test_large_window_aggregated_in_sql(session):
+    _history(session, 24 * 20)
+    series = load_price_series(session, 1, days=30, max_points=100)
+    assert series['bucket'] == 'day'
+    assert 20 <= len(series['dates']) <= 22
+    # Günlük kova: min'lerin min'i, max'ların max'ı
+    assert min(series['market_min']) == 90.0
+    assert max(series['market_max']) == 130.0
+
+    series = load_price_series(session, 1, days=30, max_points=10, bucket='hour')
+    assert len(series['dates']) == 10
@@ -0,0 +1,56 @@
+"""
+Dashboard istatistik tablosu testleri
+"""
+
+from datetime import datetime
+
+from core.database.dashboard_stats import read_dashboard_stats, record_price_history, refresh_product_stats
+from core.database.models import DashboardStat, PriceAnomaly, PriceHistory, Product
+from core.database.write_behind import WriteBehindBuffer
+
+
+def test_read_rebuilds_empty_table(session):
+    session.add_all([
+        Product(name='A', our_price=100.0),
+        Product(name='B', our_price=300.0),
+        Product(name='C', our_price=0.0),
+        Product(name='D', our_price=900.0, is_active=False),
+    ])
+    session.flush()
+    session.add(PriceAnomaly(product_id=1, anomaly_type='price_low', is_resolved=False))
+    session.add(PriceHistory(product_id=1, our_price=100.0, date=datetime.now()))
+    session.commit()
+
+    stats = read_dashboard_stats(session)
+    assert stats == {
+        'total_products': 3,
+        'total_anomalies': 1,
+        'today_updates': 1,
+        'price_stats': {'min': 100.0, 'max': 300.0, 'avg': 200.0},
+    }
+    assert session.query(DashboardStat).count() > 0
+
+
+def test_writers_update_counters_incrementally(session):
+    products = [Product(name=f'P{i}', our_price=100.0) for i in range(3)]
+    session.add_all(products)
+    session.commit()
+    read_dashboard_stats(session)
+
+    with WriteBehindBuffer() as buffer:
+        for product in products:
+            buffer.upsert_anomaly(product.id, 'price_high', 'high', 30.0)
+    # Aynı ürünler için tekrar upsert: sayaç değişmemeli
+    with WriteBehindBuffer() as buffer:
+        buffer.upsert_anomaly(products[0].id, 'price_low', 'low', -12.0)
+
+    record_price_history(session, 5)
+    session.add(Product(name='Yeni', our_price=400.0))
+    refresh_product_stats(session)
+    session.commit()
+
+    stats = read_dashboard_stats(session)
+    assert stats['total_anomalies'] == 3
+    assert stats['today_updates'] == 5
+    assert stats['total_products'] == 4
+    assert stats['price_stats']['max'] == 400.0
@@ -0,0 +1,68 @@
+"""
+Olay yolu (SSE) testleri
+"""
+
+from core.database.dashboard_stats import adjust_open_anomalies, read_dashboard_stats
+from core.database.models import PriceAnomaly, Product
+from core.event_bus import EventBus, event_bus
+
+
+def test_publish_subscribe_and_replay():
+    bus = EventBus(history_size=10, queue_size=2)
+    first = bus.publish('stats', {'n': 1})
+    live = bus.subscribe()
+    bus.publish('stats', {'n': 2})
+    assert live.get(timeout=0.1)['data'] == {'n': 2}
+    assert live.get(timeout=0.01) is None
+
+    # Yeniden bağlanan istemci kaçırdığı olayları alır
+    replay = bus.subscribe(last_event_id=first)
+    assert replay.get(timeout=0.1)['data'] == {'n': 2}
+
+    # Kuyruk dolunca abone işaretlenir, yayıncı bloklanmaz
+    for n in range(5):
+        bus.publish('stats', {'n': n})
+    assert live.overflowed
+    bus.unsubscribe(live)
+    assert bus.subscriber_count == 1
+
+
+def test_stats_event_published_on_commit_only(session):
+    session.add(Product(name='A', our_price=100.0))
+    session.flush()
+    session.add(PriceAnomaly(product_id=1, anomaly_type='price_low', is_resolved=False))
+    session.commit()
+    read_dashboard_stats(session)
+
+    subscription = event_bus.subscribe()
+    try:
+        adjust_open_anomalies(session, 2)
+        session.rollback()
+        assert subscription.get(timeout=0.05) is None
+
+        adjust_open_anomalies(session, -1)
+        session.commit()
+        event = subscription.get(timeout=0.1)
+        assert event['type'] == 'stats'
+        assert event['data']['deltas'] == {'total_anomalies': -1}
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+def test_stream_limit_rejects_extra_subscribers(db):
+    bus = EventBus()
+    first = bus.subscribe(limit=1)
+    assert first is not None
+    assert bus.subscribe(limit=1) is None
+    bus.unsubscribe(first)
+    assert bus.subscribe(limit=1) is not None
+
+    from web_dashboard.app import app
+    held = [event_bus.subscribe() for _ in range(app.config['SSE_MAX_STREAMS'])]
+    try:
+        response = app.test_client().get('/api/events')
+        assert response.status_code == 503
+        assert response.get_json()['fallback'] == 'poll'
+    finally:
+        for subscription in held:
+            event_bus.unsubscribe(subscription)
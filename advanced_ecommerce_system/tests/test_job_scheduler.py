@@ -0,0 +1,138 @@
+"""
+ScrapingJob tabanlı iş zamanlayıcısı testleri
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.database.models import ScrapingJob
+from core.job_scheduler import CronSchedule, JobScheduler, LeaseLost
+
+SCHEDULES = {'nightly': {'cron': '0 3 * * *', 'job_type': 'test', 'shards': 2}}
+
+
+def test_cron_next_and_fire_times():
+    cron = CronSchedule('*/15 9-10 * * 1-5')
+    # 2024-06-07 Cuma 10:50 -> Pazartesi 09:00
+    assert cron.next_after(datetime(2024, 6, 7, 10, 50)) == datetime(2024, 6, 10, 9, 0)
+    assert cron.next_after(datetime(2024, 6, 10, 9, 0)) == datetime(2024, 6, 10, 9, 15)
+    daily = CronSchedule('0 3 * * *')
+    assert len(list(daily.fire_times(datetime(2024, 1, 1), datetime(2024, 1, 4, 3, 0)))) == 4
+    with pytest.raises(ValueError):
+        CronSchedule('61 * * * *')
+
+
+def test_enqueue_is_idempotent_and_catches_up_latest_slot(session):
+    now = datetime(2024, 6, 10, 12, 0)
+    first = JobScheduler(SCHEDULES, worker_id='a')
+    second = JobScheduler(SCHEDULES, worker_id='b')
+
+    assert first.enqueue_due(now) == 2  # Kaçırılan 03:00 slotu, 2 shard
+    assert second.enqueue_due(now) == 0
+    # Üç gün çalışmadı: sadece son slot eklenir
+    assert first.enqueue_due(now + timedelta(days=3)) == 2
+    slots = {row.scheduled_for for row in session.query(ScrapingJob.scheduled_for)}
+    assert slots == {datetime(2024, 6, 10, 3, 0), datetime(2024, 6, 13, 3, 0)}
+
+
+def test_workers_claim_distinct_shards_and_reclaim_expired_lease(session):
+    now = datetime.now()
+    worker_a = JobScheduler(SCHEDULES, worker_id='a', lease_seconds=60)
+    worker_b = JobScheduler(SCHEDULES, worker_id='b', lease_seconds=60)
+    worker_a.enqueue_due(now)
+
+    job_a = worker_a.claim(now)
+    job_b = worker_b.claim(now)
+    assert {job_a['shard_index'], job_b['shard_index']} == {0, 1}
+    assert worker_b.claim(now) is None
+
+    # a checkpoint yazdı, sonra öldü: lease dolunca b işi imleçten devralır
+    assert worker_a.checkpoint(job_a['id'], 40, scraped=5, failed=0)
+    later = now + timedelta(seconds=120)
+    taken = worker_b.claim(later)
+    assert taken['id'] == job_a['id'] and taken['last_product_id'] == 40
+    assert taken['attempts'] == 2
+    assert not worker_a.heartbeat(job_a['id'])
+
+
+def test_run_job_checkpoints_and_detects_lost_lease(session):
+    calls = []
+
+    def handler(run):
+        calls.append(run.cursor)
+        run.checkpoint(10, scraped=3)
+        # Başka bir worker işi devraldı
+        session.query(ScrapingJob).filter(ScrapingJob.id == run.job['id']).update({'lease_owner': 'other'})
+        session.commit()
+        run.checkpoint(20, scraped=3)
+
+    scheduler = JobScheduler(SCHEDULES, handlers={'test': handler}, worker_id='a')
+    scheduler.enqueue_due(datetime.now())
+    job = scheduler.claim()
+    assert scheduler.run_job(job) == 'lost'
+    row = session.get(ScrapingJob, job['id'])
+    session.refresh(row)
+    assert row.last_product_id == 10 and row.products_scraped == 3
+    assert calls == [None]
+
+    # Handler hatası: deneme hakkı varken iş tekrar kuyruğa döner
+    def failing(run):
+        raise RuntimeError('ağ hatası')
+
+    scheduler.handlers['test'] = failing
+    job = scheduler.claim()
+    assert scheduler.run_job(job) == 'pending'
+
+
+def test_lost_lease_returns_without_finishing(session, monkeypatch):
+    def handler(run):
+        raise LeaseLost(run.job['job_uuid'])
+
+    scheduler = JobScheduler(SCHEDULES, handlers={'test': handler}, worker_id='a')
+    scheduler.enqueue_due(datetime.now())
+    job = scheduler.claim()
+    finished = []
+    monkeypatch.setattr(scheduler, 'finish', lambda *args, **kwargs: finished.append(args))
+
+    # Yeni sahibin işini bitmiş ya da başarısız işaretlememeli
+    assert scheduler.run_job(job) == 'lost'
+    assert finished == []
+    row = session.get(ScrapingJob, job['id'])
+    assert row.status == 'running' and row.end_time is None
+
+
+def test_price_check_handler_writes_shard_report_and_rolls_up(session, tmp_path, monkeypatch):
+    from core.database.models import MarketPrice, PriceAnomaly, PriceHistory, Product
+    from scrapers.akakce_scraper import AkakceScraper
+
+    products = [Product(name=f"P{i}", brand='B', our_price=100.0, our_sku=f"HBCV{i}") for i in range(4)]
+    session.add_all(products)
+    session.commit()
+
+    def scrape_products(self, batch):
+        for product in batch:
+            session.add(MarketPrice(product_id=product['id'], source='akakce', seller_name='A',
+                                    price=150.0, scraped_at=datetime.now()))
+            session.add(PriceAnomaly(product_id=product['id'], anomaly_type='price_low', severity='high',
+                                     our_price=100.0, market_avg_price=150.0, deviation_percent=-33.3,
+                                     detected_at=datetime.now(), is_resolved=False))
+        session.commit()
+        return {'scraped_products': len(batch), 'failed_products': 0}
+
+    monkeypatch.setattr(AkakceScraper, 'scrape_products', scrape_products)
+    schedules = {'daily_price_check': {'cron': '0 9 * * *', 'job_type': 'price_check', 'shards': 2,
+                                       'chunk_size': 1, 'report_dir': str(tmp_path)}}
+    scheduler = JobScheduler(schedules, worker_id='a')
+    scheduler.enqueue_due(datetime.now())
+    job = scheduler.claim()
+    assert scheduler.run_job(job) == 'completed'
+
+    row = session.get(ScrapingJob, job['id'])
+    session.refresh(row)
+    assert row.products_scraped == 2
+    report = json.loads(open(row.log_data['report'], encoding='utf-8').read())
+    assert len(report) == row.log_data['anomalies'] == 2
+    assert {item['product_id'] % 2 for item in report} == {job['shard_index']}
+    assert row.log_data['rolled_up'] == session.query(PriceHistory).count() == 2
@@ -0,0 +1,56 @@
+"""
+Yük testi veri üreticisi testleri
+"""
+
+import numpy as np
+
+from core import cache_versions
+from core.database.models import MarketPrice, PriceAnomaly, PriceHistory, Product
+from core.database.price_rollup import PriceHistoryRollup
+from generate_load_data import LoadDataGenerator
+
+
+def test_generation_is_seedable():
+    first = next(LoadDataGenerator(products=5, days=4, sellers=3, seed=7, start_date='2024-01-01').generate())
+    second = next(LoadDataGenerator(products=5, days=4, sellers=3, seed=7, start_date='2024-01-01').generate())
+    for left, right in zip(first, second):
+        for column in left:
+            np.testing.assert_array_equal(left[column], right[column])
+    assert len(set(first[0]['uuid'])) == 5
+    assert first[2]['date'][0] == np.datetime64('2024-01-01')
+
+
+def test_anomaly_severity_uses_engine_bands():
+    _, _, _, anomalies = next(LoadDataGenerator(products=50, days=10, sellers=3, anomaly_threshold=5.0).generate())
+    abs_dev = np.abs(anomalies['deviation_percent'])
+    assert (abs_dev > 5.0).all()
+    expected = np.select([abs_dev > 25.0, abs_dev > 15.0], ['high', 'medium'], 'low')
+    np.testing.assert_array_equal(anomalies['severity'], expected)
+
+
+def test_database_load_matches_rollup(session):
+    namespaces = (cache_versions.PRODUCTS, cache_versions.MARKET_PRICES,
+                  cache_versions.PRICE_HISTORY, cache_versions.ANOMALIES)
+    cache_versions.refresh(force=True)
+    before = cache_versions.get_versions(namespaces)
+    counts = LoadDataGenerator(products=6, days=5, sellers=3, chunk_products=4, anomaly_threshold=1.0).write_database()
+    # Yükleme dashboard önbelleğini geçersiz kılar
+    assert all(after > old for after, old in zip(cache_versions.get_versions(namespaces), before))
+    assert counts['market_prices'] == session.query(MarketPrice).count() == 6 * 5 * 3
+    assert counts['price_history'] == session.query(PriceHistory).count() == 6 * 5
+    assert session.query(Product).count() == 6
+
+    # Ürün başına en fazla bir açık anomali
+    open_products = [row.product_id for row in session.query(PriceAnomaly).filter(PriceAnomaly.is_resolved == False)]
+    assert len(open_products) == len(set(open_products)) > 0
+
+    # Üretilen geçmiş, rollup'ın ham fiyatlardan hesapladığı ile aynı
+    generated = {(h.product_id, h.date): (h.market_min_price, h.market_max_price, h.market_median_price)
+                 for h in session.query(PriceHistory)}
+    assert PriceHistoryRollup().run() == 0  # High-water mark yükleme ile ilerletildi
+    PriceHistoryRollup().reset()
+    PriceHistoryRollup().run()
+    session.expire_all()
+    rolled = {(h.product_id, h.date): (h.market_min_price, h.market_max_price, h.market_median_price)
+              for h in session.query(PriceHistory)}
+    assert rolled == generated
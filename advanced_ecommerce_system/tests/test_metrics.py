@@ -0,0 +1,37 @@
+"""
+Dashboard metrik testleri
+"""
+
+import logging
+
+from flask import Flask
+
+from core.database.models import Product
+from web_dashboard.metrics import DashboardMetrics
+
+
+def test_route_latency_and_sql_counts(db, caplog):
+    app = Flask(__name__)
+    metrics = DashboardMetrics(slow_request_ms=0)
+    metrics.init_app(app)
+
+    @app.route('/products')
+    def products():
+        session = db.get_session()
+        try:
+            session.query(Product).count()
+            session.query(Product).all()
+        finally:
+            session.close()
+        return 'ok'
+
+    with caplog.at_level(logging.WARNING, logger='web_dashboard.metrics'):
+        assert app.test_client().get('/products').status_code == 200
+
+    output = metrics.render()
+    assert 'dashboard_request_duration_seconds_count{endpoint="products",method="GET"} 1' in output
+    assert 'dashboard_requests_total{endpoint="products",method="GET",status="200"} 1' in output
+    assert 'dashboard_sql_queries_total{endpoint="products"} 2' in output
+    assert 'dashboard_request_sql_queries_bucket{endpoint="products",le="2"} 1' in output
+    # Yavaş istek logu sorgu listesini içerir
+    assert 'Yavaş istek' in caplog.text and 'SELECT count(*)' in caplog.text
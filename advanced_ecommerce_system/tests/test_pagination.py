@@ -0,0 +1,64 @@
+"""
+Keyset sayfalama testleri
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.database.models import PriceAnomaly, Product
+from core.database.pagination import page_anomalies, page_products
+
+
+def _seed(session):
+    products = [Product(name=f'P{i}', brand='Apple' if i % 2 else 'Samsung',
+                        category='Telefon', our_price=100.0 + i, description='x' * 1000)
+                for i in range(7)]
+    session.add_all(products)
+    session.flush()
+    base = datetime(2024, 1, 1)
+    for i, product in enumerate(products):
+        # Aynı detected_at değerine sahip satırlar imleçte id ile ayrışmalı
+        session.add(PriceAnomaly(product_id=product.id, anomaly_type='price_high',
+                                 severity='high' if i < 3 else 'low',
+                                 deviation_percent=20.0, is_resolved=i == 6,
+                                 detected_at=base + timedelta(hours=i // 2)))
+    session.commit()
+    return products
+
+
+def test_anomaly_pages_cover_all_rows_once(session):
+    _seed(session)
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = page_anomalies(session, limit=3, cursor=cursor)
+        seen.extend(item['id'] for item in items)
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 7
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_anomaly_filters_and_projection(session):
+    _seed(session)
+
+    items, cursor = page_anomalies(session, severity='low', resolved=False, brand='Apple',
+                                   fields='product_name,severity')
+    assert cursor is None
+    assert [set(item) for item in items] == [{'id', 'product_name', 'severity'}] * 2
+    assert all(item['severity'] == 'low' for item in items)
+
+
+def test_product_pages_and_fields(session):
+    _seed(session)
+
+    first, cursor = page_products(session, limit=4, fields='name,our_price')
+    second, last = page_products(session, limit=4, cursor=cursor, fields='name,our_price')
+    assert set(first[0]) == {'id', 'name', 'our_price'}
+    assert [p['id'] for p in first + second] == list(range(1, 8))
+    assert last is None
+
+    with pytest.raises(ValueError):
+        page_products(session, fields='description')
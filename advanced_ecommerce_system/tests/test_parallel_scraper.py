@@ -0,0 +1,85 @@
+"""
+Çok process'li scraping koordinatörü testleri
+(process havuzu yerine thread havuzu, worker yerine sahte shard işlevi)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from core.database import models
+from core.database.models import ScrapingJob
+from scrapers import parallel_scraper
+from scrapers.akakce_scraper import AkakceScraper
+from scrapers.parallel_scraper import ParallelScrapeCoordinator, shard_products
+
+
+PRODUCTS = [{'id': product_id, 'name': f'Ürün {product_id}'} for product_id in range(1, 8)]
+
+
+def test_shard_products_round_robin():
+    shards = shard_products(PRODUCTS, 3)
+    assert [[product['id'] for product in shard] for shard in shards] == [[1, 4, 7], [2, 5], [3, 6]]
+    # Üründen fazla worker: boş shard oluşmaz
+    assert [len(shard) for shard in shard_products(PRODUCTS[:2], 4)] == [1, 1]
+    assert shard_products([], 2) == []
+
+
+def test_init_worker_uses_own_engine(db, tmp_path):
+    url = f"sqlite:///{tmp_path / 'worker.db'}"
+    parallel_scraper._init_worker(url)
+    try:
+        manager = models.get_db_manager()
+        assert manager is not db
+        assert str(manager.engine.url) == url
+        assert isinstance(parallel_scraper._worker_scraper, AkakceScraper)
+    finally:
+        manager.engine.dispose()
+        models._db_manager = db
+        parallel_scraper._worker_scraper = None
+
+
+def test_coordinator_collects_shard_results(db, session, monkeypatch):
+    initialized = []
+
+    def scrape_shard(shard_index, products):
+        if shard_index == 1:
+            raise RuntimeError('worker çöktü')
+        return {'shard': shard_index, 'total_products': len(products),
+                'scraped_products': len(products) - 1, 'failed_products': 1,
+                'anomalies_detected': 1}
+
+    monkeypatch.setattr(parallel_scraper, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(parallel_scraper, '_init_worker', initialized.append)
+    monkeypatch.setattr(parallel_scraper, '_scrape_shard', scrape_shard)
+
+    coordinator = ParallelScrapeCoordinator(workers=3, database_url='sqlite:///worker.db')
+    result = coordinator.run(products=PRODUCTS, sync=False)
+
+    # Shard 0 (3 ürün) ve 2 (2 ürün) başarılı, shard 1 (2 ürün) tamamen başarısız
+    assert result['total_products'] == 7
+    assert result['scraped_products'] == 2 + 1
+    assert result['failed_products'] == 2 + 1 + 1
+    assert result['anomalies_detected'] == 2
+    assert set(initialized) == {'sqlite:///worker.db'}
+
+    job = session.query(ScrapingJob).filter_by(job_uuid=result['job_uuid']).one()
+    assert job.status == 'completed'
+    assert (job.products_total, job.products_scraped, job.products_failed) == (7, 3, 4)
+    assert job.error_message == 'shard 1: worker çöktü'
+    assert sorted(log['shard'] for log in job.log_data['shards']) == [0, 1, 2]
+    assert job.log_data['anomalies_detected'] == 2
+
+
+def test_coordinator_marks_job_failed_when_all_shards_fail(db, session, monkeypatch):
+    def scrape_shard(shard_index, products):
+        raise RuntimeError('bağlantı yok')
+
+    monkeypatch.setattr(parallel_scraper, 'ProcessPoolExecutor', ThreadPoolExecutor)
+    monkeypatch.setattr(parallel_scraper, '_init_worker', lambda database_url: None)
+    monkeypatch.setattr(parallel_scraper, '_scrape_shard', scrape_shard)
+
+    result = ParallelScrapeCoordinator(workers=2).run(products=PRODUCTS, sync=False)
+
+    assert (result['scraped_products'], result['failed_products']) == (0, 7)
+    job = session.query(ScrapingJob).filter_by(job_uuid=result['job_uuid']).one()
+    assert job.status == 'failed'
+    assert job.end_time is not None
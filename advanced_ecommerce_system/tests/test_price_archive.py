@@ -0,0 +1,43 @@
+"""
+Piyasa fiyatı Parquet arşivi testleri
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from core.database.models import MarketPrice, Product
+from core.database.price_archive import MarketPriceArchive, market_price_frame
+
+
+def test_archive_moves_old_rows_and_frame_unions_tiers(session, tmp_path):
+    now = datetime(2025, 8, 1, 12, 0)
+    session.add(Product(id=1, name='Test', brand='X', category='Y', our_price=100.0))
+    for days_ago in (200, 120, 40, 1):
+        for source in ('akakce', 'trendyol'):
+            session.add(MarketPrice(product_id=1, source=source, seller_name=None,
+                                    price=100.0 + days_ago, scraped_at=now - timedelta(days=days_ago)))
+    session.commit()
+
+    archive = MarketPriceArchive(str(tmp_path / 'archive'), batch_size=3)
+    assert archive.archive(older_than_days=90, now=now) == 4
+    assert session.query(MarketPrice).count() == 4
+    assert (tmp_path / 'archive' / 'source=akakce' / 'month=2025-01').is_dir()
+
+    frame = market_price_frame(session, product_ids=[1], source='akakce', archive=archive)
+    assert frame['price'].tolist() == [300.0, 220.0, 140.0, 101.0]
+    assert frame['scraped_at'].is_monotonic_increasing
+
+    recent = market_price_frame(session, start=now - timedelta(days=150), columns=['price'], archive=archive)
+    assert sorted(recent['price']) == [101.0, 101.0, 140.0, 140.0, 220.0, 220.0]
+
+
+def test_relative_archive_dir_resolves_against_project_dir(tmp_path, monkeypatch):
+    from core.database.price_archive import PROJECT_DIR
+
+    monkeypatch.chdir(tmp_path)
+    assert MarketPriceArchive(os.path.join('data', 'archive')).archive_dir == os.path.join(PROJECT_DIR, 'data', 'archive')
+    assert MarketPriceArchive(str(tmp_path / 'a')).archive_dir == str(tmp_path / 'a')
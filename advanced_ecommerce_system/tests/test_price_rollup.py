@@ -0,0 +1,37 @@
+"""
+Fiyat geçmişi rollup testleri
+"""
+
+from datetime import datetime
+
+from core.database.models import MarketPrice, PriceHistory, Product
+from core.database.price_rollup import PriceHistoryRollup
+
+
+def _prices(session, day, prices):
+    for index, price in enumerate(prices):
+        session.add(MarketPrice(product_id=1, source='akakce', seller_name=f'Satıcı {index % 3}',
+                                price=price, scraped_at=day.replace(hour=9 + index)))
+    session.commit()
+
+
+def test_rollup_is_incremental_and_recomputes_touched_days(session):
+    session.add(Product(id=1, name='Test', brand='X', category='Y', our_price=120.0))
+    day = datetime(2025, 7, 30)
+    _prices(session, day, [100.0, 110.0, 130.0])
+
+    rollup = PriceHistoryRollup(batch_size=2)
+    assert rollup.run() == 2  # 2 parti, aynı gün iki kez hesaplanır
+    history = session.query(PriceHistory).one()
+    assert (history.market_min_price, history.market_median_price, history.market_max_price) == (100.0, 110.0, 130.0)
+    assert history.date == day and history.our_price == 120.0 and history.competitor_count == 3
+
+    assert rollup.run() == 0  # Yeni satır yok
+
+    _prices(session, day, [90.0])  # Aynı güne yeni fiyat -> kayıt güncellenir, çoğalmaz
+    assert rollup.run() == 1
+    session.expire_all()
+    history = session.query(PriceHistory).one()
+    assert history.market_min_price == 90.0
+    assert history.market_median_price == 105.0
+    assert history.market_avg_price == 107.5
@@ -0,0 +1,47 @@
+"""
+İstek kapsamlı session ve sayfa sorgusu testleri
+"""
+
+from flask import Flask
+
+from core.database import page_queries
+from core.database.models import MarketPrice, Product
+from web_dashboard import db as request_db
+
+
+def test_one_session_per_request_and_memo(db):
+    app = Flask(__name__)
+    request_db.init_app(app)
+    seen = {}
+
+    @app.route('/')
+    def view():
+        seen['sessions'] = {id(request_db.db_session()) for _ in range(3)}
+        calls = []
+        for _ in range(2):
+            request_db.request_memo('products', lambda: calls.append(1) or page_queries.active_products(request_db.db_session()))
+        seen['loads'] = len(calls)
+        seen['session'] = request_db.db_session()
+        return 'ok'
+
+    assert app.test_client().get('/').status_code == 200
+    assert len(seen['sessions']) == 1
+    assert seen['loads'] == 1
+    # Teardown session'ı kapattı: bağlantı havuza döndü
+    assert db.engine.pool.checkedout() == 0
+
+
+def test_scraping_status_single_query(session):
+    session.add(Product(name='A', our_price=100.0))
+    session.flush()
+    session.add_all([
+        MarketPrice(product_id=1, source='akakce', price=90.0),
+        MarketPrice(product_id=1, source='akakce', price=95.0),
+        MarketPrice(product_id=1, source='networks', price=99.0),
+    ])
+    session.commit()
+
+    status = page_queries.scraping_status(session, 'akakce')
+    assert status['total'] == 2
+    assert status['today'] == 2
+    assert status['last_scraped_at'] is not None
@@ -0,0 +1,73 @@
+"""
+Web dashboard yanıt önbelleği testleri
+"""
+
+from flask import Flask, jsonify
+
+from core import cache_versions
+from web_dashboard.cache import ResponseCache
+
+
+def _app():
+    app = Flask(__name__)
+    cache = ResponseCache(ttls={'stats': 60})
+    calls = []
+
+    @app.route('/stats')
+    @cache.cached(cache_versions.ANOMALIES)
+    def stats():
+        calls.append(1)
+        return jsonify({'calls': len(calls)})
+
+    return app, calls
+
+
+def test_repeated_requests_served_from_cache_with_etag(db):
+    app, calls = _app()
+    client = app.test_client()
+
+    first = client.get('/stats')
+    assert first.status_code == 200
+    # Tarayıcı kopyası her istekte doğrulanır (TTL sadece sunucu tarafında)
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+
+    assert client.get('/stats').get_json() == first.get_json()
+    assert len(calls) == 1
+
+    # Koşullu istek gövdesiz 304 döner
+    not_modified = client.get('/stats', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+
+def test_version_bump_invalidates_entries(db):
+    app, calls = _app()
+    client = app.test_client()
+
+    etag = client.get('/stats').headers['ETag']
+    client.get('/stats?page=2')
+    assert len(calls) == 2
+
+    cache_versions.bump(cache_versions.ANOMALIES)
+    response = client.get('/stats', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_bump_from_another_process_invalidates_after_refresh(session):
+    from core.database.models import DashboardStat
+
+    app, calls = _app()
+    client = app.test_client()
+    client.get('/stats')
+
+    # Başka bir process (scraper, zamanlayıcı) sürümü veritabanında artırdı
+    session.add(DashboardStat(key=cache_versions.KEY_PREFIX + cache_versions.ANOMALIES, value=41.0))
+    session.commit()
+    client.get('/stats')
+    assert len(calls) == 1  # refresh_seconds dolmadan bellekteki kopya kullanılır
+
+    cache_versions.refresh(force=True)
+    client.get('/stats')
+    assert len(calls) == 2
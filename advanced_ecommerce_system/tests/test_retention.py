@@ -0,0 +1,78 @@
+"""
+Saklama yöneticisi testleri
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+from core.database.models import PriceAnomaly, Product
+from core.retention import RetentionManager
+
+
+def _manager(tmp_path, policies, **settings):
+    return RetentionManager(policies, directories=[str(tmp_path)], archive_dir=str(tmp_path / 'archive'),
+                            batch_size=2, pause_seconds=0, **settings)
+
+
+def test_purges_resolved_anomalies_in_batches_with_archive(session, tmp_path):
+    now = datetime(2025, 8, 1)
+    session.add(Product(id=1, name='Test', brand='X', category='Y', our_price=100.0))
+    for days_ago, resolved in ((200, True), (150, True), (120, True), (10, True), (200, False)):
+        session.add(PriceAnomaly(product_id=1, anomaly_type='price_high', severity='low', is_resolved=resolved,
+                                 detected_at=now - timedelta(days=days_ago),
+                                 resolved_at=now - timedelta(days=days_ago) if resolved else None))
+    session.commit()
+
+    policies = {'tables': {'resolved_anomalies': {'keep_days': 90, 'archive': True}}}
+    assert _manager(tmp_path, policies).purge_table('resolved_anomalies', policies['tables']['resolved_anomalies'], now) == 3
+    assert session.query(PriceAnomaly).count() == 2
+
+    archived = list((tmp_path / 'archive').glob('price_anomalies-*.jsonl.gz'))
+    with gzip.open(archived[0], 'rt', encoding='utf-8') as f:
+        assert len([json.loads(line) for line in f]) == 3
+
+
+def test_prunes_dumps_and_rotates_logs(tmp_path):
+    old = (datetime.now() - timedelta(days=60)).timestamp()
+    for index in range(4):
+        path = tmp_path / f'price_anomalies_2025070{index}.json'
+        path.write_text('[]')
+        os.utime(path, (old + index, old + index))
+    (tmp_path / 'app.log').write_bytes(b'x' * 100)
+
+    policies = {
+        'files': {'dumps': {'patterns': ['price_anomalies_*.json'], 'keep_days': 30, 'keep_last': 1}},
+        'logs': {'patterns': ['*.log'], 'max_bytes': 50, 'backup_count': 2},
+    }
+    manager = _manager(tmp_path, policies)
+    assert manager.prune_files(policies['files']['dumps']) == 3
+    assert [path.name for path in tmp_path.glob('price_anomalies_*.json')] == ['price_anomalies_20250703.json']
+
+    assert manager.rotate_logs(policies['logs']) == 1
+    assert (tmp_path / 'app.log').stat().st_size == 0
+    assert gzip.decompress((tmp_path / 'app.log.1.gz').read_bytes()) == b'x' * 100
+
+
+def test_full_vacuum_conversion_only_on_request(tmp_path):
+    import sqlite3
+
+    from core.database import models
+
+    path = tmp_path / 'legacy.db'
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE t (x)')
+    manager = models.reset_db_manager(f"sqlite:///{path}")
+    try:
+        retention = RetentionManager({'vacuum': {'enabled': True, 'pages_per_step': 10}}, pause_seconds=0)
+        assert retention.run()['vacuum_pages'] == 0
+        with manager.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() == 0
+
+        retention.vacuum({'pages_per_step': 10, 'convert': True})
+        with manager.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() == 2
+    finally:
+        manager.engine.dispose()
+        models._db_manager = None
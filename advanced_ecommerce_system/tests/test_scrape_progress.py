@@ -0,0 +1,39 @@
+"""
+Scraping checkpoint testleri
+"""
+
+import pytest
+
+from core.database.models import ScrapeProgress, ScrapingJob
+from core.database.scrape_progress import ScrapeCheckpoint
+
+
+PRODUCTS = [{'id': product_id, 'name': f'Ürün {product_id}'} for product_id in (1, 2, 3, 4)]
+
+
+def test_resume_skips_done_products_and_retries_failed(db, session):
+    checkpoint = ScrapeCheckpoint.start('akakce', 'full_scan', len(PRODUCTS))
+    checkpoint.mark(1, True, {'prices': [100.0]})
+    checkpoint.mark(2, False)
+    checkpoint.flush()
+    checkpoint.mark(3, True)  # flush edilmeden "çöktü"
+
+    resumed = ScrapeCheckpoint.resume(checkpoint.job_uuid)
+    assert [product['id'] for product in resumed.pending(PRODUCTS)] == [2, 3, 4]
+    assert resumed.results() == {'1': {'prices': [100.0]}}
+
+    resumed.mark(2, True)
+    resumed.mark(3, True)
+    resumed.mark(4, True)
+    resumed.finish()
+
+    job = session.query(ScrapingJob).filter_by(job_uuid=checkpoint.job_uuid).one()
+    assert job.status == 'completed'
+    assert (job.products_scraped, job.products_failed) == (4, 0)
+    assert session.query(ScrapeProgress).filter_by(job_id=job.id).count() == 4
+    assert resumed.pending(PRODUCTS) == []
+
+
+def test_resume_unknown_job(db):
+    with pytest.raises(ValueError):
+        ScrapeCheckpoint.resume('yok')
@@ -0,0 +1,46 @@
+"""
+Hızlı JSON serileştirme testleri
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from core import serialization
+from core.serialization import dumps, series_to_columns
+
+
+def _result():
+    index = pd.date_range('2024-01-01', periods=4, freq='D')
+    trend = pd.Series([1.0, np.nan, 3.0, 4.0], index=index)
+    return {
+        'analysis_date': pd.Timestamp('2024-02-01 10:00'),
+        'components': {'trend': series_to_columns(trend)},
+        'strength': np.float64(0.25),
+        'count': np.int64(4),
+        'detected': np.bool_(True),
+        'by_day': {pd.Timestamp('2024-01-01'): 1.5},
+    }
+
+
+EXPECTED = {
+    'analysis_date': '2024-02-01T10:00:00',
+    'components': {'trend': {
+        'dates': ['2024-01-01T00:00:00', '2024-01-02T00:00:00', '2024-01-03T00:00:00', '2024-01-04T00:00:00'],
+        'values': [1.0, None, 3.0, 4.0],
+    }},
+    'strength': 0.25,
+    'count': 4,
+    'detected': True,
+    'by_day': {'2024-01-01T00:00:00': 1.5},
+}
+
+
+def test_numpy_and_pandas_values_encoded_columnar():
+    assert json.loads(dumps(_result())) == EXPECTED
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    monkeypatch.setattr(serialization, 'HAS_ORJSON', False)
+    assert json.loads(dumps(_result())) == EXPECTED
@@ -0,0 +1,54 @@
+"""
+Trend analizi aşama profili testleri
+"""
+
+import pstats
+
+from analysis.trend_analysis.stage_profiler import StageProfiler, aggregate_stage_costs
+from analysis.trend_analysis.trend_analyzer import TrendAnalyzer
+from core.database.models import TrendAnalysis
+from generate_load_data import LoadDataGenerator
+
+
+def test_profiler_records_stages_and_total():
+    profiler = StageProfiler(memory='tracemalloc')
+    with profiler:
+        with profiler.stage('fast'):
+            pass
+        with profiler.stage('alloc'):
+            data = [bytearray(1024) for _ in range(512)]
+    del data
+
+    timings = profiler.timings()
+    assert list(timings) == ['fast', 'alloc', 'total']
+    assert timings['alloc']['peak_kb'] >= 512
+    assert timings['total']['wall_ms'] >= timings['fast']['wall_ms'] + timings['alloc']['wall_ms']
+
+    costs = aggregate_stage_costs([
+        (1, {'arima': {'wall_ms': 90.0, 'cpu_ms': 80.0, 'peak_kb': 10.0}, 'total': {'wall_ms': 100.0, 'cpu_ms': 90.0, 'peak_kb': 10.0}}),
+        (2, {'arima': {'wall_ms': 30.0, 'cpu_ms': 20.0, 'peak_kb': None}, 'total': {'wall_ms': 50.0, 'cpu_ms': 40.0, 'peak_kb': None}}),
+    ])
+    assert list(costs) == ['total', 'arima']
+    assert costs['arima']['products'] == 2
+    assert costs['arima']['wall_ms']['mean'] == 60.0
+    assert costs['arima']['share'] == 0.8
+    assert costs['arima']['peak_kb_max'] == 10.0
+
+
+def test_analysis_timings_are_persisted_and_profiled(session, tmp_path):
+    LoadDataGenerator(products=1, days=40, sellers=3).write_database()
+
+    results = TrendAnalyzer(profile_dir=str(tmp_path)).comprehensive_analysis(1, days=40, profile='cprofile')
+    timings = results['timings']
+    assert {'load', 'decomposition', 'seasonality', 'arima', 'ensemble', 'risk_assessment', 'total'} <= set(timings)
+    assert all(stage['wall_ms'] >= 0 and stage['cpu_ms'] >= 0 for stage in timings.values())
+    assert pstats.Stats(results['profile']['path']).total_calls > 0
+
+    row = session.query(TrendAnalysis).one()
+    assert row.analysis_type == 'comprehensive' and row.analysis_period == 40
+    assert row.timings['arima']['wall_ms'] == timings['arima']['wall_ms']
+
+    from web_dashboard.app import app
+    body = app.test_client().get('/api/trend-analysis/stage-costs?days=1').get_json()
+    assert body['analyses'] == 1
+    assert body['stages']['arima']['runs'] == 1
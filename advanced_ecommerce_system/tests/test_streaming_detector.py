@@ -0,0 +1,158 @@
+"""
+Akış anomali dedektörü testleri
+"""
+
+import random
+import statistics
+from datetime import datetime
+
+from analysis.anomaly_detection.streaming_detector import P2Quantile, StreamingAnomalyDetector
+from core.database.models import AnomalyDetectorState, PriceAnomaly, Product
+from core.database.write_behind import WriteBehindBuffer
+
+
+def test_p2_median_close_to_exact():
+    rng = random.Random(7)
+    values = [rng.gauss(1000, 50) for _ in range(2000)]
+    sketch = P2Quantile(0.5)
+    for value in values:
+        sketch.add(value)
+    assert abs(sketch.value() - statistics.median(values)) < 10
+
+
+def test_sudden_change_flagged_after_warmup():
+    detector = StreamingAnomalyDetector(warmup=5)
+    rng = random.Random(1)
+
+    # Isınma süresince işaretlenmez
+    for _ in range(4):
+        detector.observe(1, 'market', 100.0)
+    assert detector.observe(1, 'market', 200.0) is None
+    for _ in range(60):
+        assert detector.observe(1, 'market', 100.0 + rng.uniform(-2, 2)) is None
+
+    flag = detector.observe(1, 'market', 140.0)
+    assert flag['anomaly_type'] == 'sudden_change'
+    assert flag['severity'] == 'high'
+    assert flag['deviation_percent'] > 35
+
+
+def test_jump_after_flat_series_flagged():
+    detector = StreamingAnomalyDetector()
+    for _ in range(12):
+        assert detector.observe(1, 'market', 100.0) is None
+
+    # Varyans 0: std tabanı (ortalamanın %1'i) ile z = 50
+    flag = detector.observe(1, 'market', 150.0)
+    assert flag['anomaly_type'] == 'sudden_change'
+    assert flag['z_score'] == 50.0
+    # Tabandan küçük oynamalar ani değişim sayılmaz
+    assert detector.observe(2, 'market', 100.0) is None
+    for _ in range(12):
+        detector.observe(2, 'market', 100.0)
+    assert detector.observe(2, 'market', 103.0) is None
+
+
+def test_state_round_trip_and_buffer_integration(session):
+    product = Product(name='P', our_price=100.0)
+    session.add(product)
+    session.commit()
+
+    detector = StreamingAnomalyDetector(warmup=3)
+    with WriteBehindBuffer(detector=detector) as buffer:
+        for price in (100.0, 101.0, 99.0, 100.5, 100.0):
+            buffer.add_market_prices(product.id, {
+                'scraped_at': datetime.now(), 'prices': [{'merchant': 'A', 'price': price}]
+            })
+
+    state = session.query(AnomalyDetectorState).one()
+    assert (state.series, state.count) == ('market', 5)
+
+    # Yeni process: durum flush'ta tablodan yüklenir, geçmiş yeniden okunmaz
+    restored = StreamingAnomalyDetector(warmup=3)
+    with WriteBehindBuffer(detector=restored) as buffer:
+        buffer.add_market_prices(product.id, {
+            'scraped_at': datetime.now(), 'prices': [{'merchant': 'A', 'price': 150.0}]
+        })
+
+    session.expire_all()
+    anomaly = session.query(PriceAnomaly).one()
+    assert anomaly.anomaly_type == 'sudden_change'
+    assert session.query(AnomalyDetectorState).one().count == 6
+
+
+def test_one_median_observation_per_product_scrape():
+    detector = StreamingAnomalyDetector(warmup=3)
+    scraped_at = datetime.now()
+    for _ in range(5):
+        # Satıcılar arası %50 fark ani değişim sayılmaz
+        rows = [{'product_id': 1, 'price': price, 'scraped_at': scraped_at} for price in (100.0, 150.0, 102.0)]
+        assert detector.observe_market_prices(rows) == []
+
+    stats = detector._stats[(1, 'market')]
+    assert stats.count == 5
+    assert stats.ewma_mean == 102.0
+
+
+def test_unsaved_state_kept_when_commit_fails(session):
+    detector = StreamingAnomalyDetector()
+    detector.observe(1, 'market', 100.0)
+
+    assert detector.save_state(session) == 1
+    session.rollback()
+    assert detector._dirty == {(1, 'market')}
+
+    detector.save_state(session)
+    session.commit()
+    detector.state_saved()
+    assert not detector.has_pending_state()
+    assert session.query(AnomalyDetectorState).count() == 1
+
+
+def _scrape(price):
+    return {'scraped_at': datetime.now(), 'prices': [{'merchant': 'A', 'price': price}]}
+
+
+def test_concurrent_writers_do_not_overwrite_each_other(session):
+    product = Product(name='P', our_price=100.0)
+    session.add(product)
+    session.commit()
+
+    # İki yazıcı (örn. dashboard thread'i ve zamanlayıcı) kendi dedektörüyle
+    first, second = StreamingAnomalyDetector(), StreamingAnomalyDetector()
+    for detector, prices in ((first, (100.0, 101.0)), (second, (99.0,)), (first, (100.0,))):
+        with WriteBehindBuffer(detector=detector) as buffer:
+            for price in prices:
+                buffer.add_market_prices(product.id, _scrape(price))
+
+    session.expire_all()
+    assert session.query(AnomalyDetectorState).one().count == 4
+
+
+def test_failed_flush_does_not_count_observations_twice(session, monkeypatch):
+    product = Product(name='P', our_price=100.0)
+    session.add(product)
+    session.commit()
+
+    detector = StreamingAnomalyDetector()
+    buffer = WriteBehindBuffer(detector=detector)
+    buffer.add_market_prices(product.id, _scrape(100.0))
+
+    def broken_save(session):
+        raise RuntimeError('disk I/O error')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(detector, 'save_state', broken_save)
+        try:
+            buffer.flush()
+        except RuntimeError:
+            pass
+    assert not detector.has_pending_state()
+
+    # Terk edilen tampon durumu değiştirmez; tekrar denenen tek gözlem bir kez sayılır
+    buffer.flush()
+    buffer.add_market_prices(product.id, _scrape(101.0))
+    buffer.discard()
+    buffer.flush()
+    session.expire_all()
+    assert session.query(AnomalyDetectorState).one().count == 1
@@ -0,0 +1,127 @@
+"""
+Write-behind tamponu testleri
+"""
+
+from datetime import datetime
+
+from core.database.models import MarketPrice, PriceAnomaly, Product
+from core.database.write_behind import WriteBehindBuffer
+
+
+def _scraped(price):
+    return {
+        'product_name': 'test',
+        'scraped_at': datetime.now(),
+        'prices': [{'merchant': 'A', 'price': price}, {'merchant': 'B', 'price': price + 10}],
+    }
+
+
+def _add_products(session, count):
+    products = [Product(name=f"P{i}", our_price=100.0) for i in range(count)]
+    session.add_all(products)
+    session.commit()
+    return [p.id for p in products]
+
+
+def test_flush_writes_buffered_rows_in_one_batch(session):
+    product_ids = _add_products(session, 3)
+
+    buffer = WriteBehindBuffer(flush_size=10)
+    for product_id in product_ids:
+        buffer.add_market_prices(product_id, _scraped(120.0))
+        buffer.upsert_anomaly(product_id, 'price_low', 'medium', -16.7)
+
+    # Eşik aşılmadı, henüz yazılmamalı
+    assert not buffer.due(len(product_ids))
+    assert session.query(MarketPrice).count() == 0
+
+    assert buffer.flush() == {'market_prices': 6, 'anomalies': 3}
+    assert session.query(MarketPrice).count() == 6
+    assert session.query(PriceAnomaly).filter(PriceAnomaly.is_resolved == False).count() == 3
+
+
+def test_upsert_updates_existing_open_anomaly(session):
+    product_id, other_id = _add_products(session, 2)
+    session.add(PriceAnomaly(product_id=product_id, anomaly_type='price_low',
+                             severity='low', deviation_percent=-11.0, is_resolved=False))
+    session.add(PriceAnomaly(product_id=other_id, anomaly_type='price_low',
+                             severity='low', deviation_percent=-11.0, is_resolved=True))
+    session.commit()
+
+    with WriteBehindBuffer() as buffer:
+        buffer.upsert_anomaly(product_id, 'price_high', 'high', 30.0)
+        buffer.upsert_anomaly(other_id, 'price_high', 'medium', 20.0)
+
+    session.expire_all()
+    open_rows = session.query(PriceAnomaly).filter(PriceAnomaly.product_id == product_id).all()
+    assert len(open_rows) == 1
+    assert (open_rows[0].anomaly_type, open_rows[0].severity) == ('price_high', 'high')
+
+    # Çözümlenmiş anomaliye dokunulmaz, yeni açık anomali eklenir
+    other_rows = session.query(PriceAnomaly).filter(PriceAnomaly.product_id == other_id).all()
+    assert sorted(row.is_resolved for row in other_rows) == [False, True]
+
+
+def test_due_by_size_or_interval(session):
+    assert WriteBehindBuffer(flush_size=2).due(2)
+    assert not WriteBehindBuffer(flush_size=2).due(1)
+    assert not WriteBehindBuffer(flush_size=2, flush_interval=0).due(0)
+
+    # Süre dolunca eşik altındaki ürünler de yazılır
+    buffer = WriteBehindBuffer(flush_size=10, flush_interval=0)
+    assert buffer.due(1)
+    buffer.flush()
+    buffer.flush_interval = 60
+    assert not buffer.due(1)
+
+
+def test_failed_flush_keeps_buffered_rows(session, monkeypatch):
+    from core.database import write_behind
+
+    product_id, = _add_products(session, 1)
+    buffer = WriteBehindBuffer()
+    buffer.add_market_prices(product_id, _scraped(120.0))
+
+    def broken_insert(table):
+        raise RuntimeError('disk I/O error')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(write_behind, 'insert', broken_insert)
+        try:
+            buffer.flush()
+        except RuntimeError:
+            pass
+    assert len(buffer) == 2
+
+    # Tekrar denemede satırlar kaybolmadan yazılır
+    assert buffer.flush() == {'market_prices': 2, 'anomalies': 0}
+    assert session.query(MarketPrice).count() == 2
+
+
+def test_scraper_counts_products_only_after_flush(session, monkeypatch):
+    from core.database import write_behind
+    from scrapers.akakce_scraper import AkakceScraper
+
+    product_ids = _add_products(session, 3)
+    scraper = AkakceScraper(polite_delay=False)
+    scraper.flush_size = 2
+    monkeypatch.setattr(scraper, 'scrape_product_data',
+                        lambda term: {**_scraped(120.0), 'avg_price': 125.0, 'median_price': 125.0})
+
+    calls = []
+    original_insert = write_behind.insert
+
+    def flaky_insert(table):
+        # İlk grup (2 ürün) yazılamaz, son grup yazılır
+        calls.append(table)
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+        return original_insert(table)
+
+    monkeypatch.setattr(write_behind, 'insert', flaky_insert)
+    products = [{'id': pid, 'name': f'P{pid}', 'brand': '', 'our_price': 100.0} for pid in product_ids]
+    summary = scraper.scrape_products(products)
+
+    assert summary['scraped_products'] == 1
+    assert summary['failed_products'] == 2
+    assert session.query(MarketPrice.product_id).distinct().all() == [(product_ids[2],)]
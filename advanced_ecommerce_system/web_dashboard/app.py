@@ -3,23 +3,34 @@ E-Ticaret Fiyat Analiz Sistemi - Flask Web Dashboard
 Modern, responsive web arayüzü ile fiyat takibi ve analiz
 """
 
-from flask import Flask, render_template, jsonify, request, flash, redirect, url_for
+from flask import Flask, Response, render_template, jsonify, request, flash, redirect, url_for
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-import plotly.graph_objs as go
-import plotly.utils
-import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import os
 import sys
+import threading
+import time
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.database.models import get_db_session, Product, PriceHistory, MarketPrice, PriceAnomaly
+from core.database.models import Product, PriceAnomaly
+from core.database.anomalies import resolve_anomalies
+from core.database.dashboard_stats import adjust_open_anomalies, read_dashboard_stats
+from core.database.chart_data import DEFAULT_MAX_POINTS, load_price_series
+from core.database.pagination import page_anomalies, page_products
+from core.database import page_queries
+from core import cache_versions
+from core.event_bus import event_bus
+from core.serialization import dumps
+from web_dashboard.background import BackgroundJobs, analysis_jobs, find_job, scrape_jobs
+from web_dashboard.cache import response_cache
+from web_dashboard.db import db_session, init_app as init_db_session, request_memo
+from web_dashboard.metrics import DashboardMetrics, response_cache_metrics
 from analysis.trend_analysis.trend_analyzer import TrendAnalyzer
+from analysis.trend_analysis.stage_profiler import PROFILERS, aggregate_stage_costs
+from analysis.trend_analysis.analysis_plan import resolve_outputs
 from scrapers.akakce_scraper import AkakceScraper
 from core.sync_networks_api import NetworksAPISyncer
 
@@ -27,149 +38,138 @@ from core.sync_networks_api import NetworksAPISyncer
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'
 CORS(app)
+init_db_session(app)
+
+# Yavaş istek logu opsiyonel: DASHBOARD_SLOW_REQUEST_MS=500 gibi bir eşikle açılır
+app.config['SLOW_REQUEST_MS'] = (
+    float(os.environ['DASHBOARD_SLOW_REQUEST_MS']) if os.environ.get('DASHBOARD_SLOW_REQUEST_MS') else None
+)
+# Trend analizi profil dökümü (?profile=cprofile|pyinstrument) opsiyonel:
+# DASHBOARD_TREND_PROFILING=1 ile açılır, dosyalar data/profiles altına yazılır
+app.config['TREND_PROFILING'] = os.environ.get('DASHBOARD_TREND_PROFILING', '').lower() in ('1', 'true', 'yes')
+metrics = DashboardMetrics()
+metrics.init_app(app)
+metrics.add_collector(response_cache_metrics(response_cache))
+metrics.add_collector(lambda: [
+    '# HELP dashboard_sse_subscribers Açık SSE bağlantısı sayısı',
+    '# TYPE dashboard_sse_subscribers gauge',
+    f'dashboard_sse_subscribers {event_bus.subscriber_count}',
+])
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global objects
-trend_analyzer = TrendAnalyzer()
-akakce_scraper = AkakceScraper()
+# SSE bağlantısında olay yoksa gönderilen heartbeat aralığı (saniye)
+SSE_HEARTBEAT_SECONDS = 15
+
+# Her SSE bağlantısı bir sunucu thread'i tutar. Açık akış sayısı thread sayısının
+# çok altında sınırlanır (varsayılan: DASHBOARD_THREADS / 4); sınır doluysa 503
+# döner ve tarayıcı yoklamaya (polling) geçer. Akışlar SSE_MAX_STREAM_SECONDS
+# sonra kapatılır; tarayıcı Last-Event-ID ile yeniden bağlanır, kopmuş
+# bağlantıların tuttuğu thread'ler de en geç bu sürede serbest kalır.
+app.config['SSE_MAX_STREAMS'] = int(os.environ.get(
+    'DASHBOARD_SSE_MAX_STREAMS', max(1, int(os.environ.get('DASHBOARD_THREADS', 16)) // 4)
+))
+SSE_MAX_STREAM_SECONDS = 300
+
+# Trend analizi isteği bu kadar saniyede bitmezse 202 + iş numarası döner
+ANALYSIS_WAIT_SECONDS = 20
+
+# Thread başına nesneler: TrendAnalyzer sonuç/model sözlükleri ve AkakceScraper'ın
+# requests.Session'ı eşzamanlı isteklerde paylaşılamaz
+_thread_resources = threading.local()
+
+def get_trend_analyzer():
+    """Çalışan thread'e ait TrendAnalyzer"""
+    analyzer = getattr(_thread_resources, 'trend_analyzer', None)
+    if analyzer is None:
+        analyzer = _thread_resources.trend_analyzer = TrendAnalyzer()
+    return analyzer
+
+def get_akakce_scraper():
+    """Çalışan thread'e ait AkakceScraper (kendi HTTP session'ı ile)"""
+    scraper = getattr(_thread_resources, 'akakce_scraper', None)
+    if scraper is None:
+        scraper = _thread_resources.akakce_scraper = AkakceScraper()
+    return scraper
 
 # Helper functions
 def get_all_products():
-    """Tüm aktif ürünleri getir"""
-    session = get_db_session()
-    products = session.query(Product).filter(Product.is_active == True).all()
-    session.close()
-    return products
+    """Tüm aktif ürünleri getir (liste alanları; description gibi büyük kolonlar yüklenmez)"""
+    return request_memo('active_products', lambda: page_queries.active_products(db_session()))
 
-def get_product_price_history(product_id, days=30):
-    """Ürün fiyat geçmişini getir"""
-    session = get_db_session()
-    
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    history = session.query(PriceHistory).filter(
-        PriceHistory.product_id == product_id,
-        PriceHistory.date >= start_date
-    ).order_by(PriceHistory.date).all()
+def parse_resolved(value):
+    """'active'/'resolved'/'true'/'false' filtresini bool'a çevir (boş: tümü)"""
+    if value in ('resolved', 'true', '1'):
+        return True
+    if value in ('active', 'false', '0'):
+        return False
+    return None
+
+def anomaly_filters():
+    """İstek parametrelerinden anomali filtreleri"""
+    return {
+        'severity': request.args.get('severity') or None,
+        'resolved': parse_resolved(request.args.get('status', '')),
+        'anomaly_type': request.args.get('type') or None,
+        'category': request.args.get('category') or None,
+        'brand': request.args.get('brand') or None,
+        'days': request.args.get('days', type=int),
+    }
+
+def json_response(data, status=200):
+    """Analiz sonuçları gibi büyük/NumPy içerikli yanıtlar için hızlı JSON"""
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+def job_response(job):
+    """Bitmemiş arka plan işi için 202 + durum adresi"""
+    status_url = url_for('api_job_status', job_id=job['id'])
+    body = {**BackgroundJobs.describe(job), 'status_url': status_url}
+    response = json_response(body, 202)
+    response.headers['Location'] = status_url
+    return response
+
+def paginated_response(items, next_cursor):
+    """Liste gövdeli yanıt; sonraki sayfa X-Next-Cursor ve Link başlıklarında"""
+    for item in items:
+        for key, value in item.items():
+            if isinstance(value, datetime):
+                item[key] = value.isoformat()
     
-    session.close()
-    return history
+    response = jsonify(items)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, _external=False, **request.view_args, **args)}>; rel="next"'
+    return response
+
+def get_product_price_history(product_id, days=30):
+    """Ürün fiyat geçmişini getir (aynı istekte tekrar istenirse sorgu tekrarlanmaz)"""
+    return request_memo(
+        ('price_history', product_id, days),
+        lambda: page_queries.product_price_history(db_session(), product_id, days)
+    )
 
 def get_recent_anomalies(limit=10):
     """Son anomalileri getir"""
-    session = get_db_session()
-    
-    anomalies = session.query(
-        PriceAnomaly,
-        Product.name.label('product_name')
-    ).join(Product, PriceAnomaly.product_id == Product.id).filter(
-        PriceAnomaly.is_resolved == False
-    ).order_by(PriceAnomaly.detected_at.desc()).limit(limit).all()
-    
-    session.close()
-    return anomalies
-
-def create_price_chart(product_id, days=30):
-    """Fiyat grafiği oluştur"""
-    history = get_product_price_history(product_id, days)
-    
-    if not history:
-        return json.dumps({})
-    
-    dates = [h.date for h in history]
-    our_prices = [h.our_price for h in history]
-    market_avg_prices = [h.market_avg_price for h in history]
-    market_min_prices = [h.market_min_price for h in history]
-    market_max_prices = [h.market_max_price for h in history]
-    
-    # Create Plotly chart
-    fig = go.Figure()
-    
-    # Our price line
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=our_prices,
-        name='Bizim Fiyat',
-        line=dict(color='#2E86AB', width=3),
-        mode='lines+markers'
-    ))
-    
-    # Market average
-    fig.add_trace(go.Scatter(
-        x=dates,
-        y=market_avg_prices,
-        name='Piyasa Ortalaması',
-        line=dict(color='#A23B72', width=2),
-        mode='lines'
-    ))
-    
-    # Market range (fill between min and max)
-    fig.add_trace(go.Scatter(
-        x=dates + dates[::-1],
-        y=market_max_prices + market_min_prices[::-1],
-        fill='toself',
-        fillcolor='rgba(162, 59, 114, 0.2)',
-        line=dict(color='rgba(255,255,255,0)'),
-        name='Piyasa Aralığı'
-    ))
-    
-    # Layout
-    fig.update_layout(
-        title='Fiyat Trendi',
-        xaxis_title='Tarih',
-        yaxis_title='Fiyat (₺)',
-        hovermode='x unified',
-        template='plotly_white',
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0)
+    return request_memo(
+        ('recent_anomalies', limit),
+        lambda: page_queries.recent_open_anomalies(db_session(), limit)
     )
-    
-    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
 
 # Routes
 @app.route('/')
 def dashboard():
     """Ana dashboard sayfası"""
     try:
-        logger.info("Dashboard function started")
-        
-        # Get basic stats
-        session = get_db_session()
-        logger.info("Database session obtained")
-        
-        total_products = session.query(Product).filter(Product.is_active == True).count()
-        logger.info(f"Total products: {total_products}")
-        
-        total_anomalies = session.query(PriceAnomaly).filter(PriceAnomaly.is_resolved == False).count()
-        logger.info(f"Total anomalies: {total_anomalies}")
+        # Sayaçlar (dashboard_stats), son güncellemeler, ürün listesi ve son
+        # anomaliler isteğin tek session'ında okunur
+        page = page_queries.dashboard_page(db_session())
+        logger.info(f"Dashboard: {page['total_products']} ürün, {page['total_anomalies']} açık anomali")
         
-        # Recent activity
-        recent_updates = session.query(PriceHistory).order_by(PriceHistory.date.desc()).limit(5).all()
-        logger.info(f"Recent updates count: {len(recent_updates)}")
-        
-        session.close()
-        logger.info("Database session closed")
-        
-        # Get products for dropdown
-        products = get_all_products()
-        logger.info(f"Products for dropdown: {len(products)}")
-        
-        # Get recent anomalies
-        anomalies = get_recent_anomalies(5)
-        logger.info(f"Recent anomalies count: {len(anomalies)}")
-        
-        logger.info("About to render template")
-        # Use debug template to isolate the issue
-        return render_template('dashboard.html',
-                             total_products=total_products,
-                             total_anomalies=total_anomalies,
-                             products=products,
-                             recent_updates=recent_updates,
-                             anomalies=anomalies)
+        return render_template('dashboard.html', **page)
     
     except Exception as e:
         import traceback
@@ -181,31 +181,22 @@ def dashboard():
 def product_detail(product_id):
     """Ürün detay sayfası"""
     try:
-        session = get_db_session()
-        product = session.query(Product).get(product_id)
-        session.close()
+        session = db_session()
+        product = session.get(Product, product_id)
         
         if not product:
             flash('Ürün bulunamadı!', 'error')
             return redirect(url_for('dashboard'))
         
-        # Get price history
+        # Get price history (grafik verisi istemci tarafından /chart API'sinden alınır)
         history = get_product_price_history(product_id, 30)
         
-        # Create chart
-        chart_json = create_price_chart(product_id, 30)
-        
         # Get anomalies for this product
-        session = get_db_session()
-        anomalies = session.query(PriceAnomaly).filter(
-            PriceAnomaly.product_id == product_id
-        ).order_by(PriceAnomaly.detected_at.desc()).limit(10).all()
-        session.close()
+        anomalies = page_queries.product_anomalies(session, product_id, 10)
         
         return render_template('product_detail.html',
                              product=product,
                              history=history,
-                             chart_json=chart_json,
                              anomalies=anomalies)
     
     except Exception as e:
@@ -228,19 +219,21 @@ def analytics():
 def anomalies():
     """Anomali sayfası"""
     try:
-        # Get all anomalies
-        session = get_db_session()
+        filters = anomaly_filters()
         
-        anomalies = session.query(
-            PriceAnomaly,
-            Product.name.label('product_name')
-        ).join(Product, PriceAnomaly.product_id == Product.id).order_by(
-            PriceAnomaly.detected_at.desc()
-        ).limit(50).all()
+        anomalies, next_cursor = page_anomalies(
+            db_session(),
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            **filters
+        )
         
-        session.close()
+        next_url = None
+        if next_cursor:
+            next_url = url_for('anomalies', **{**request.args.to_dict(), 'cursor': next_cursor})
         
-        return render_template('anomalies.html', anomalies=anomalies)
+        return render_template('anomalies.html', anomalies=anomalies,
+                             next_url=next_url, args=request.args)
     
     except Exception as e:
         logger.error(f"Anomalies error: {e}")
@@ -248,114 +241,128 @@ def anomalies():
 
 # API Routes
 @app.route('/api/products')
+@response_cache.cached(cache_versions.PRODUCTS)
 def api_products():
-    """Ürün listesi API"""
+    """Ürün listesi API (keyset sayfalama: ?limit=&cursor=&category=&brand=&fields=)"""
     try:
-        products = get_all_products()
-        return jsonify([{
-            'id': p.id,
-            'name': p.name,
-            'brand': p.brand,
-            'category': p.category,
-            'our_price': p.our_price,
-            'our_stock': p.our_stock
-        } for p in products])
+        items, next_cursor = page_products(
+            db_session(),
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            category=request.args.get('category') or None,
+            brand=request.args.get('brand') or None,
+            fields=request.args.get('fields')
+        )
+        
+        return paginated_response(items, next_cursor)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/anomalies')
+@response_cache.cached(cache_versions.ANOMALIES, cache_versions.PRODUCTS)
+def api_anomalies():
+    """Anomali listesi API (?status=&severity=&type=&category=&brand=&days=&limit=&cursor=&fields=)"""
+    try:
+        items, next_cursor = page_anomalies(
+            db_session(),
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            fields=request.args.get('fields'),
+            **anomaly_filters()
+        )
+        
+        return paginated_response(items, next_cursor)
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/product/<int:product_id>/chart')
+@response_cache.cached(cache_versions.PRICE_HISTORY)
 def api_product_chart(product_id):
-    """Ürün fiyat grafiği API"""
+    """
+    Ürün fiyat grafiği API (?days=30&points=300&bucket=raw|hour|day)
+    Sadece veri dizilerini kolon bazlı döndürür; Plotly figürü istemcide kurulur.
+    """
     try:
         days = request.args.get('days', 30, type=int)
-        chart_json = create_price_chart(product_id, days)
-        return chart_json
+        max_points = min(request.args.get('points', DEFAULT_MAX_POINTS, type=int), 5000)
+        bucket = request.args.get('bucket')
+        if bucket not in (None, 'raw', 'hour', 'day'):
+            return jsonify({'error': f'Geçersiz bucket: {bucket}'}), 400
+        
+        series = load_price_series(db_session(), product_id, days, max_points, bucket)
+        
+        return jsonify(series)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/product/<int:product_id>/trend-analysis')
 def api_trend_analysis(product_id):
-    """Trend analizi API"""
+    """Trend analizi API (?outputs=risk,forecast:arima: sadece istenen çıktılar hesaplanır)"""
     try:
         days = request.args.get('days', 90, type=int)
+        try:
+            outputs = resolve_outputs(request.args['outputs']) if request.args.get('outputs') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        profile = request.args.get('profile') or None
+        if profile is not None:
+            if not app.config['TREND_PROFILING']:
+                return jsonify({'error': 'Profiling disabled (DASHBOARD_TREND_PROFILING=1)'}), 403
+            if profile not in PROFILERS:
+                return jsonify({'error': f"profile must be one of: {', '.join(PROFILERS)}"}), 400
+        
+        # Analiz sınırlı analiz havuzunda çalışır; aynı ürün/gün için eşzamanlı
+        # istekler tek işi paylaşır, uzun sürerse istemci /api/jobs/<id> yoklar
+        job = analysis_jobs.submit(
+            ('trend', product_id, days, tuple(outputs) if outputs else None, profile),
+            lambda: get_trend_analyzer().comprehensive_analysis(product_id, days, outputs=outputs, profile=profile)
+        )
+        if not analysis_jobs.wait(job, ANALYSIS_WAIT_SECONDS):
+            return job_response(job)
+        if job['status'] == 'failed':
+            return jsonify({'error': job['error']}), 500
         
-        # Run comprehensive analysis
-        results = trend_analyzer.comprehensive_analysis(product_id, days)
-        
-        # Convert any Timestamp objects to strings for JSON serialization
-        def convert_timestamps(obj):
-            if isinstance(obj, dict):
-                # Handle both keys and values that might be Timestamps
-                new_dict = {}
-                for k, v in obj.items():
-                    # Convert key if it's a Timestamp
-                    if hasattr(k, 'isoformat'):
-                        new_key = k.isoformat()
-                    else:
-                        new_key = k
-                    # Convert value recursively
-                    new_dict[new_key] = convert_timestamps(v)
-                return new_dict
-            elif isinstance(obj, list):
-                return [convert_timestamps(item) for item in obj]
-            elif hasattr(obj, 'isoformat'):  # datetime/Timestamp objects
-                return obj.isoformat()
-            elif hasattr(obj, 'item'):  # numpy scalars
-                return obj.item()
-            elif isinstance(obj, (np.integer, np.floating)):  # numpy types
-                return obj.item()
-            else:
-                return obj
-        
-        # Clean results for JSON serialization
-        clean_results = convert_timestamps(results)
-        
-        return jsonify(clean_results)
+        # NumPy dizileri ve tarih indeksleri olduğu gibi orjson ile kodlanır
+        return json_response(job['result'])
     
     except Exception as e:
         logger.error(f"Trend analysis API error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/trend-analysis/stage-costs')
+def api_trend_stage_costs():
+    """Son analizlerde aşama başına maliyet (ARIMA/LSTM/Prophet/decomposition hangisi baskın)"""
+    try:
+        days = request.args.get('days', 7, type=int)
+        limit = min(request.args.get('limit', 1000, type=int), 10000)
+        rows = page_queries.trend_stage_timings(db_session(), days, limit)
+        
+        return jsonify({
+            'days': days,
+            'analyses': len(rows),
+            'stages': aggregate_stage_costs(rows)
+        })
+    
+    except Exception as e:
+        logger.error(f"Stage costs API error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/dashboard-stats')
+@response_cache.cached(cache_versions.PRODUCTS, cache_versions.ANOMALIES, cache_versions.PRICE_HISTORY)
 def api_dashboard_stats():
     """Dashboard istatistikleri API"""
     try:
-        session = get_db_session()
-        
-        # Basic counts
-        total_products = session.query(Product).filter(Product.is_active == True).count()
-        total_anomalies = session.query(PriceAnomaly).filter(PriceAnomaly.is_resolved == False).count()
-        
-        # Today's activity
-        today = datetime.now().date()
-        today_updates = session.query(PriceHistory).filter(
-            PriceHistory.date >= today
-        ).count()
-        
-        # Price distribution
-        avg_our_price = session.query(Product.our_price).filter(
-            Product.is_active == True,
-            Product.our_price > 0
-        ).all()
-        
-        session.close()
-        
-        # Calculate price stats
-        prices = [p[0] for p in avg_our_price if p[0]]
-        price_stats = {
-            'min': min(prices) if prices else 0,
-            'max': max(prices) if prices else 0,
-            'avg': sum(prices) / len(prices) if prices else 0
-        }
+        # Sayaçlar yazma anında güncellenir, burada tek sorgu ile okunur
+        stats = read_dashboard_stats(db_session())
         
-        return jsonify({
-            'total_products': total_products,
-            'total_anomalies': total_anomalies,
-            'today_updates': today_updates,
-            'price_stats': price_stats
-        })
+        return jsonify(stats)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -364,31 +371,67 @@ def api_dashboard_stats():
 def api_resolve_anomaly(anomaly_id):
     """Anomali çözümleme API"""
     try:
-        session = get_db_session()
+        session = db_session()
         
-        anomaly = session.query(PriceAnomaly).get(anomaly_id)
+        anomaly = session.get(PriceAnomaly, anomaly_id)
         if not anomaly:
             return jsonify({'error': 'Anomaly not found'}), 404
         
+        if not anomaly.is_resolved:
+            adjust_open_anomalies(session, -1)
+        
         anomaly.is_resolved = True
         anomaly.resolved_at = datetime.now()
         anomaly.notes = request.json.get('notes', '')
         
         session.commit()
-        session.close()
+        cache_versions.bump(cache_versions.ANOMALIES)
+        event_bus.publish('anomalies_resolved', {'ids': [anomaly_id], 'count': 1})
         
         return jsonify({'success': True})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/anomalies/resolve', methods=['POST'])
+def api_bulk_resolve_anomalies():
+    """
+    Toplu anomali çözümleme API (tek UPDATE, tek transaction)
+    Gövde: {"ids": [1, 2, ...]} veya {"filter": {"severity": "low", "category": "..."}}, opsiyonel "notes"
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        criteria = payload.get('filter') or {}
+        filters = {
+            'severity': criteria.get('severity'),
+            'anomaly_type': criteria.get('type'),
+            'category': criteria.get('category'),
+            'brand': criteria.get('brand'),
+            'days': criteria.get('days'),
+            'product_id': criteria.get('product_id'),
+        }
+        
+        session = db_session()
+        resolved = resolve_anomalies(session, ids=payload.get('ids'),
+                                     notes=payload.get('notes'), **filters)
+        session.commit()
+        
+        cache_versions.bump(cache_versions.ANOMALIES)
+        event_bus.publish('anomalies_resolved', {'ids': payload.get('ids'), 'count': resolved})
+        logger.info(f"Toplu çözümleme: {resolved} anomali")
+        return jsonify({'success': True, 'resolved': resolved})
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Bulk resolve error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/scraping/akakce/single/<int:product_id>', methods=['POST'])
 def api_scrape_single_product(product_id):
     """Tek ürün için Akakçe scraping"""
     try:
-        session = get_db_session()
-        product = session.query(Product).get(product_id)
-        session.close()
+        product = db_session().get(Product, product_id)
         
         if not product:
             return jsonify({'error': 'Product not found'}), 404
@@ -396,6 +439,7 @@ def api_scrape_single_product(product_id):
         logger.info(f"Tek ürün scraping başlatıldı: {product.name}")
         
         # Akakçe'den veri çek
+        akakce_scraper = get_akakce_scraper()
         scraped_data = akakce_scraper.scrape_product_data(product.name)
         
         if not scraped_data:
@@ -438,66 +482,106 @@ def api_scrape_single_product(product_id):
         logger.error(f"Single scraping error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def run_scrape_all():
+    """Toplu scraping işi (scrape havuzunda çalışır, ilerleme SSE ile yayınlanır)"""
+    result = get_akakce_scraper().scrape_all_products()
+    
+    if not result:
+        return {
+            'success': False,
+            'message': 'Scraping başarısız'
+        }
+    
+    return {
+        'success': True,
+        'message': f'{result["scraped_products"]}/{result["total_products"]} ürün işlendi',
+        'data': result
+    }
+
 @app.route('/api/scraping/akakce/all', methods=['POST'])
 def api_scrape_all_products():
-    """Tüm ürünler için Akakçe scraping"""
+    """Tüm ürünler için Akakçe scraping (arka planda; sürüyorsa mevcut iş döner)"""
     try:
         logger.info("Toplu Akakçe scraping başlatıldı")
-        
-        # Arka planda çalışsın diye thread kullanmadan basit çözüm
-        result = akakce_scraper.scrape_all_products()
-        
-        if not result:
-            return jsonify({
-                'success': False,
-                'message': 'Scraping başarısız'
-            })
-        
-        return jsonify({
-            'success': True,
-            'message': f'{result["scraped_products"]}/{result["total_products"]} ürün işlendi',
-            'data': result
-        })
+        job = scrape_jobs.submit('akakce_all', run_scrape_all)
+        return job_response(job)
     
     except Exception as e:
         logger.error(f"Bulk scraping error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Arka plan işinin durumu; bittiyse sonucu da döner"""
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    body = BackgroundJobs.describe(job)
+    if job['status'] in ('queued', 'running'):
+        return json_response({**body, 'status_url': url_for('api_job_status', job_id=job_id)}, 202)
+    return json_response(body, 500 if job['status'] == 'failed' else 200)
+
 @app.route('/api/scraping/status')
+@response_cache.cached(cache_versions.MARKET_PRICES)
 def api_scraping_status():
     """Scraping durumu API"""
     try:
-        session = get_db_session()
-        
-        # Son scraping zamanları
-        latest_scraping = session.query(MarketPrice).filter(
-            MarketPrice.source == 'akakce'
-        ).order_by(MarketPrice.scraped_at.desc()).first()
-        
-        # Toplam Akakçe verileri
-        total_akakce_data = session.query(MarketPrice).filter(
-            MarketPrice.source == 'akakce'
-        ).count()
-        
-        # Bugünkü scraping sayısı
-        today = datetime.now().date()
-        today_scraping = session.query(MarketPrice).filter(
-            MarketPrice.source == 'akakce',
-            MarketPrice.scraped_at >= today
-        ).count()
-        
-        session.close()
+        # Toplam, bugünkü kayıt sayısı ve son scraping zamanı tek sorguda
+        status = page_queries.scraping_status(db_session(), 'akakce')
         
         return jsonify({
-            'total_akakce_data': total_akakce_data,
-            'today_scraping': today_scraping,
-            'last_scraping': latest_scraping.scraped_at.isoformat() if latest_scraping else None,
+            'total_akakce_data': status['total'],
+            'today_scraping': status['today'],
+            'last_scraping': status['last_scraped_at'].isoformat() if status['last_scraped_at'] else None,
             'scraper_active': True
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/events')
+def api_events():
+    """
+    Server-Sent Events kanalı: 'stats' (sayaç değişimleri), 'anomalies',
+    'anomalies_resolved' ve 'scrape_progress' olayları yazıldıkları anda iletilir
+    """
+    # Tarayıcı yeniden bağlanırken Last-Event-ID başlığını gönderir
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('lastEventId', type=int)
+    subscription = event_bus.subscribe(last_event_id, limit=app.config['SSE_MAX_STREAMS'])
+    if subscription is None:
+        return jsonify({'error': 'Too many event streams', 'fallback': 'poll'}), 503, {'Retry-After': '60'}
+    
+    def stream():
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        try:
+            yield 'retry: 5000\n\n'
+            while time.monotonic() < deadline:
+                event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    # Kaçırılan olaylar var: istemci API'den tam durumu yeniden okur
+                    subscription.overflowed = False
+                    yield 'event: resync\ndata: {}\n\n'
+                if event is None:
+                    yield ': ping\n\n'  # Proxy zaman aşımlarına karşı
+                    continue
+                data = dumps(event['data']).decode('utf-8')
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metrikleri (route gecikmeleri, SQL sayı/süre, önbellek isabetleri)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Error handlers
 @app.route('/api/sync-networks', methods=['POST'])
 def sync_networks_api():
@@ -549,7 +633,7 @@ def not_found(error):
 def internal_error(error):
     return render_template('error.html', error="Sunucu hatası"), 500
 
-# Development server
+# Development server (production için: gunicorn -c gunicorn.conf.py web_dashboard.wsgi:application)
 if __name__ == '__main__':
     # Initialize database if needed
     try:
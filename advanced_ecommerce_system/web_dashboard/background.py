@@ -0,0 +1,213 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Arka Plan İşleri
+Uzun süren dashboard işlerini (trend analizi, toplu scraping) istek
+thread'lerinden ayrı, sınırlı boyutlu thread havuzlarında çalıştırır.
+
+Dashboard birden fazla gunicorn worker'ı ile çalışır; paylaşılan havuzların
+iş durumları background_jobs tablosuna da yazılır, böylece /api/jobs/<id>
+yoklaması işi başlatmayan bir worker'a düşse de cevaplanır.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'keep_seconds': 24 * 3600,  # Biten işlerin veritabanı kayıtları bu kadar saklanır
+}
+
+
+class BackgroundJobs:
+    """
+    Anahtar bazlı tekilleştirilen iş kuyruğu.
+
+    Aynı anahtarla (örn. ('trend', ürün, gün)) çalışan bir iş varsa yeni iş
+    açılmaz, mevcut iş döndürülür. Biten işler `keep_finished` adede kadar
+    sonuçlarıyla saklanır ve /api/jobs/<id> üzerinden okunabilir.
+
+    shared=True: durum background_jobs tablosuna yazılır (diğer worker'lar
+    `find_job` ile okur). shared_dedupe_seconds verilirse aynı anahtarlı iş
+    başka bir worker'da sürüyorsa (bu kadar saniyeden yeni kayıt) yeni iş
+    açılmaz, o işin kaydı döndürülür; worker çökerse kayıt bu süre sonunda
+    yok sayılır.
+    """
+
+    def __init__(self, name, max_workers=2, keep_finished=100, shared=False, shared_dedupe_seconds=None):
+        self.name = name
+        self.keep_finished = keep_finished
+        self.shared = shared
+        self.shared_dedupe_seconds = shared_dedupe_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-job')
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job_id -> iş bilgisi
+        self._running = {}  # anahtar -> job_id
+
+    def submit(self, key, func, *args, **kwargs):
+        """İşi kuyruğa ekle; aynı anahtarlı iş sürüyorsa onu döndür"""
+        with self._lock:
+            job_id = self._running.get(key)
+            if job_id is not None:
+                return self._jobs[job_id]
+            if self.shared and self.shared_dedupe_seconds is not None:
+                stored = self._running_elsewhere(key)
+                if stored is not None:
+                    return stored
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'key': key,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'result': None,
+                'error': None,
+            }
+            self._jobs[job['id']] = job
+            self._running[key] = job['id']
+            if self.shared:
+                self._store(job)
+            job['future'] = self._executor.submit(self._run, job, func, args, kwargs)
+            self._trim()
+            return job
+
+    def _run(self, job, func, args, kwargs):
+        job['status'] = 'running'
+        try:
+            job['result'] = func(*args, **kwargs)
+            job['status'] = 'done'
+        except Exception as e:
+            logger.error(f"Arka plan işi hatası ({self.name}, {job['key']}): {e}")
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished_at'] = time.time()
+            if self.shared:
+                self._store(job)
+            with self._lock:
+                self._running.pop(job['key'], None)
+        return job['result']
+
+    def _store(self, job):
+        """İş durumunu background_jobs tablosuna yaz (hata işi etkilemez)"""
+        from core.database.models import BackgroundJob, get_db_session
+        from core.serialization import dumps
+
+        finished = job['status'] in ('done', 'failed')
+        session = get_db_session()
+        try:
+            session.merge(BackgroundJob(
+                id=job['id'],
+                pool=self.name,
+                job_key=repr(job['key']),
+                status=job['status'],
+                result=dumps(job['result']).decode('utf-8') if job['status'] == 'done' else None,
+                error=job['error'],
+                submitted_at=datetime.fromtimestamp(job['submitted_at']),
+                finished_at=datetime.fromtimestamp(job['finished_at']) if finished else None,
+            ))
+            if finished:
+                cutoff = datetime.now() - timedelta(seconds=DEFAULT_SETTINGS['keep_seconds'])
+                session.query(BackgroundJob).filter(BackgroundJob.finished_at < cutoff).delete()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Arka plan işi durumu kaydedilemedi ({self.name}, {job['id']}): {e}")
+        finally:
+            session.close()
+
+    def _running_elsewhere(self, key):
+        """Aynı anahtarla başka worker'da süren işin kaydı (yoksa None)"""
+        from core.database.models import BackgroundJob, get_db_session
+
+        cutoff = datetime.now() - timedelta(seconds=self.shared_dedupe_seconds)
+        session = get_db_session()
+        try:
+            row = session.query(BackgroundJob).filter(
+                BackgroundJob.pool == self.name,
+                BackgroundJob.job_key == repr(key),
+                BackgroundJob.status.in_(('queued', 'running')),
+                BackgroundJob.submitted_at >= cutoff
+            ).order_by(BackgroundJob.submitted_at.desc()).first()
+            return stored_job(row) if row is not None else None
+        except Exception as e:
+            logger.warning(f"Arka plan işi kayıtları okunamadı ({self.name}): {e}")
+            return None
+        finally:
+            session.close()
+
+    def _trim(self):
+        """En eski biten işleri unut (kilit altında çağrılır)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def wait(self, job, timeout):
+        """İşin bitmesini en fazla `timeout` saniye bekle; bittiyse True"""
+        try:
+            job['future'].result(timeout=timeout)
+        except FutureTimeout:
+            return False
+        except Exception:
+            pass
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @staticmethod
+    def describe(job):
+        """İşin JSON'a uygun özeti"""
+        return {
+            'job_id': job['id'],
+            'status': job['status'],
+            'result': job['result'] if job['status'] == 'done' else None,
+            'error': job['error'],
+        }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+
+def stored_job(row):
+    """background_jobs satırından iş bilgisi (başka worker'ın işi)"""
+    return {
+        'id': row.id,
+        'key': row.job_key,
+        'status': row.status,
+        'result': json.loads(row.result) if row.result else None,
+        'error': row.error,
+    }
+
+
+# Trend analizi CPU yoğun: worker başına aynı anda en fazla 2 analiz, istek thread'leri serbest kalır
+analysis_jobs = BackgroundJobs('analysis', max_workers=2, shared=True)
+
+# Toplu scraping tüm worker'larda tek seferde bir kez çalışır (Akakçe nezaket beklemeleri)
+scrape_jobs = BackgroundJobs('scrape', max_workers=1, shared=True, shared_dedupe_seconds=6 * 3600)
+
+
+def find_job(job_id):
+    """İşi bu worker'ın havuzlarında, yoksa background_jobs tablosunda ara"""
+    for jobs in (analysis_jobs, scrape_jobs):
+        job = jobs.get(job_id)
+        if job is not None:
+            return job
+
+    from core.database.models import BackgroundJob, get_db_session
+
+    session = get_db_session()
+    try:
+        row = session.get(BackgroundJob, job_id)
+        return stored_job(row) if row is not None else None
+    except Exception as e:
+        logger.warning(f"Arka plan işi kaydı okunamadı ({job_id}): {e}")
+        return None
+    finally:
+        session.close()
@@ -0,0 +1,137 @@
+"""
+Flask JSON API'leri için sunucu taraflı yanıt önbelleği
+Endpoint başına TTL, yazıcıların artırdığı sürüm anahtarları ve
+ETag / 304 koşullu yanıtlar
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from flask import make_response, request
+
+from core.cache_versions import get_versions
+
+# Endpoint başına önbellek süresi (saniye)
+CACHE_TTLS = {
+    'api_products': 300,
+    'api_anomalies': 30,
+    'api_product_chart': 300,
+    'api_dashboard_stats': 60,
+    'api_scraping_status': 30,
+}
+DEFAULT_TTL = 60
+
+# Önbellek kaydından yeniden üretilen / kaydedilmeyen başlıklar
+_SKIP_HEADERS = {'content-length', 'content-type', 'etag', 'cache-control'}
+
+
+class ResponseCache:
+    """
+    Başarılı GET yanıtlarını bellekte tutar.
+
+    Anahtar: endpoint + URL argümanları + sorgu parametreleri + bağımlı veri
+    alanlarının sürümleri. Bir yazıcı sürümü artırdığında eski kayıtlar bir daha
+    eşleşmez ve LRU ile düşer.
+    """
+
+    def __init__(self, ttls=None, max_entries=512):
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.view_stats = Counter()  # (endpoint, 'hit' | 'miss' | 'not_modified') -> adet
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _count(self, view_name, outcome):
+        with self._lock:
+            self.view_stats[(view_name, outcome)] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires'] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _conditional(entry):
+        """
+        Önbellek kaydından (gerekirse 304) yanıt üret. TTL sadece sunucu
+        tarafındadır: tarayıcı her istekte ETag ile doğrular, böylece sürüm
+        anahtarı değişince (örn. scrape sonrası) eski yanıtı kullanmaz
+        """
+        if entry['etag'] in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(entry['body'], 200)
+            response.mimetype = entry['mimetype']
+            response.headers.extend(entry['headers'])
+        response.set_etag(entry['etag'])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def cached(self, *namespaces):
+        """
+        Endpoint dekoratörü. `namespaces` yanıtın bağlı olduğu veri alanlarıdır
+        (core.cache_versions sabitleri).
+        """
+        def decorator(view):
+            ttl = self.ttls.get(view.__name__, DEFAULT_TTL)
+
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (
+                    view.__name__,
+                    tuple(sorted(kwargs.items())),
+                    tuple(sorted(request.args.items(multi=True))),
+                    get_versions(namespaces),
+                )
+                entry = self._get(key)
+                if entry is not None:
+                    self.hits += 1
+                    self._count(view.__name__, 'not_modified' if entry['etag'] in request.if_none_match else 'hit')
+                    return self._conditional(entry)
+
+                self.misses += 1
+                self._count(view.__name__, 'miss')
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+                body = response.get_data()
+                entry = {
+                    'body': body,
+                    'etag': hashlib.sha1(body).hexdigest(),
+                    'mimetype': response.mimetype,
+                    'headers': [(name, value) for name, value in response.headers
+                                if name.lower() not in _SKIP_HEADERS],
+                    'expires': time.monotonic() + ttl,
+                }
+                self._put(key, entry)
+                return self._conditional(entry)
+
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,44 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - İstek Kapsamlı Veritabanı Session'ı
+Her HTTP isteği tek bir session (unit of work) kullanır; session flask.g
+üzerinde tutulur ve app context kapanırken kapatılır
+"""
+
+from flask import g
+
+from core.database.models import get_db_session
+
+
+def db_session():
+    """İsteğe ait session (ilk çağrıda açılır)"""
+    session = g.get('db_session')
+    if session is None:
+        session = g.db_session = get_db_session()
+    return session
+
+
+def request_memo(key, loader):
+    """
+    Aynı istek içinde tekrarlanan okumaları paylaş (örn. aynı ürünün fiyat
+    geçmişi hem sayfa hem özet için istenirse tek sorgu çalışır)
+    """
+    memo = g.setdefault('db_memo', {})
+    if key not in memo:
+        memo[key] = loader()
+    return memo[key]
+
+
+def close_db_session(exception=None):
+    """Teardown: hata varsa commit edilmemiş değişiklikleri geri al, session'ı kapat"""
+    session = g.pop('db_session', None)
+    g.pop('db_memo', None)
+    if session is None:
+        return
+    if exception is not None:
+        session.rollback()
+    session.close()
+
+
+def init_app(app):
+    """Flask uygulamasına teardown kaydı"""
+    app.teardown_appcontext(close_db_session)
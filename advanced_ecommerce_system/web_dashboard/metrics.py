@@ -0,0 +1,241 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Dashboard Metrikleri
+Route başına gecikme histogramları, SQL sorgu sayısı/süresi (SQLAlchemy
+event hook'ları) ve önbellek isabetlerini Prometheus metin formatında sunar
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Histogram sınırları (saniye / adet)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Yavaş istek logunda gösterilen en fazla sorgu ve SQL uzunluğu
+MAX_LOGGED_QUERIES = 50
+MAX_STATEMENT_LENGTH = 300
+
+# Request dışında (arka plan işleri, scraper thread'leri) çalışan SQL'in etiketi
+BACKGROUND = '_background'
+
+
+class Histogram:
+    """Prometheus uyumlu kümülatif histogram (kilit çağırana ait)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, limit in enumerate(self.buckets):
+            if value <= limit:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        cumulative = 0
+        for limit, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(labels, le=_number(limit))} {cumulative}'
+        yield f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}'
+        yield f'{name}_sum{_labels(labels)} {_number(self.total)}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels, **extra):
+    items = {**labels, **extra}
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in items.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(items, escaped)) + '}'
+
+
+def _compact_sql(statement):
+    statement = re.sub(r'\s+', ' ', statement).strip()
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH] + '...'
+    return statement
+
+
+class DashboardMetrics:
+    """
+    Flask uygulaması için istek ve SQL metrikleri.
+
+    `slow_request_ms` verilirse (opsiyonel) bu süreyi aşan istekler çalıştırdıkları
+    sorgu listesiyle birlikte WARNING seviyesinde loglanır.
+    """
+
+    def __init__(self, slow_request_ms=None):
+        self.slow_request_ms = slow_request_ms
+        self._lock = threading.Lock()
+        self._latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (endpoint, method)
+        self._query_counts = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))  # endpoint
+        self._requests = Counter()  # (endpoint, method, status)
+        self._sql_seconds = Counter()  # endpoint
+        self._sql_statements = Counter()  # endpoint
+        self._collectors = []
+        self._sql_hooked = False
+
+    # --- Kurulum ---
+
+    def init_app(self, app):
+        if self.slow_request_ms is None:
+            self.slow_request_ms = app.config.get('SLOW_REQUEST_MS')
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        self.hook_sqlalchemy()
+
+    def hook_sqlalchemy(self):
+        """Tüm engine'lerde sorgu süresini ölç (Engine sınıfına bir kez bağlanır)"""
+        if self._sql_hooked:
+            return
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(Engine, 'handle_error', self._handle_error)
+        self._sql_hooked = True
+
+    def add_collector(self, collector):
+        """/metrics çıktısına ek satırlar üreten fonksiyon ekle"""
+        self._collectors.append(collector)
+
+    # --- Hook'lar ---
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_queries = []
+        # Aynı süreçte birden çok DashboardMetrics varsa (örn. testler) istek
+        # sorgularını sadece isteği başlatan örnek toplar
+        g.metrics_owner = self
+
+    def _after_request(self, response):
+        start = g.pop('metrics_start', None)
+        queries = g.pop('metrics_queries', None) or []
+        g.pop('metrics_owner', None)
+        if start is None:
+            return response
+
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            self._latency[(endpoint, request.method)].observe(elapsed)
+            self._query_counts[endpoint].observe(len(queries))
+            self._requests[(endpoint, request.method, response.status_code)] += 1
+
+        if self.slow_request_ms is not None and elapsed * 1000 >= self.slow_request_ms:
+            self._log_slow_request(endpoint, elapsed, queries, response.status_code)
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        in_request = has_request_context() and g.get('metrics_owner') is self
+        endpoint = (request.endpoint or 'unmatched') if in_request else BACKGROUND
+        with self._lock:
+            self._sql_seconds[endpoint] += elapsed
+            self._sql_statements[endpoint] += 1
+        if in_request:
+            g.metrics_queries.append((statement, elapsed))
+
+    def _handle_error(self, exception_context):
+        # Hata veren sorguda after_cursor_execute çağrılmaz: başlangıç zamanını at
+        connection = exception_context.connection
+        starts = connection.info.get('metrics_query_start') if connection is not None else None
+        if starts:
+            starts.pop()
+
+    def _log_slow_request(self, endpoint, elapsed, queries, status):
+        sql_time = sum(duration for _, duration in queries)
+        lines = [
+            f"🐢 Yavaş istek: {request.method} {request.full_path.rstrip('?')} -> {status} "
+            f"({endpoint}) {elapsed * 1000:.1f} ms, {len(queries)} sorgu / {sql_time * 1000:.1f} ms SQL"
+        ]
+        for statement, duration in queries[:MAX_LOGGED_QUERIES]:
+            lines.append(f"    {duration * 1000:8.2f} ms  {_compact_sql(statement)}")
+        if len(queries) > MAX_LOGGED_QUERIES:
+            lines.append(f"    ... {len(queries) - MAX_LOGGED_QUERIES} sorgu daha")
+        logger.warning('\n'.join(lines))
+
+    # --- Çıktı ---
+
+    def render(self):
+        """Prometheus text exposition formatı (0.0.4)"""
+        with self._lock:
+            lines = [
+                '# HELP dashboard_request_duration_seconds İstek süresi (route bazında)',
+                '# TYPE dashboard_request_duration_seconds histogram',
+            ]
+            for (endpoint, method), histogram in sorted(self._latency.items()):
+                lines.extend(histogram.render('dashboard_request_duration_seconds',
+                                              {'endpoint': endpoint, 'method': method}))
+
+            lines += [
+                '# HELP dashboard_requests_total Tamamlanan istek sayısı',
+                '# TYPE dashboard_requests_total counter',
+            ]
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'dashboard_requests_total'
+                             f'{_labels({"endpoint": endpoint, "method": method, "status": status})} {count}')
+
+            lines += [
+                '# HELP dashboard_request_sql_queries İstek başına SQL sorgu sayısı',
+                '# TYPE dashboard_request_sql_queries histogram',
+            ]
+            for endpoint, histogram in sorted(self._query_counts.items()):
+                lines.extend(histogram.render('dashboard_request_sql_queries', {'endpoint': endpoint}))
+
+            lines += [
+                '# HELP dashboard_sql_queries_total Çalıştırılan SQL ifadesi sayısı',
+                '# TYPE dashboard_sql_queries_total counter',
+            ]
+            for endpoint, count in sorted(self._sql_statements.items()):
+                lines.append(f'dashboard_sql_queries_total{_labels({"endpoint": endpoint})} {count}')
+
+            lines += [
+                '# HELP dashboard_sql_seconds_total SQL ifadelerinde geçen toplam süre',
+                '# TYPE dashboard_sql_seconds_total counter',
+            ]
+            for endpoint, seconds in sorted(self._sql_seconds.items()):
+                lines.append(f'dashboard_sql_seconds_total{_labels({"endpoint": endpoint})} {_number(seconds)}')
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+def response_cache_metrics(cache):
+    """ResponseCache isabet/ıska sayaçları için collector"""
+    def collect():
+        with cache._lock:
+            stats = sorted(cache.view_stats.items())
+        yield '# HELP dashboard_response_cache_requests_total Yanıt önbelleği sonuçları'
+        yield '# TYPE dashboard_response_cache_requests_total counter'
+        for (endpoint, outcome), count in stats:
+            yield f'dashboard_response_cache_requests_total{_labels({"endpoint": endpoint, "result": outcome})} {count}'
+        yield '# HELP dashboard_response_cache_entries Önbellekteki yanıt sayısı'
+        yield '# TYPE dashboard_response_cache_entries gauge'
+        yield f'dashboard_response_cache_entries {len(cache)}'
+    return collect
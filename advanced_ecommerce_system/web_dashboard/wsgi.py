@@ -0,0 +1,50 @@
+"""
+E-Ticaret Fiyat Analiz Sistemi - Production WSGI Giriş Noktası
+
+Linux / macOS (gunicorn, proje dizininden):
+    gunicorn -c gunicorn.conf.py web_dashboard.wsgi:application
+
+Windows (waitress):
+    python web_dashboard/wsgi.py
+"""
+
+import logging
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database.models import get_db_manager
+from web_dashboard.app import app
+
+logger = logging.getLogger(__name__)
+
+# Tablolar/indeksler yoksa oluştur (idempotent)
+get_db_manager().create_tables()
+
+application = app
+
+
+def main():
+    """Windows'ta gunicorn çalışmadığı için waitress ile çok thread'li sunum"""
+    host = os.environ.get('DASHBOARD_HOST', '0.0.0.0')
+    port = int(os.environ.get('DASHBOARD_PORT', 5000))
+    threads = int(os.environ.get('DASHBOARD_THREADS', 16))
+
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("⚠️ waitress yüklü değil (pip install waitress), Flask thread'li sunucusu kullanılıyor")
+        app.run(host=host, port=port, threaded=True, debug=False)
+        return
+
+    logger.info(f"🚀 Dashboard http://{host}:{port} adresinde ({threads} thread)")
+    # SSE bağlantıları birer thread tutar (app.py eşzamanlı akışları DASHBOARD_SSE_MAX_STREAMS
+    # ile thread sayısının altında tutar); channel_timeout heartbeat aralığından uzun olmalı
+    serve(application, host=host, port=port, threads=threads, channel_timeout=120)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,13 +1,19 @@
 """
 Fiyat Takip Sistemi Zamanlayıcısı
-Günde 1 kez belirli saatte çalışır
+Günde 1 kez belirli saatte çalışır. Zamanlama ScrapingJob tablosu üzerinden
+yapılır (advanced_ecommerce_system/core/job_scheduler.py): aynı komut birden
+fazla makinede çalıştırılırsa katalog shard'ları worker'lar arasında paylaşılır,
+yarıda kalan veya kaçırılan çalışmalar yeniden başlatıldığında tamamlanır.
 """
 
-import schedule
-import time
 import logging
-from datetime import datetime
-from price_monitor import PriceMonitor
+import os
+import sys
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'advanced_ecommerce_system')
+sys.path.append(PROJECT_DIR)
+
+from core.job_scheduler import DEFAULT_SCHEDULES, JobScheduler, load_schedules
 
 # Logging yapılandırması
 logging.basicConfig(
@@ -26,53 +32,33 @@ class PriceScheduler:
         run_time: Çalışma saati (HH:MM formatında)
         """
         self.run_time = run_time
-        self.monitor = PriceMonitor()
+        hour, minute = (int(part) for part in run_time.split(':'))
+        
+        # config.json / DEFAULT_SCHEDULES'taki tüm işler (saatlik rollup, saklama,
+        # haftalık arşiv ...) korunur; sadece sync ve fiyat kontrolü saati değişir.
+        # Networks sync fiyat kontrolünden 30 dakika önce
+        sync_hour, sync_minute = divmod(hour * 60 + minute - 30, 60)
+        schedules = {name: dict(schedule) for name, schedule in load_schedules().items()}
+        schedules['daily_networks_sync'] = {**DEFAULT_SCHEDULES['daily_networks_sync'],
+                                            **schedules.get('daily_networks_sync', {}),
+                                            'cron': f"{sync_minute} {sync_hour % 24} * * *"}
+        schedules['daily_price_check'] = {**DEFAULT_SCHEDULES['daily_price_check'],
+                                          **schedules.get('daily_price_check', {}),
+                                          'cron': f"{minute} {hour} * * *"}
+        self.scheduler = JobScheduler(schedules=schedules)
         
     def run_price_check(self):
-        """Fiyat kontrolü çalıştır"""
+        """Vadesi gelen/yarım kalan işleri şimdi çalıştır"""
         try:
-            logging.info(f"🕐 Zamanlanmış fiyat kontrolü başlıyor - {datetime.now()}")
-            success = self.monitor.run()
-            
-            if success:
-                logging.info("✅ Zamanlanmış kontrol başarıyla tamamlandı")
-            else:
-                logging.error("❌ Zamanlanmış kontrol başarısız")
-                
+            processed = self.scheduler.run_pending()
+            logging.info(f"✅ {processed} zamanlanmış iş işlendi")
         except Exception as e:
             logging.error(f"Zamanlayıcı hatası: {e}")
     
     def start_scheduler(self):
-        """Zamanlayıcıyı başlat"""
+        """Zamanlayıcıyı başlat (kaçırılan son slot varsa hemen çalışır)"""
         logging.info(f"🚀 Fiyat takip zamanlayıcısı başlatılıyor - Her gün {self.run_time}")
-        
-        # Günlük çalışma zamanını planla
-        schedule.every().day.at(self.run_time).do(self.run_price_check)
-        
-        # Test çalışması (hemen 1 kez çalıştır)
-        logging.info("🧪 Test çalışması yapılıyor...")
-        self.run_price_check()
-        
-        # Sonsuz döngü
-        logging.info("⏰ Zamanlayıcı aktif - Çalışma bekleniyor...")
-        
-        while True:
-            try:
-                schedule.run_pending()
-                time.sleep(60)  # Her dakika kontrol et
-                
-                # Her saat başı durum mesajı
-                now = datetime.now()
-                if now.minute == 0:
-                    next_run = schedule.next_run()
-                    logging.info(f"📅 Sistem aktif - Sonraki çalışma: {next_run}")
-                    
-            except KeyboardInterrupt:
-                logging.info("⛔ Zamanlayıcı durduruldu (Ctrl+C)")
-                break
-            except Exception as e:
-                logging.error(f"Zamanlayıcı döngü hatası: {e}")
-                time.sleep(300)  # 5 dakika bekle ve devam et
+        self.scheduler.run_forever()
 
 def main():
     """Manuel başlatma"""
@@ -85,6 +71,9 @@ def main():
         run_time = sys.argv[1]
         logging.info(f"Özel çalışma saati: {run_time}")
     
+    # Veritabanı ve config.json proje dizininde
+    os.chdir(PROJECT_DIR)
+    
     scheduler = PriceScheduler(run_time=run_time)
     scheduler.start_scheduler()
 